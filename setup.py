@@ -44,6 +44,9 @@ setup(
         "console_scripts": [
             "entityidentity-test=tests.run:main",
             "entityidentity-examples=tests.examples:main",
+            "entityidentity-bench=tests.bench.run:main",
+            "entityidentity-resolve=tests.bench.stream:main",
+            "entityidentity-serve=tests.bench.server:main",
         ],
     },
 )
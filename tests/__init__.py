@@ -16,3 +16,6 @@ TEST_SUITE_NAME = "entityidentity-installtest"
 MINIMUM_COMPANIES = 5
 MINIMUM_COUNTRIES = 2
 
+# Benchmark configuration
+LATENCY_BUDGET_MS = 100  # README promise: <100ms for most queries
+
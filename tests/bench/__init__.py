@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for the entityidentity package
+
+This package measures what the installtest suite otherwise only checks for
+correctness:
+- Query latency percentiles for match_company / resolve_company
+- Cold (first call) versus warm (steady state) timings
+- Throughput in queries per second
+
+Run via the ``entityidentity-bench`` console script or ``python -m tests.bench.run``.
+"""
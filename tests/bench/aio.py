@@ -0,0 +1,225 @@
+"""
+asyncio front end for company resolution
+
+resolve_company is synchronous and CPU-bound, so calling it from a coroutine
+stalls the event loop for the whole scoring step. AsyncResolver runs each
+resolution on a bounded thread pool instead, and:
+
+- applies backpressure: at most ``max_pending`` resolutions are queued or
+  running; further callers wait for a slot instead of piling up work
+- coalesces identical in-flight requests: concurrent calls with the same
+  ``(normalize_name(name), COUNTRY)`` key share one computation
+
+Module-level aresolve_company / aresolve_companies use a shared default
+resolver over entityidentity.resolve_company.
+
+``entityidentity-bench async`` measures event-loop lag under concurrent
+clients.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from entityidentity import normalize_name
+
+_DEFAULT = None
+
+
+class AsyncResolver:
+    """Awaitable resolve_company with a bounded executor and request coalescing
+
+    Args:
+        resolve: Function resolve(name, country=None) returning a
+            resolve_company-style dict (defaults to entityidentity's)
+        max_workers: Threads running resolutions
+        max_pending: Distinct resolutions allowed in flight before new callers
+            wait (backpressure)
+
+    Results shared by coalesced callers must be treated as read-only; only the
+    top-level dict and its 'query' entry are copied per caller.
+    """
+
+    def __init__(self, resolve=None, max_workers=4, max_pending=64):
+        if resolve is None:
+            from entityidentity import resolve_company as resolve
+        self._resolve = resolve
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="entityidentity")
+        self._slots = None
+        self._loop = None
+        self._inflight = {}
+        self._pending = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.peak_pending = 0
+
+    def close(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Counters: computed, coalesced, in_flight and peak_pending"""
+        return {
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "peak_pending": self.peak_pending,
+        }
+
+    async def _compute(self, key, name, country):
+        """Run one resolution on the executor once a slot is free"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A semaphore belongs to one event loop; make one per running loop
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+        try:
+            async with self._slots:
+                self._pending += 1
+                self.peak_pending = max(self.peak_pending, self._pending)
+                try:
+                    return await loop.run_in_executor(self._executor, self._resolve, name,
+                                                      country)
+                finally:
+                    self._pending -= 1
+                    self.computed += 1
+        finally:
+            del self._inflight[key]
+
+    async def aresolve_company(self, name, country=None):
+        """Awaitable equivalent of entityidentity.resolve_company(name, country)"""
+        key = (normalize_name(name), country.upper() if country else None)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, name, country))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # shield: one caller being cancelled must not cancel the shared work
+        result = await asyncio.shield(task)
+        return dict(result, query=dict(result["query"], name=name, country=country))
+
+    async def amatch_company(self, name, country=None):
+        """Awaitable equivalent of entityidentity.match_company(name, country)"""
+        return (await self.aresolve_company(name, country)).get("final")
+
+    async def aresolve_companies(self, names, country=None):
+        """Resolve many names concurrently
+
+        Names are fed through at most ``max_pending`` worker coroutines, so a
+        long list does not create one task per name up front.
+
+        Args:
+            names: Iterable of company names
+            country: Optional country code for every name, or an iterable of
+                per-name country codes aligned with names
+
+        Returns:
+            List of resolve_company-style dicts in input order
+        """
+        names = list(names)
+        if country is None or isinstance(country, str):
+            countries = [country] * len(names)
+        else:
+            countries = list(country)
+        results = [None] * len(names)
+        position = iter(enumerate(zip(names, countries)))
+
+        async def worker():
+            for i, (name, c) in position:
+                results[i] = await self.aresolve_company(name, c)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_pending, len(names)))))
+        return results
+
+
+def _default_resolver():
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = AsyncResolver()
+    return _DEFAULT
+
+
+async def aresolve_company(name, country=None):
+    """Resolve one company name without blocking the event loop"""
+    return await _default_resolver().aresolve_company(name, country)
+
+
+async def aresolve_companies(names, country=None):
+    """Resolve many company names concurrently without blocking the event loop"""
+    return await _default_resolver().aresolve_companies(names, country)
+
+
+async def _measure_lag(stop, interval, lags):
+    """Record how late the loop wakes a task that sleeps for interval seconds"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def _load(call, queries, concurrency):
+    """Issue queries from concurrency clients; return per-request latencies"""
+    latencies = []
+    position = iter(range(len(queries)))
+
+    async def client():
+        for i in position:
+            name, country = queries[i]
+            start = time.perf_counter()
+            await call(name, country)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+def loop_lag_benchmark(queries, resolve, concurrency=32, max_workers=4, max_pending=64,
+                       interval=0.001):
+    """Event-loop lag and request latency while serving a query load
+
+    Runs the same queries once with resolve called directly inside the
+    coroutines ("blocking") and once through AsyncResolver ("async"), while a
+    probe task measures how late the loop wakes it.
+
+    Args:
+        queries: List of (name, country) pairs
+        resolve: Function resolve(name, country=None)
+
+    Returns:
+        Dict keyed by mode with lag p50/p99/max and request p50/p99 in ms,
+        plus the AsyncResolver stats
+    """
+    from tests.bench.timing import percentile
+
+    async def blocking_call(name, country):
+        return resolve(name, country)
+
+    async def run(call):
+        stop = asyncio.Event()
+        lags = []
+        probe = asyncio.ensure_future(_measure_lag(stop, interval, lags))
+        start = time.perf_counter()
+        latencies = await _load(call, queries, concurrency)
+        seconds = time.perf_counter() - start
+        stop.set()
+        await probe
+        return {
+            "lag_p50_ms": percentile(lags, 50) * 1000,
+            "lag_p99_ms": percentile(lags, 99) * 1000,
+            "lag_max_ms": max(lags) * 1000,
+            "request_p50_ms": percentile(latencies, 50) * 1000,
+            "request_p99_ms": percentile(latencies, 99) * 1000,
+            "qps": len(queries) / seconds,
+        }
+
+    results = {"blocking": asyncio.run(run(blocking_call))}
+    resolver = AsyncResolver(resolve, max_workers=max_workers, max_pending=max_pending)
+    try:
+        results["async"] = asyncio.run(run(resolver.aresolve_company))
+        results["async"]["stats"] = resolver.stats()
+    finally:
+        resolver.close()
+    return results
@@ -0,0 +1,288 @@
+"""
+MinHash LSH candidate retrieval for very large company tables
+
+Prefix blocking scores every name sharing the query's first token, which at
+millions of rows is still tens of thousands of RapidFuzz calls per query.
+MinHashIndex shortlists instead by locality-sensitive hashing:
+
+1. Each name_norm (and normalized alias) becomes its set of character
+   trigrams of `` name ``.
+2. ``num_perm`` multiply-shift hashes give a MinHash signature per name; two
+   names agree on one signature position with probability equal to the
+   Jaccard similarity of their trigram sets.
+3. The signature is cut into ``bands`` bands of ``num_perm // bands`` values,
+   each hashed to a 32-bit bucket key. Every band is a sorted key array, so
+   a query costs one binary search per band.
+4. Rows sharing a bucket with the query in any band are candidates, ranked by
+   how many bands they share, cut to ``max_candidates`` and re-scored by
+   CompanyIndex exactly as entityidentity scores.
+
+More bands (fewer values per band) raise recall and candidate counts; more
+``max_candidates`` raise recall and re-scoring time. Buckets holding more
+than ``bucket_limit`` entries are skipped as uninformative.
+
+Only NumPy is needed; the index is a handful of arrays that are saved with
+the CompanyIndex arrays and can be memory-mapped.
+
+``entityidentity-bench ann`` reports recall@k against exhaustive scoring and
+per-query latency, by default at 1M and 5M rows.
+"""
+import time
+
+import numpy as np
+
+from tests.bench.search import _packed_codes, _trigram_keys
+
+NUM_PERM = 64
+BANDS = 32
+MAX_CANDIDATES = 200
+BUCKET_LIMIT = 5_000
+# Names hashed per pass while building, to bound the temporary gram arrays
+CHUNK_ROWS = 250_000
+# Name of the all-countries partition
+ALL_SCOPE = "*"
+
+
+def _mix64(x):
+    """splitmix64 finalizer: spread the bits of a uint64 array"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def gram_hashes(norms):
+    """Hashed trigrams of space-padded names
+
+    Returns:
+        Tuple (hashes, positions): uint64 gram hashes and the position in
+        norms each came from, grouped by position
+    """
+    codes, positions = _packed_codes([f" {norm} " for norm in norms])
+    keys, valid = _trigram_keys(codes)
+    return _mix64(keys[valid]), positions[:-2][valid]
+
+
+class MinHashIndex:
+    """Banded MinHash LSH over normalized names, partitioned by country on lookup
+
+    Args:
+        name_norm: Array of normalized company names
+        country: Array of upper-case country codes aligned with name_norm
+        aliases: Optional list of (alias norm array, present mask) pairs
+        num_perm: MinHash signature length
+        bands: LSH bands (must divide num_perm)
+        max_candidates: Shortlist size returned per query
+        bucket_limit: Buckets with more entries than this are not read
+        seed: Seed for the hash coefficients
+    """
+
+    def __init__(self, name_norm, country, aliases=(), num_perm=NUM_PERM, bands=BANDS,
+                 max_candidates=MAX_CANDIDATES, bucket_limit=BUCKET_LIMIT, seed=0):
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.max_candidates = max_candidates
+        self.bucket_limit = bucket_limit
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing; row 0 a, row 1 b
+        self.coeffs = rng.integers(0, 2 ** 63, size=(2, num_perm), dtype=np.uint64)
+        self.coeffs[0] |= np.uint64(1)
+
+        country = np.asarray(country).astype(str)
+        self.scopes = np.array([ALL_SCOPE] + sorted(set(country) - {""}), dtype=str)
+        scope_of_row = np.searchsorted(self.scopes[1:], country) + 1
+        scope_of_row[~np.isin(country, self.scopes[1:])] = 0
+        self.scope_of_row = scope_of_row.astype(np.int16)
+
+        keys, rows = [], []
+        sources = [(name_norm, None)] + list(aliases)
+        for norms, present in sources:
+            source_rows = np.arange(len(norms)) if present is None else np.flatnonzero(present)
+            for start in range(0, len(source_rows), CHUNK_ROWS):
+                chunk = source_rows[start:start + CHUNK_ROWS]
+                hashes, positions = gram_hashes([str(norms[r]) for r in chunk])
+                if not len(hashes):
+                    continue
+                first, band_keys = self._band_keys(hashes, positions)
+                keys.append(band_keys)
+                rows.append(chunk[first].astype(np.int32))
+        keys = np.concatenate(keys, axis=1) if keys else np.empty((bands, 0), np.uint32)
+        rows = np.concatenate(rows) if rows else np.empty(0, np.int32)
+
+        self.keys = keys
+        self.rows = np.empty(keys.shape, dtype=np.int32)
+        for band in range(bands):
+            order = np.argsort(keys[band], kind="stable")
+            self.keys[band] = keys[band][order]
+            self.rows[band] = rows[order]
+
+    def _band_keys(self, hashes, positions):
+        """MinHash signatures of grouped grams, reduced to one key per band
+
+        Returns:
+            Tuple (first, keys): the position of each signed name and a
+            (bands, names) uint32 array of bucket keys
+        """
+        starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        per_band = self.num_perm // self.bands
+        keys = np.empty((self.bands, len(starts)), dtype=np.uint32)
+        a, b = self.coeffs
+        for band in range(self.bands):
+            key = np.zeros(len(starts), dtype=np.uint64)
+            for i in range(band * per_band, (band + 1) * per_band):
+                value = np.minimum.reduceat((hashes * a[i] + b[i]) >> np.uint64(32), starts)
+                key = _mix64(key ^ value)
+            keys[band] = key >> np.uint64(32)
+        return positions[starts], keys
+
+    def __len__(self):
+        return len(self.scope_of_row)
+
+    def to_arrays(self):
+        """Return the index arrays, prefixed for storage alongside the CompanyIndex"""
+        return {
+            "minhash_keys": self.keys,
+            "minhash_rows": self.rows,
+            "minhash_coeffs": self.coeffs,
+            "minhash_scopes": self.scopes,
+            "minhash_scope_of_row": self.scope_of_row,
+            "minhash_params": np.array([self.num_perm, self.bands, self.max_candidates,
+                                        self.bucket_limit], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild from to_arrays() output without copying (mmaps stay mmaps)"""
+        index = cls.__new__(cls)
+        index.keys = arrays["minhash_keys"]
+        index.rows = arrays["minhash_rows"]
+        index.coeffs = arrays["minhash_coeffs"]
+        index.scopes = arrays["minhash_scopes"]
+        index.scope_of_row = arrays["minhash_scope_of_row"]
+        index.num_perm, index.bands, index.max_candidates, index.bucket_limit = (
+            int(v) for v in arrays["minhash_params"]
+        )
+        return index
+
+    def _scope_id(self, scope):
+        """Return the partition number for a country scope (0 for all countries)"""
+        if scope:
+            i = np.searchsorted(self.scopes[1:], scope)
+            if i < len(self.scopes) - 1 and self.scopes[i + 1] == scope:
+                return i + 1
+        return 0
+
+    def query_keys(self, query_norm):
+        """Bucket key of a normalized query in every band (None if it has no trigrams)"""
+        hashes, positions = gram_hashes([query_norm])
+        if not len(hashes):
+            return None
+        return self._band_keys(hashes, positions)[1][:, 0]
+
+    def candidates(self, query_norm, scope=None):
+        """Shortlist rows sharing the most LSH buckets with a normalized query
+
+        Returns:
+            Ascending array of at most max_candidates row ids
+        """
+        query = self.query_keys(query_norm)
+        if query is None:
+            return self.rows[0, :0]
+        lists = []
+        for band, key in enumerate(query):
+            keys = self.keys[band]
+            lo = np.searchsorted(keys, key, side="left")
+            hi = np.searchsorted(keys, key, side="right")
+            if 0 < hi - lo <= self.bucket_limit:
+                lists.append(self.rows[band, lo:hi])
+        if not lists:
+            return self.rows[0, :0]
+
+        rows = np.concatenate(lists)
+        scope_id = self._scope_id(scope)
+        if scope_id:
+            rows = rows[self.scope_of_row[rows] == scope_id]
+        unique, counts = np.unique(rows, return_counts=True)
+        if len(unique) > self.max_candidates:
+            # Most shared bands first, lower row id on ties
+            order = np.lexsort((unique, -counts))[:self.max_candidates]
+            unique = np.sort(unique[order])
+        return unique.astype(np.int64)
+
+
+def ann_benchmark(sizes, n_queries=100, k=5, seed=0, **params):
+    """Recall@k and latency of MinHash retrieval against exhaustive scoring
+
+    For each size a synthetic table is indexed with blocking="minhash". The
+    exhaustive baseline scores every company in the query's country scope.
+    recall@k counts, per query, the retrieved top-k results scoring at least
+    the exhaustive k-th best score (so ties are not penalized), over k.
+    confident_recall is the fraction of queries whose exhaustive best scores
+    >= 88 (entityidentity's auto-accept threshold) where retrieval returns
+    that same best score.
+
+    Args:
+        sizes: Synthetic table sizes
+        n_queries: Noisy queries per size (exhaustive scoring dominates runtime)
+        k: Results kept per query
+        **params: MinHashIndex parameters (num_perm, bands, max_candidates,
+            bucket_limit)
+
+    Returns:
+        List of dicts with size, build seconds, mean candidates, recall@k,
+        confident_recall and p50/p95 latency in ms for both paths
+    """
+    from entityidentity import normalize_name
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+    from tests.bench.index import HIGH_CONF_THRESHOLD, CompanyIndex
+    from tests.bench.timing import percentile
+
+    results = []
+    for n in sizes:
+        companies = synthetic_companies(n, seed=seed)
+        queries = synthetic_queries(n_queries, companies, seed=seed + 1, known_fraction=0.8)
+        start = time.perf_counter()
+        index = CompanyIndex(companies, blocking="minhash", blocking_options=params)
+        build_seconds = time.perf_counter() - start
+        del companies
+
+        found, confident, confident_hits, candidates = 0.0, 0, 0, []
+        ann_latency, exact_latency = [], []
+        for name, country in queries.itertuples(index=False):
+            country = None if country != country else country  # NaN from the DataFrame
+            norm = normalize_name(name)
+
+            start = time.perf_counter()
+            rows = index.scope_rows[index.scope_for(country)]
+            exact, _, _ = index.score([norm], rows, country)
+            exact_top = np.sort(exact[0])[::-1][:k]
+            exact_latency.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            ranked = index.rank([norm], country, k)
+            ann_latency.append(time.perf_counter() - start)
+            candidates.append(len(index.block(norm, country)))
+
+            got = ranked["score"][0]
+            got = got[~np.isnan(got)]
+            if len(exact_top):
+                found += min(k, int((got >= exact_top[-1]).sum())) / len(exact_top)
+                if exact_top[0] >= HIGH_CONF_THRESHOLD:
+                    confident += 1
+                    confident_hits += bool(len(got)) and got[0] >= exact_top[0]
+        results.append({
+            "size": n,
+            "build_seconds": build_seconds,
+            "mean_candidates": float(np.mean(candidates)),
+            "recall_at_k": found / len(queries),
+            "confident_recall": confident_hits / confident if confident else 1.0,
+            "ann_p50_ms": percentile(ann_latency, 50) * 1000,
+            "ann_p95_ms": percentile(ann_latency, 95) * 1000,
+            "exact_p50_ms": percentile(exact_latency, 50) * 1000,
+            "exact_p95_ms": percentile(exact_latency, 95) * 1000,
+        })
+        del index
+    return results
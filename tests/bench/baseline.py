@@ -0,0 +1,448 @@
+"""
+Versioned performance baselines and regression gating
+
+The test runner can record a fixed set of benchmark metrics (cold import and
+load time, corpus latency percentiles, throughput, peak RSS) into a JSON
+baseline file keyed by entityidentity version and machine fingerprint, and
+fail a later run whose metrics regress beyond a tolerance. Timings only
+compare meaningfully on the same machine, so each fingerprint keeps its own
+baseline per version.
+
+Metrics are collected in fresh subprocesses by a probe that uses only the
+public entityidentity API, so any installed version can be measured: pass an
+interpreter (e.g. a virtualenv's ``bin/python``) or a directory created with
+``pip install --target`` and the probe runs against that installation. This
+is how two versions are compared before an upgrade is rolled out.
+
+Usage from the test runner:
+
+    entityidentity-test --perf-baseline [--baseline-file PATH]
+        [--tolerance 0.2] [--tolerance p99_ms=0.5] [--update-baseline]
+    entityidentity-test --compare-versions A B [--compare-output PATH]
+
+The first run of a version on a machine records its baseline in
+perf_baselines.json; later runs fail when a metric is worse by more than the
+tolerance. --compare-versions prints a markdown table for two installs, each
+``current``, an interpreter path or a ``pip install --target`` directory.
+
+A run whose probed resolve_company calls raise measures the exception path,
+not resolution, so gate() neither records nor passes it.
+"""
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from tests.bench.corpus import QUERY_CORPUS
+
+BASELINE_FILE = "perf_baselines.json"
+SCHEMA_VERSION = 1
+DEFAULT_TOLERANCE = 0.2
+# Probe processes per measurement; each metric keeps its best value
+DEFAULT_RUNS = 3
+DEFAULT_REPEATS = 20
+
+# Metric name -> (direction, absolute slack). A metric regresses when it is
+# worse than the baseline by more than the relative tolerance *and* by more
+# than the slack, so sub-millisecond jitter on fast metrics does not fail runs.
+METRICS = {
+    "import_ms": ("lower", 20.0),
+    "load_ms": ("lower", 20.0),
+    "first_query_ms": ("lower", 5.0),
+    "p50_ms": ("lower", 0.5),
+    "p95_ms": ("lower", 1.0),
+    "p99_ms": ("lower", 2.0),
+    "throughput_qps": ("higher", 0.0),
+    "peak_rss_mb": ("lower", 10.0),
+    "error_rate": ("lower", 0.0),
+}
+
+# Executed in the child interpreter: argv[1] is the JSON query corpus, argv[2]
+# the number of warm replays. Only the public entityidentity API is used.
+PROBE = r"""
+import json, sys, time
+queries = json.loads(sys.argv[1])
+repeats = int(sys.argv[2])
+
+start = time.perf_counter()
+import entityidentity
+import_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+companies = entityidentity.list_companies()
+load_seconds = time.perf_counter() - start
+
+first_error = None
+
+def call(name, country):
+    global first_error
+    try:
+        entityidentity.resolve_company(name, country=country)
+        return 0
+    except Exception as e:
+        first_error = first_error or f"{type(e).__name__}: {e}"
+        return 1
+
+start = time.perf_counter()
+call(*queries[0])
+first_query_seconds = time.perf_counter() - start
+
+latencies, errors = [], 0
+replay_start = time.perf_counter()
+for _ in range(repeats):
+    for name, country in queries:
+        for hint in (country, None):
+            start = time.perf_counter()
+            errors += call(name, hint)
+            latencies.append(time.perf_counter() - start)
+replay_seconds = time.perf_counter() - replay_start
+
+peak = None
+try:
+    with open("/proc/self/status") as f:
+        peak = next(int(l.split()[1]) * 1024 for l in f if l.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if sys.platform == "darwin" else peak * 1024
+
+try:
+    from importlib.metadata import version
+    version = version("entityidentity")
+except Exception:
+    version = getattr(entityidentity, "__version__", None)
+
+print(json.dumps({
+    "version": version,
+    "rows": len(companies),
+    "import_seconds": import_seconds,
+    "load_seconds": load_seconds,
+    "first_query_seconds": first_query_seconds,
+    "latencies": latencies,
+    "errors": errors,
+    "first_error": first_error,
+    "replay_seconds": replay_seconds,
+    "peak_rss": peak,
+}))
+"""
+
+
+def _cpu_model():
+    """Return the CPU model name, or the platform processor string"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _total_memory_gb():
+    """Return total physical memory in GB (rounded), or None if unavailable"""
+    try:
+        return round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2 ** 30)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def machine_fingerprint():
+    """Describe the machine timings were taken on
+
+    Only stable hardware and interpreter properties are included (not the
+    hostname), so containers built from the same image on the same hardware
+    share baselines.
+
+    Returns:
+        Dict of machine properties with an 'id' hash of them
+    """
+    machine = {
+        "system": platform.system(),
+        "arch": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "memory_gb": _total_memory_gb(),
+        "python": ".".join(platform.python_version_tuple()[:2]),
+        "implementation": platform.python_implementation(),
+    }
+    digest = hashlib.sha1(json.dumps(machine, sort_keys=True).encode()).hexdigest()
+    return {"id": digest[:12], **machine}
+
+
+def _environment(target):
+    """Return (interpreter, extra environment) for a version target
+
+    Args:
+        target: None for the current environment, a Python executable, or a
+            directory holding an installed entityidentity (pip install --target)
+    """
+    if target is None:
+        return sys.executable, {}
+    path = Path(target)
+    if path.is_dir():
+        pythonpath = os.pathsep.join(filter(None, [str(path), os.environ.get("PYTHONPATH")]))
+        return sys.executable, {"PYTHONPATH": pythonpath}
+    return str(target), {}
+
+
+def probe(target=None, repeats=DEFAULT_REPEATS, queries=QUERY_CORPUS):
+    """Run the metrics probe once in a fresh interpreter
+
+    Returns:
+        Raw probe output (seconds, latency list, error count, peak RSS bytes)
+    """
+    python, extra = _environment(target)
+    proc = subprocess.run(
+        [python, "-c", PROBE, json.dumps([list(q) for q in queries]), str(repeats)],
+        capture_output=True, text=True, env={**os.environ, **extra},
+        cwd=str(Path(__file__).resolve().parents[2]),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Baseline probe failed for {target or python}:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize_probe(raw):
+    """Reduce one probe's raw output to the METRICS values"""
+    from tests.bench.timing import percentile
+
+    latencies = raw["latencies"]
+    return {
+        "import_ms": raw["import_seconds"] * 1000,
+        "load_ms": raw["load_seconds"] * 1000,
+        "first_query_ms": raw["first_query_seconds"] * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_qps": len(latencies) / raw["replay_seconds"] if raw["replay_seconds"] else 0.0,
+        "peak_rss_mb": raw["peak_rss"] / 2 ** 20 if raw["peak_rss"] else None,
+        "error_rate": raw["errors"] / len(latencies) if latencies else 0.0,
+    }
+
+
+def best_of(runs):
+    """Combine per-run metrics, keeping each metric's best value across runs
+
+    Taking the best (not the mean) of several fresh processes filters out
+    interference from other work on the machine, which otherwise dominates
+    run-to-run variation of a short benchmark.
+    """
+    combined = {}
+    for name, (direction, _) in METRICS.items():
+        values = [run[name] for run in runs if run.get(name) is not None]
+        if values:
+            combined[name] = min(values) if direction == "lower" else max(values)
+    return combined
+
+
+def collect_metrics(target=None, runs=DEFAULT_RUNS, repeats=DEFAULT_REPEATS):
+    """Measure the baseline metrics of one installed entityidentity
+
+    Args:
+        target: None for the current environment, a Python executable, or a
+            directory holding an installed entityidentity
+        runs: Fresh probe processes; each metric keeps its best value
+        repeats: Warm replays of the corpus per process
+
+    Returns:
+        Dict with 'version', 'rows', 'metrics' and 'first_error' (the first
+        exception a probed call raised, or None)
+    """
+    raws = [probe(target, repeats) for _ in range(runs)]
+    return {
+        "version": raws[0]["version"],
+        "rows": raws[0]["rows"],
+        "metrics": best_of([summarize_probe(raw) for raw in raws]),
+        "first_error": next((raw["first_error"] for raw in raws if raw.get("first_error")), None),
+    }
+
+
+def baseline_key(version, fingerprint):
+    """Key of a baseline entry: entityidentity version and machine fingerprint id"""
+    return f"{version}@{fingerprint['id']}"
+
+
+def load_baselines(path=BASELINE_FILE):
+    """Read a baseline file, returning an empty one if it does not exist"""
+    path = Path(path)
+    if not path.exists():
+        return {"schema": SCHEMA_VERSION, "baselines": {}}
+    data = json.loads(path.read_text())
+    if data.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported baseline schema {data.get('schema')!r}")
+    return data
+
+
+def record_baseline(path, measurement, fingerprint=None):
+    """Store a measurement as the baseline for its version on this machine
+
+    Entries for other versions and machines are kept, so one file can hold
+    the history of every version measured on every machine.
+
+    Returns:
+        The stored entry
+    """
+    fingerprint = fingerprint or machine_fingerprint()
+    data = load_baselines(path)
+    entry = {
+        "entityidentity_version": measurement["version"],
+        "machine": fingerprint,
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "rows": measurement["rows"],
+        "metrics": measurement["metrics"],
+    }
+    data["baselines"][baseline_key(measurement["version"], fingerprint)] = entry
+    Path(path).write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+    return entry
+
+
+def find_baseline(path, version, fingerprint=None):
+    """Return the stored entry for a version on this machine, or None"""
+    fingerprint = fingerprint or machine_fingerprint()
+    return load_baselines(path)["baselines"].get(baseline_key(version, fingerprint))
+
+
+def parse_tolerances(specs):
+    """Parse tolerance options into (default, per-metric overrides)
+
+    Args:
+        specs: Strings such as "0.2" (the default for every metric) or
+            "p99_ms=0.5" (one metric)
+
+    Returns:
+        Tuple (default tolerance, dict of per-metric tolerances)
+    """
+    default, overrides = DEFAULT_TOLERANCE, {}
+    for spec in specs or ():
+        name, sep, value = spec.rpartition("=")
+        if not sep:
+            default = float(value)
+        elif name in METRICS:
+            overrides[name] = float(value)
+        else:
+            raise ValueError(f"Unknown metric {name!r}; expected one of {', '.join(METRICS)}")
+    return default, overrides
+
+
+def check_regressions(current, baseline, tolerance=DEFAULT_TOLERANCE, overrides=None):
+    """Compare metrics against a baseline
+
+    Args:
+        current: Dict of metric values for this run
+        baseline: Dict of metric values from the baseline file
+        tolerance: Allowed relative worsening (0.2 = 20%) for every metric
+        overrides: Optional per-metric tolerances
+
+    Returns:
+        List of dicts (metric, baseline, current, change) for every metric that
+        got worse by more than its tolerance and its absolute slack; change is
+        the relative worsening. Metrics missing on either side are skipped.
+    """
+    overrides = overrides or {}
+    regressions = []
+    for name, (direction, slack) in METRICS.items():
+        old, new = baseline.get(name), current.get(name)
+        if old is None or new is None:
+            continue
+        worse_by = new - old if direction == "lower" else old - new
+        limit = abs(old) * overrides.get(name, tolerance)
+        if worse_by > limit and worse_by > slack:
+            regressions.append({
+                "metric": name,
+                "baseline": old,
+                "current": new,
+                "change": worse_by / abs(old) if old else float("inf"),
+            })
+    return regressions
+
+
+def _format(value):
+    """Format a metric value for a table cell"""
+    if value is None:
+        return "-"
+    return f"{value:,.3f}" if abs(value) < 10 else f"{value:,.1f}"
+
+
+def probe_error_warning(measurement):
+    """Warning for a measurement whose probed calls raised, or None if none did"""
+    rate = measurement["metrics"].get("error_rate")
+    if not rate:
+        return None
+    return (f"entityidentity {measurement['version']}: {rate:.0%} of probed resolve_company "
+            f"calls raised ({measurement.get('first_error')}); its timings measure the "
+            f"exception path")
+
+
+def comparison_table(a, b, label_a=None, label_b=None):
+    """Markdown table comparing two measurements metric by metric
+
+    Args:
+        a, b: collect_metrics() results (or baseline entries' metrics wrapped
+            in {'version': ..., 'metrics': ...})
+        label_a, label_b: Column headings (default: the versions)
+
+    Returns:
+        Markdown table string; the change column is relative to a, marked
+        better/worse according to each metric's direction
+    """
+    label_a = label_a or f"entityidentity {a['version']}"
+    label_b = label_b or f"entityidentity {b['version']}"
+    lines = [
+        f"| Metric | {label_a} | {label_b} | Change |",
+        "|--------|---:|---:|--------|",
+    ]
+    for name, (direction, _) in METRICS.items():
+        old, new = a["metrics"].get(name), b["metrics"].get(name)
+        change = "-"
+        if old is not None and new is not None and old != new:
+            better = new < old if direction == "lower" else new > old
+            relative = f"{(new - old) / abs(old):+.1%}" if old else "new"
+            change = f"{relative} ({'better' if better else 'worse'})"
+        elif old is not None and old == new:
+            change = "="
+        lines.append(f"| {name} | {_format(old)} | {_format(new)} | {change} |")
+    return "\n".join(lines)
+
+
+def gate(path, measurement, tolerance=DEFAULT_TOLERANCE, overrides=None, update=False,
+         fingerprint=None):
+    """Check a measurement against its stored baseline, recording it if new
+
+    Args:
+        path: Baseline file
+        measurement: collect_metrics() result
+        tolerance, overrides: As for check_regressions
+        update: Store the measurement as the new baseline even if one exists
+        fingerprint: Machine fingerprint (defaults to this machine)
+
+    Returns:
+        Tuple (status, regressions, baseline entry) where status is
+        "recorded", "passed", "regressed" or "errors"; "errors" means probed
+        calls raised, so nothing was recorded and the timings are not usable
+    """
+    fingerprint = fingerprint or machine_fingerprint()
+    stored = find_baseline(path, measurement["version"], fingerprint)
+    if measurement["metrics"].get("error_rate"):
+        return "errors", [], stored
+    if stored is None:
+        return "recorded", [], record_baseline(path, measurement, fingerprint)
+
+    regressions = check_regressions(measurement["metrics"], stored["metrics"], tolerance,
+                                    overrides)
+    if update:
+        record_baseline(path, measurement, fingerprint)
+    return ("regressed" if regressions else "passed"), regressions, stored
+
+
+def print_regressions(regressions, tolerance, overrides=None):
+    """Print one line per regressed metric"""
+    overrides = overrides or {}
+    for r in regressions:
+        allowed = overrides.get(r["metric"], tolerance)
+        print(f"  ❌ {r['metric']:<16} {_format(r['baseline'])} -> {_format(r['current'])} "
+              f"({r['change']:+.1%} worse, tolerance {allowed:.0%})")
@@ -0,0 +1,292 @@
+"""
+Batch resolution: match a whole list of names in one call
+
+match_companies() is the bulk counterpart of entityidentity.match_company.
+Names are deduplicated and normalized once, blocked together per country and
+scored with one RapidFuzz cdist call per candidate block, instead of paying the
+full resolve_company pipeline for every row. ``entityidentity-bench batch``
+checks it against per-call results and reports the rows/sec speedup on
+10k, 100k and 1M synthetic names.
+
+resolve_dataframe() does the same for a DataFrame column: each distinct
+(name, country) pair is matched once and the results are joined back onto the
+rows by position, so heavily repeated counterparties cost one match each.
+``entityidentity-bench dataframe`` compares it with a per-row apply on a
+frame of heavily repeated counterparties.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.corpus import synthetic_queries
+from tests.bench.index import HIGH_CONF_GAP, HIGH_CONF_THRESHOLD, default_index
+from tests.bench.normalize import normalize_names
+
+RESULT_COLUMNS = ["query", "query_country", "name", "country", "lei", "score", "decision"]
+# match_companies columns that resolve_dataframe attaches, prefixed
+FRAME_COLUMNS = ["name", "country", "lei", "score", "decision"]
+
+
+def match_companies(names, country=None, index=None):
+    """Match many company names at once
+
+    Args:
+        names: List or pandas Series of company names
+        country: Optional country code for every name, or a list/Series of
+            per-name country codes aligned with names
+        index: CompanyIndex to match against (defaults to the bundled data)
+
+    Returns:
+        DataFrame with one row per input name (same index for a Series) and
+        columns query, query_country, name, country, lei, score, decision.
+        name/country/lei are only set when the decision is auto_high_conf, as
+        with match_company; score is the best candidate score either way.
+    """
+    index = index if index is not None else default_index()
+    names, countries = as_series(names, country)
+    best_row, best_score, second_score = rank_names(names, countries, index)
+    return build_result(names, countries, best_row, best_score, second_score, index.companies)
+
+
+def as_series(names, country=None):
+    """Return (names, countries) as aligned object Series"""
+    names = names if isinstance(names, pd.Series) else pd.Series(list(names), dtype=object)
+    if country is None or isinstance(country, str):
+        countries = pd.Series([country] * len(names), index=names.index, dtype=object)
+    else:
+        countries = pd.Series(list(country), index=names.index, dtype=object)
+    return names, countries
+
+
+def rank_names(names, countries, index):
+    """Normalize, block and score a batch of names against an index
+
+    Returns:
+        Tuple of arrays (best_row, best_score, second_score); best_row is -1
+        and best_score NaN where a name has no candidates
+    """
+    norms = normalize_names(names).to_numpy(dtype=object)
+
+    best_row = np.full(len(names), -1, dtype=np.int64)
+    best_score = np.full(len(names), np.nan)
+    second_score = np.zeros(len(names))
+
+    missing = pd.isna(countries).to_numpy()
+    country_keys = np.where(missing, None, countries.to_numpy(dtype=object))
+    for code in pd.unique(country_keys):
+        positions = np.flatnonzero(missing if code is None else country_keys == code)
+        norm_codes, norm_uniques = pd.factorize(norms[positions])
+        ranked = index.rank(list(norm_uniques), code, k=2)
+        best_row[positions] = ranked["rows"][norm_codes, 0]
+        best_score[positions] = ranked["score"][norm_codes, 0]
+        second_score[positions] = np.nan_to_num(ranked["score"][norm_codes, 1], nan=0.0)
+    return best_row, best_score, second_score
+
+
+def build_result(names, countries, best_row, best_score, second_score, companies):
+    """Apply the decision rule to ranked names and build the result DataFrame"""
+    has_match = best_row >= 0
+    accepted = (
+        has_match
+        & (best_score >= HIGH_CONF_THRESHOLD)
+        & (best_score - second_score >= HIGH_CONF_GAP)
+    )
+    decision = np.where(accepted, "auto_high_conf",
+                        np.where(has_match, "needs_hint_or_llm", "no_match"))
+
+    result = pd.DataFrame({
+        "query": names.to_numpy(dtype=object),
+        "query_country": countries.to_numpy(dtype=object),
+        "score": best_score,
+        "decision": decision,
+    }, index=names.index)
+    for col in ["name", "country", "lei"]:
+        values = np.full(len(names), None, dtype=object)
+        if col in companies.columns:
+            values[accepted] = companies[col].to_numpy(dtype=object)[best_row[accepted]]
+        result[col] = values
+    return result[RESULT_COLUMNS]
+
+
+def resolve_dataframe(df, name_col, country_col=None, index=None, prefix="match_"):
+    """Match a name column of a DataFrame and attach the results as new columns
+
+    Distinct (name, country) pairs are matched once with match_companies and
+    joined back onto every row with a positional take, instead of calling
+    match_company per row with DataFrame.apply.
+
+    Args:
+        df: DataFrame with a column of company names
+        name_col: Column holding the names
+        country_col: Optional column holding per-row country codes
+        index: CompanyIndex to match against (defaults to the bundled data)
+        prefix: Prefix for the added columns
+
+    Returns:
+        Copy of df with columns {prefix}name, {prefix}country, {prefix}lei,
+        {prefix}score and {prefix}decision; as with match_companies the
+        name/country/lei are only set for auto_high_conf decisions
+
+    Raises:
+        ValueError: If df already has one of the result columns
+    """
+    clashes = [prefix + col for col in FRAME_COLUMNS if prefix + col in df.columns]
+    if clashes:
+        raise ValueError(f"df already has columns {clashes}; choose another prefix")
+
+    keys = pd.DataFrame({
+        "name": df[name_col].to_numpy(dtype=object),
+        "country": (df[country_col].to_numpy(dtype=object) if country_col is not None
+                    else np.full(len(df), None, dtype=object)),
+    })
+    codes = keys.groupby(["name", "country"], dropna=False, sort=False).ngroup().to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    unique = keys.iloc[first].reset_index(drop=True)
+
+    matched = match_companies(unique["name"], unique["country"], index=index)
+    result = df.copy()
+    for col in FRAME_COLUMNS:
+        result[prefix + col] = matched[col].to_numpy()[codes]
+    return result
+
+
+def per_call_match(name, country=None, index=None):
+    """Match one name the per-call way
+
+    Uses entityidentity.match_company; if the installed version raises (see
+    BUGS_FOUND.md) the index's per-call resolve is used as the reference.
+
+    Returns:
+        Tuple of (match dict or None, upstream exception or None)
+    """
+    from entityidentity import match_company
+
+    try:
+        return match_company(name, country=country), None
+    except Exception as e:
+        index = index if index is not None else default_index()
+        return index.match(name, country), e
+
+
+def compare_with_per_call(queries, index=None):
+    """Return rows where match_companies disagrees with per-call matching
+
+    Args:
+        queries: DataFrame with 'name' and 'country' columns
+
+    Returns:
+        Tuple of (mismatches, fallbacks); fallbacks counts the queries where
+        the installed match_company raised, so the index's per-call match was
+        the reference instead of upstream
+    """
+    batch = match_companies(queries["name"], queries["country"], index=index)
+    mismatches = []
+    fallbacks = 0
+    for (name, country), (_, row) in zip(queries[["name", "country"]].itertuples(index=False),
+                                         batch.iterrows()):
+        country = None if pd.isna(country) else country
+        expected, error = per_call_match(name, country, index)
+        fallbacks += error is not None
+        got = None if row["decision"] != "auto_high_conf" else (row["name"], row["country"])
+        want = None if expected is None else (expected["name"], expected["country"])
+        if got != want or (expected and not np.isclose(expected["score"], row["score"])):
+            mismatches.append({"query": name, "country": country, "batch": got, "per_call": want})
+    return mismatches, fallbacks
+
+
+def batch_throughput(sizes, index=None, per_call_sample=200, seed=0):
+    """Measure rows/sec of match_companies against a per-call loop
+
+    The per-call loop is the index's own match() on the same index, one name
+    at a time. The installed match_company raises on every query (see
+    BUGS_FOUND.md), so timing it would time the exception path. Per-call
+    throughput is measured on the first ``per_call_sample`` names of each
+    size, since looping over millions of rows is exactly the problem.
+
+    Returns:
+        List of dicts with size, batch/per-call rows per second and speedup
+    """
+    index = index if index is not None else default_index()
+    results = []
+    for n in sizes:
+        queries = synthetic_queries(n, index.companies, seed=seed)
+
+        start = time.perf_counter()
+        match_companies(queries["name"], queries["country"], index=index)
+        batch_seconds = time.perf_counter() - start
+
+        sample = [(name, None if pd.isna(country) else country)
+                  for name, country in queries.head(per_call_sample).itertuples(index=False)]
+        start = time.perf_counter()
+        for name, country in sample:
+            index.match(name, country)
+        per_call_seconds = time.perf_counter() - start
+
+        batch_rate = n / batch_seconds
+        per_call_rate = len(sample) / per_call_seconds
+        results.append({
+            "size": n,
+            "batch_seconds": batch_seconds,
+            "batch_rows_per_sec": batch_rate,
+            "per_call_rows_per_sec": per_call_rate,
+            "speedup": batch_rate / per_call_rate,
+        })
+    return results
+
+
+def duplicated_frame(rows, unique, companies=None, seed=0):
+    """Synthetic counterparty frame: ``rows`` rows drawn from ``unique`` distinct queries
+
+    Returns:
+        DataFrame with 'counterparty' and 'country' columns
+    """
+    queries = synthetic_queries(unique, companies, seed=seed)
+    picks = np.random.default_rng(seed).integers(0, len(queries), size=rows)
+    frame = queries.iloc[picks].reset_index(drop=True)
+    return frame.rename(columns={"name": "counterparty"})
+
+
+def dataframe_benchmark(rows=100_000, unique=1_000, index=None, apply_sample=2_000, seed=0):
+    """Time resolve_dataframe against a per-row DataFrame.apply on duplicated data
+
+    The apply baseline calls the index's match() on the first ``apply_sample``
+    rows, so both ways match against the same index, and its rate is
+    extrapolated to the whole frame. The installed match_company raises on
+    every query (see BUGS_FOUND.md) and is not timed.
+
+    Returns:
+        Dict with rows, distinct pairs, seconds and rows/sec for both ways,
+        speedup and mismatches against apply on the sampled rows
+    """
+    index = index if index is not None else default_index()
+    frame = duplicated_frame(rows, unique, index.companies, seed=seed)
+
+    start = time.perf_counter()
+    resolved = resolve_dataframe(frame, "counterparty", "country", index=index)
+    frame_seconds = time.perf_counter() - start
+
+    sample = frame.head(apply_sample)
+    start = time.perf_counter()
+    per_row = sample.apply(
+        lambda row: index.match(row["counterparty"],
+                                None if pd.isna(row["country"]) else row["country"]),
+        axis=1)
+    apply_seconds = time.perf_counter() - start
+
+    got = [None if d != "auto_high_conf" else (n, c) for n, c, d in
+           resolved.head(apply_sample)[["match_name", "match_country", "match_decision"]]
+           .itertuples(index=False)]
+    want = [None if m is None else (m["name"], m["country"]) for m in per_row]
+    frame_rate = rows / frame_seconds
+    apply_rate = len(sample) / apply_seconds
+    return {
+        "rows": rows,
+        "distinct_pairs": int(frame[["counterparty", "country"]].drop_duplicates().shape[0]),
+        "frame_seconds": frame_seconds,
+        "frame_rows_per_sec": frame_rate,
+        "apply_rows_per_sec": apply_rate,
+        "apply_seconds_estimate": rows / apply_rate,
+        "speedup": frame_rate / apply_rate,
+        "mismatches": sum(g != w for g, w in zip(got, want)),
+    }
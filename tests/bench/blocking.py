@@ -0,0 +1,236 @@
+"""
+Inverted blocking index over normalized tokens and character n-grams
+
+entityidentity blocks on the first query token as a prefix of name_norm and,
+when nothing matches, scores every company in scope (up to 50,000). The
+TokenBlockIndex maps each word and character trigram of name_norm (and of
+normalized aliases) to the rows containing it, partitioned by country, so a
+query is scored against a small, overlap-ranked shortlist whether or not a
+country is given.
+
+Postings are stored as CSR arrays (sorted keys, offsets, rows) that can be
+saved next to the CompanyIndex arrays and memory-mapped, i.e. shipped prebuilt.
+
+``entityidentity-bench blocking`` compares candidate set sizes, recall and
+latency with the index on and off.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+WORD_WEIGHT = 2.0
+GRAM_WEIGHT = 1.0
+# Name of the all-countries partition
+ALL_SCOPE = "*"
+
+
+def name_grams(norm, n=NGRAM):
+    """Return the blocking grams of a normalized name
+
+    Words are prefixed ``w:`` and character n-grams of the space-padded name
+    ``g:``, so a word and an n-gram with the same letters are different keys.
+    """
+    if not norm:
+        return []
+    grams = {f"w:{token}" for token in norm.split()}
+    padded = f" {norm} "
+    grams.update(f"g:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    return list(grams)
+
+
+class TokenBlockIndex:
+    """Country-partitioned inverted index from grams to company rows
+
+    Args:
+        name_norm: Array of normalized company names
+        country: Array of upper-case country codes aligned with name_norm
+        aliases: Optional list of (alias norm array, present mask) pairs
+        max_candidates: Shortlist size returned per query
+        posting_budget: Postings read per query; the rarest grams are read
+            first and common grams are skipped once the budget is spent
+    """
+
+    def __init__(self, name_norm, country, aliases=(), max_candidates=128,
+                 posting_budget=20_000):
+        self.max_candidates = max_candidates
+        self.posting_budget = posting_budget
+
+        rows = []
+        grams = []
+        sources = [(name_norm, None)] + list(aliases)
+        for norms, present in sources:
+            for row, norm in enumerate(norms):
+                if present is not None and not present[row]:
+                    continue
+                for gram in name_grams(str(norm)):
+                    rows.append(row)
+                    grams.append(gram)
+        rows = np.array(rows, dtype=np.int64)
+        gram_ids, vocab = pd.factorize(pd.Series(grams, dtype=object), sort=True)
+
+        # Scope 0 holds every country; scope i > 0 holds one country
+        country = np.asarray(country).astype(str)
+        scopes = np.array([ALL_SCOPE] + sorted(set(country) - {""}), dtype=str)
+        scope_of_row = np.searchsorted(scopes[1:], country) + 1
+        scope_of_row[~np.isin(country, scopes[1:])] = 0
+
+        n_grams = max(1, len(vocab))
+        scoped = scope_of_row[rows] * n_grams + gram_ids
+        keys = np.concatenate([gram_ids, scoped]).astype(np.int64)
+        key_rows = np.concatenate([rows, rows])
+        order = np.lexsort((key_rows, keys))
+        keys, key_rows = keys[order], key_rows[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (key_rows[1:] != key_rows[:-1])
+        keys, key_rows = keys[keep], key_rows[keep]
+        unique_keys, starts = np.unique(keys, return_index=True)
+
+        self.size = len(name_norm)
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.scopes = scopes
+        self.keys = unique_keys
+        self.offsets = np.append(starts, len(keys)).astype(np.int64)
+        self.rows = key_rows
+
+    def to_arrays(self):
+        """Return the CSR arrays, prefixed for storage alongside the CompanyIndex"""
+        return {
+            "token_vocab": self.vocab,
+            "token_scopes": self.scopes,
+            "token_keys": self.keys,
+            "token_offsets": self.offsets,
+            "token_rows": self.rows,
+            "token_params": np.array([self.max_candidates, self.posting_budget, self.size],
+                                     dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild from to_arrays() output without copying (mmaps stay mmaps)"""
+        index = cls.__new__(cls)
+        index.vocab = arrays["token_vocab"]
+        index.scopes = arrays["token_scopes"]
+        index.keys = arrays["token_keys"]
+        index.offsets = arrays["token_offsets"]
+        index.rows = arrays["token_rows"]
+        index.max_candidates, index.posting_budget, index.size = (
+            int(v) for v in arrays["token_params"]
+        )
+        return index
+
+    def _scope_id(self, scope):
+        """Return the partition number for a country scope (0 for all countries)"""
+        if scope:
+            i = np.searchsorted(self.scopes[1:], scope)
+            if i < len(self.scopes) - 1 and self.scopes[i + 1] == scope:
+                return i + 1
+        return 0
+
+    def postings(self, scope, gram):
+        """Return the rows containing gram within scope (None for all countries)"""
+        g = np.searchsorted(self.vocab, gram)
+        if g == len(self.vocab) or self.vocab[g] != gram:
+            return self.rows[:0]
+        key = self._scope_id(scope) * max(1, len(self.vocab)) + g
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.rows[self.offsets[i]:self.offsets[i + 1]]
+        return self.rows[:0]
+
+    def candidates(self, query_norm, scope=None):
+        """Shortlist rows sharing the most weighted grams with a normalized query
+
+        Returns:
+            Ascending array of at most max_candidates row ids
+        """
+        lists = []
+        for gram in name_grams(query_norm):
+            rows = self.postings(scope, gram)
+            if len(rows):
+                weight = WORD_WEIGHT if gram.startswith("w:") else GRAM_WEIGHT
+                # Rare grams say more about a name than common ones (IDF)
+                weight *= np.log1p(self.size / len(rows))
+                lists.append((len(rows), weight, rows))
+        if not lists:
+            return self.rows[:0]
+
+        lists.sort(key=lambda item: item[0])
+        read = 0
+        chosen = []
+        for length, weight, rows in lists:
+            if chosen and read + length > self.posting_budget:
+                break
+            chosen.append((weight, rows))
+            read += length
+
+        all_rows = np.concatenate([rows for _, rows in chosen])
+        weights = np.concatenate([np.full(len(rows), weight) for weight, rows in chosen])
+        unique, inverse = np.unique(all_rows, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights)
+        if len(unique) > self.max_candidates:
+            # Highest overlap first, lower row id on ties
+            order = np.lexsort((unique, -totals))[:self.max_candidates]
+            unique = np.sort(unique[order])
+        return unique
+
+
+def blocking_benchmark(companies, queries):
+    """Compare candidate-set size, recall and latency with the token index on and off
+
+    Recall is the fraction of queries whose best company under exhaustive
+    scoring (every company in scope) is in the blocked candidate set.
+
+    Args:
+        companies: Company DataFrame shaped like list_companies()
+        queries: DataFrame with 'name' and 'country' columns
+
+    Returns:
+        Dict keyed by blocking mode ("prefix" is entityidentity's, "tokens"
+        the inverted index) with build time, candidate sizes (with and
+        without a country hint), recall and rank latency percentiles in ms
+    """
+    from entityidentity import normalize_name
+    from tests.bench.index import CompanyIndex
+    from tests.bench.timing import percentile
+
+    norms = [normalize_name(name) for name in queries["name"].fillna("")]
+    countries = [None if pd.isna(c) else c for c in queries["country"]]
+
+    results = {}
+    indexes = {}
+    for mode in ("prefix", "tokens"):
+        start = time.perf_counter()
+        indexes[mode] = CompanyIndex(companies, blocking=mode)
+        results[mode] = {"build_seconds": time.perf_counter() - start}
+
+    exhaustive = indexes["prefix"]
+    best = []
+    for norm, country in zip(norms, countries):
+        rows = exhaustive.scope_rows[exhaustive.scope_for(country)]
+        score, _, _ = exhaustive.score([norm], rows, country)
+        best.append(rows[np.argmax(score[0])] if len(rows) else -1)
+
+    for mode, index in indexes.items():
+        with_country = []
+        without_country = []
+        latencies = []
+        found = 0
+        for norm, country, expected in zip(norms, countries, best):
+            rows = index.block(norm, country)
+            found += expected in rows
+            if country:
+                with_country.append(len(rows))
+            without_country.append(len(index.block(norm, None)))
+            start = time.perf_counter()
+            index.rank([norm], country)
+            latencies.append(time.perf_counter() - start)
+        results[mode].update({
+            "candidates_with_country": float(np.mean(with_country)) if with_country else 0.0,
+            "candidates_without_country": float(np.mean(without_country)),
+            "recall": found / len(norms),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+        })
+    return results
@@ -0,0 +1,210 @@
+"""
+Bounded, thread-safe result cache for match_company / resolve_company
+
+Production traffic is heavily skewed towards a few thousand names, yet every
+call re-normalizes and re-scores from scratch. CachedResolver wraps a
+resolve_company-like function with an LRU cache keyed on
+``(normalize_name(name), COUNTRY)`` with optional TTL, and drops every entry
+when the underlying company data is reloaded.
+
+Hits, misses and evictions are counted. ``entityidentity-bench cache``
+replays a Zipf-distributed query stream and reports the hit rate.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from entityidentity import normalize_name
+
+_MISSING = object()
+
+
+class ResultCache:
+    """Thread-safe LRU mapping with optional time-to-live and counters
+
+    Args:
+        maxsize: Maximum number of entries (least recently used are evicted)
+        ttl: Seconds an entry stays valid, or None for no expiry
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, maxsize=10_000, ttl=None, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Return the cached value for key (counting a hit or a miss)"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or self._clock() < expires:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counted as an invalidation)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Return counters and the hit rate as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _loaded_companies():
+    """Return entityidentity's currently cached company DataFrame"""
+    from entityidentity.companies import companyidentity
+
+    return companyidentity.load_companies()
+
+
+class CachedResolver:
+    """resolve_company / match_company with a result cache in front
+
+    Args:
+        resolve: Function resolve(name, country=None) returning a
+            resolve_company-style dict (defaults to entityidentity's)
+        maxsize: Maximum cached results
+        ttl: Seconds a result stays valid, or None
+        data_source: Callable returning the object that holds the company
+            data; when it returns a different object (the data was reloaded)
+            the cache is cleared. Defaults to entityidentity's loaded DataFrame.
+        clock: Monotonic time source for the TTL
+
+    Cached results are shared between callers and must be treated as read-only;
+    only the top-level dict and its 'query' entry are copied per call.
+    Exceptions raised by ``resolve`` are never cached.
+    """
+
+    def __init__(self, resolve=None, maxsize=10_000, ttl=None, data_source=None,
+                 clock=time.monotonic):
+        if resolve is None:
+            from entityidentity import resolve_company as resolve
+        self._resolve = resolve
+        self._data_source = data_source or _loaded_companies
+        self._data = self._data_source()
+        self.cache = ResultCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    def _check_data(self):
+        """Clear the cache if the company data has been reloaded since last call"""
+        current = self._data_source()
+        if current is not self._data:
+            self._data = current
+            self.cache.clear()
+
+    def resolve_company(self, name, country=None):
+        """Cached equivalent of entityidentity.resolve_company(name, country)"""
+        self._check_data()
+        key = (normalize_name(name), country.upper() if country else None)
+        result = self.cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = self._resolve(name, country=country)
+            self.cache.put(key, result)
+        return dict(result, query=dict(result["query"], name=name, country=country))
+
+    def match_company(self, name, country=None):
+        """Cached equivalent of entityidentity.match_company(name, country)"""
+        return self.resolve_company(name, country).get("final")
+
+    def stats(self):
+        """Cache counters: hits, misses, evictions, expirations, invalidations, hit_rate"""
+        return self.cache.stats()
+
+
+def zipf_stream(vocabulary, n, exponent=1.1, seed=0):
+    """Sample n items from vocabulary with Zipf-distributed popularity
+
+    The first vocabulary item is the most popular; item k is drawn with
+    probability proportional to 1 / k**exponent.
+    """
+    ranks = np.arange(1, len(vocabulary) + 1)
+    weights = 1.0 / ranks ** exponent
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vocabulary), size=n, p=weights / weights.sum())
+    return [vocabulary[i] for i in picks]
+
+
+def cache_benchmark(n=50_000, vocabulary_size=5_000, exponent=1.1, maxsize=1_000, ttl=None,
+                    index=None, seed=0):
+    """Replay a Zipf-distributed query stream with and without the cache
+
+    Both runs resolve through the CompanyIndex per-call path, so the timings
+    compare the cache rather than the installed entityidentity version.
+
+    Returns:
+        Dict with uncached/cached queries per second, speedup and cache stats
+    """
+    from tests.bench.corpus import synthetic_queries
+    from tests.bench.index import default_index
+
+    index = index if index is not None else default_index()
+    vocabulary = list(synthetic_queries(vocabulary_size, index.companies, seed=seed)
+                      .itertuples(index=False, name=None))
+    stream = [(name, None if pd.isna(country) else country)
+              for name, country in zipf_stream(vocabulary, n, exponent, seed)]
+
+    start = time.perf_counter()
+    for name, country in stream:
+        index.resolve(name, country)
+    uncached = time.perf_counter() - start
+
+    resolver = CachedResolver(index.resolve, maxsize=maxsize, ttl=ttl,
+                              data_source=lambda: index)
+    start = time.perf_counter()
+    for name, country in stream:
+        resolver.resolve_company(name, country)
+    cached = time.perf_counter() - start
+
+    return {
+        "queries": n,
+        "vocabulary": vocabulary_size,
+        "exponent": exponent,
+        "uncached_qps": n / uncached,
+        "cached_qps": n / cached,
+        "speedup": uncached / cached,
+        "stats": resolver.stats(),
+    }
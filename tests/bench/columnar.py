@@ -0,0 +1,215 @@
+"""
+Memory-mapped columnar storage for the company database
+
+entityidentity's load_companies() reads the whole Parquet/CSV file into a
+pandas DataFrame before any filter runs. ColumnarCompanies stores the same
+table as an uncompressed Arrow IPC file whose record batches are grouped by
+country, and opens it with a memory map: opening deserializes only the
+schema and footer, and list_companies(country=..., search=..., limit=...)
+reads just the batches (and pages) it needs.
+
+Rows keep their original position in a ``_row`` column, so filtered results
+come back in the same order and with the same index as list_companies().
+
+write_columnar() writes the file. ``entityidentity-bench columnar`` compares
+open time and RSS with the pandas loader.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+ROW_COLUMN = "_row"
+BATCH_ROWS = 65_536
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required. Install with: pip install pyarrow")
+
+
+def write_columnar(companies, path, batch_rows=BATCH_ROWS):
+    """Write a list_companies()-shaped DataFrame as a country-grouped Arrow IPC file
+
+    Args:
+        companies: Company DataFrame (e.g. list_companies())
+        path: Destination .arrow file
+        batch_rows: Maximum rows per record batch within a country
+
+    Returns:
+        Path of the written file
+    """
+    _require_pyarrow()
+    df = companies.reset_index(drop=True)
+    df.insert(0, ROW_COLUMN, np.arange(len(df), dtype=np.int64))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    countries = df["country"].where(df["country"].notna(), None)
+    batches = []
+    batch_countries = []
+    for country in pd.unique(countries):
+        mask = countries.isna() if country is None else countries == country
+        rows = np.flatnonzero(mask.to_numpy())
+        for start in range(0, len(rows), batch_rows):
+            chunk = table.take(pa.array(rows[start:start + batch_rows]))
+            batches.extend(chunk.combine_chunks().to_batches())
+            batch_countries.append(country)
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"batch_countries"] = json.dumps(batch_countries).encode()
+    schema = table.schema.with_metadata(metadata)
+
+    path = Path(path)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    return path
+
+
+class ColumnarCompanies:
+    """Lazily opened, memory-mapped company table
+
+    Args:
+        path: File written by write_columnar()
+    """
+
+    def __init__(self, path):
+        _require_pyarrow()
+        self.path = Path(path)
+        self._source = pa.memory_map(str(self.path), "r")
+        self._reader = pa.ipc.open_file(self._source)
+        self.batch_countries = json.loads(self._reader.schema.metadata[b"batch_countries"])
+
+    def __len__(self):
+        batches = range(self._reader.num_record_batches)
+        return sum(self._reader.get_batch(i).num_rows for i in batches)
+
+    @property
+    def columns(self):
+        return [name for name in self._reader.schema.names if name != ROW_COLUMN]
+
+    def _batches(self, country):
+        """Yield the record batches that can contain rows of country"""
+        for i, batch_country in enumerate(self.batch_countries):
+            if country is None or batch_country == country:
+                yield self._reader.get_batch(i)
+
+    def list_companies(self, country=None, search=None, limit=None):
+        """Same filters and result as entityidentity.list_companies
+
+        Only the batches for ``country`` are read, and each batch is scanned
+        for ``search`` just until ``limit`` matches are found.
+        """
+        country = country.upper() if country else None
+        wanted = limit or None
+        parts = []
+        for batch in self._batches(country):
+            if search:
+                batch = batch.filter(self._search_mask(batch, search.lower(), wanted))
+            if wanted is not None:
+                batch = batch.slice(0, wanted)
+            if batch.num_rows:
+                parts.append(batch)
+
+        if parts:
+            table = pa.Table.from_batches(parts)
+        else:
+            table = self._reader.schema.empty_table()
+        if len(parts) > 1:
+            # Batches are grouped by country; restore the original row order
+            table = table.take(pc.sort_indices(table[ROW_COLUMN]))
+        if wanted is not None:
+            table = table.slice(0, wanted)
+
+        df = table.to_pandas()
+        df.index = pd.Index(df.pop(ROW_COLUMN).to_numpy())
+        return df
+
+    @staticmethod
+    def _search_mask(batch, search_lower, wanted):
+        """Mask of rows whose name or name_norm contains search_lower
+
+        Like list_companies(), the search term is a regular expression matched
+        against the lowercased name and against name_norm. Once ``wanted``
+        matches are found the rest of the batch is left unscanned.
+        """
+        names = batch.column("name")
+        norms = batch.column("name_norm")
+        step = BATCH_ROWS if wanted is None else max(1024, wanted * 8)
+        masks = []
+        found = 0
+        for start in range(0, batch.num_rows, step):
+            name = pc.utf8_lower(names.slice(start, step))
+            mask = pc.or_(
+                pc.fill_null(pc.match_substring_regex(name, search_lower), False),
+                pc.fill_null(pc.match_substring_regex(norms.slice(start, step), search_lower),
+                             False),
+            )
+            masks.append(mask)
+            found += pc.sum(mask).as_py() or 0
+            if wanted is not None and found >= wanted:
+                masks.append(pa.array(np.zeros(max(0, batch.num_rows - start - step), bool)))
+                break
+        return pa.concat_arrays(masks) if masks else pa.array([], pa.bool_())
+
+    def to_pandas(self):
+        """Materialize the whole table, like list_companies() with no filters"""
+        return self.list_companies()
+
+
+# Executed in a fresh interpreter so peak RSS reflects only one loader
+_LOADER_PROBE = r"""
+import json, sys, time
+kind, path, country, limit = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+from tests.bench.timing import peak_rss, process_memory, reset_peak_rss
+import pandas, pyarrow.ipc
+reset_peak_rss()
+before = process_memory()["rss"]
+start = time.perf_counter()
+if kind == "pandas":
+    from entityidentity.companies.companyidentity import load_companies, list_companies
+    load_companies(path)
+    opened = time.perf_counter() - start
+    result = list_companies(country=country, limit=limit, data_path=path)
+else:
+    from tests.bench.columnar import ColumnarCompanies
+    table = ColumnarCompanies(path)
+    opened = time.perf_counter() - start
+    result = table.list_companies(country=country, limit=limit)
+total = time.perf_counter() - start
+after = process_memory()["rss"]
+peak = peak_rss()
+print(json.dumps({"open_seconds": opened, "query_seconds": total - opened, "rows": len(result),
+                  "rss_delta": after - before, "peak_rss_delta": max(0, peak - before)}))
+"""
+
+
+def measure_loader(kind, path, country="US", limit=10):
+    """Measure open time and memory of one loader in a fresh subprocess
+
+    Args:
+        kind: "pandas" (entityidentity's load_companies) or "columnar"
+        path: Parquet/CSV file for "pandas", Arrow file for "columnar"
+
+    Returns:
+        Dict with open_seconds, query_seconds, rows, and the RSS growth and peak
+        RSS growth (bytes) over the interpreter with pandas/pyarrow imported
+    """
+    proc = subprocess.run(
+        [sys.executable, "-c", _LOADER_PROBE, kind, str(path), country, str(limit)],
+        capture_output=True, text=True, cwd=str(Path(__file__).resolve().parents[2]),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Loader probe failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
@@ -0,0 +1,115 @@
+"""
+Fixed query corpus replayed by the benchmarks
+
+The corpus is deliberately static so that timings are comparable across
+entityidentity versions and machines. Each entry is ``(name, country)``; the
+benchmarks replay every name both with and without its country hint.
+"""
+import random
+
+import pandas as pd
+
+from tests.bench.dataset import INDUSTRY_WORDS, SYLLABLES, generate_companies
+from tests.bench.dataset import LEGAL_SUFFIXES as COUNTRY_LEGAL_SUFFIXES
+
+QUERY_CORPUS = [
+    # Companies shipped in the bundled sample data
+    ("BHP Group", "AU"),
+    ("BHP Group Ltd", "AU"),
+    ("Rio Tinto", "AU"),
+    ("Fortescue Metals", "AU"),
+    ("Newcrest Mining Limited", "AU"),
+    ("Anglo American plc", "GB"),
+    ("Glencore", "GB"),
+    ("Antofagasta PLC", "GB"),
+    ("Barrick Gold Corp", "CA"),
+    ("Wheaton Precious Metals", "CA"),
+    # Well-known names used throughout the installtest suite
+    ("Apple", "US"),
+    ("Apple Inc.", "US"),
+    ("Microsoft Corporation", "US"),
+    ("Tesla, Inc.", "US"),
+    ("AT&T", "US"),
+    ("Coca-Cola", "US"),
+    # Punctuation, unicode and typo variants
+    ("Société Générale", "FR"),
+    ("Rio-Tinto Ltd.", "AU"),
+    ("Glencor", "GB"),
+    ("Barrik Gold", "CA"),
+    # Inputs that should not match anything
+    ("XYZABC123NOTREAL9999", "US"),
+    ("", None),
+]
+
+
+def corpus_queries(with_country=True):
+    """Return the corpus as a list of (name, country) pairs
+
+    Args:
+        with_country: If False, every country hint is replaced by None
+    """
+    if with_country:
+        return list(QUERY_CORPUS)
+    return [(name, None) for name, _ in QUERY_CORPUS]
+
+
+# Legal suffixes of every country the synthetic tables use, for query variants
+LEGAL_SUFFIXES = sorted({suffix for pool in COUNTRY_LEGAL_SUFFIXES.values() for suffix in pool})
+
+
+def _perturb(name, rng):
+    """Return a noisy variant of a real company name"""
+    choice = rng.random()
+    if choice < 0.2:
+        return name.upper()
+    if choice < 0.4:
+        return f"{name.split(',')[0]} {rng.choice(LEGAL_SUFFIXES)}"
+    if choice < 0.6 and len(name) > 4:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]  # dropped character
+    if choice < 0.8:
+        return name.replace(" ", "-", 1)
+    return name
+
+
+def _invented(rng):
+    """Return a plausible but invented company name"""
+    stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    words = [stem] + [rng.choice(INDUSTRY_WORDS) for _ in range(rng.randint(0, 2))]
+    return f"{' '.join(words)} {rng.choice(LEGAL_SUFFIXES)}"
+
+
+def synthetic_queries(n, companies=None, seed=0, known_fraction=0.5):
+    """Generate a deterministic DataFrame of n (name, country) queries
+
+    About ``known_fraction`` of the queries are noisy variants of real names in
+    ``companies`` (defaults to list_companies()), half of those with the right
+    country hint; the rest are invented names with a random or missing country.
+    """
+    if companies is None:
+        from entityidentity import list_companies
+        companies = list_companies()
+    rng = random.Random(seed)
+    known = list(zip(companies["name"], companies["country"]))
+    countries = sorted({c for _, c in known}) + [None]
+
+    names = []
+    hints = []
+    for _ in range(n):
+        if known and rng.random() < known_fraction:
+            name, country = rng.choice(known)
+            names.append(_perturb(name, rng))
+            hints.append(country if rng.random() < 0.5 else None)
+        else:
+            names.append(_invented(rng))
+            hints.append(rng.choice(countries))
+    return pd.DataFrame({"name": names, "country": hints})
+
+
+def synthetic_companies(n, seed=0):
+    """Deterministic n-row company table with the list_companies() schema
+
+    The table is tests.bench.dataset.generate_companies(n, seed), so every
+    benchmark runs on the same production-like names, countries and LEIs.
+    """
+    return generate_companies(n, seed)
@@ -0,0 +1,595 @@
+"""
+Scaled synthetic company databases for load and scaling tests
+
+The bundled company data has a handful of rows, so nothing in the suite says
+how entityidentity behaves with millions. generate_companies(n, seed) builds a
+deterministic table with list_companies()'s schema at any size from 10k to
+10M rows:
+
+- names from stems, surnames, places and industry words, ending in legal
+  suffixes of the company's country (Inc, plc, GmbH, K.K., S.A. de C.V., ...)
+- unicode: accented surnames and places (Müller, Lefèvre, Sørensen, Łódź) and
+  a share of native-script Japanese, Chinese and Korean names
+- a skewed, Zipf-like country mix over 30 countries
+- ISO 17442 LEIs with valid check digits on about 30% of rows, Wikidata QIDs
+  and aliases on some
+
+Rows are generated in fixed blocks seeded by (seed, block), so a smaller table
+is exactly the first rows of a larger one, and (name_norm, country) is unique
+(names that would collide get a second stem, then a number; rows whose
+name_norm is empty, i.e. native-script names, are unique by name instead).
+
+generate_queries(companies, n) draws noisy queries (case, suffix, typo,
+punctuation, accent and alias variants) with the row each should resolve to,
+plus invented names that should resolve to nothing. use_database() makes
+entityidentity load a generated table in place of its bundled data.
+tests.bench.corpus.synthetic_companies returns these tables too, so every
+benchmark runs on them.
+
+``entityidentity-test --synthetic-rows N`` (or ENTITYIDENTITY_SYNTHETIC_ROWS=N)
+runs the whole suite against the bundled companies plus N generated rows,
+skipping tests marked bundled_data. ``entityidentity-bench dataset`` times
+generation, loading and accuracy, or writes a table with ``--output``.
+"""
+import time
+import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.normalize import normalize_names
+
+# Rows per generation block; fixed so tables of every size share prefixes
+BLOCK_ROWS = 100_000
+LEI_FRACTION = 0.3
+QID_FRACTION = 0.2
+ALIAS_FRACTION = 0.15
+FORMER_NAME_FRACTION = 0.05
+
+# Zipf-like country weights
+COUNTRY_WEIGHTS = {
+    "US": 30, "GB": 8, "DE": 6, "JP": 6, "CN": 6, "FR": 5, "CA": 4, "IN": 4, "AU": 3,
+    "CH": 3, "NL": 2.5, "IT": 2.5, "ES": 2, "KR": 2, "BR": 2, "SE": 1.5, "HK": 1.5,
+    "SG": 1.2, "MX": 1, "ZA": 1, "BE": 0.8, "AT": 0.8, "NO": 0.6, "DK": 0.6, "IE": 0.6,
+    "LU": 0.5, "FI": 0.4, "PL": 0.4, "NZ": 0.3, "CL": 0.3,
+}
+LEGAL_SUFFIXES = {
+    "US": ["Inc", "Inc.", "Corp", "Corporation", "LLC", "Co.", "Company", "L.P."],
+    "GB": ["Ltd", "Limited", "plc", "PLC", "LLP"],
+    "DE": ["GmbH", "AG", "GmbH & Co. KG", "SE", "KG"],
+    "JP": ["K.K.", "Co., Ltd.", "Corporation", "Holdings"],
+    "CN": ["Co., Ltd.", "Group Co., Ltd.", "Limited"],
+    "FR": ["SA", "S.A.", "SAS", "SARL"],
+    "CA": ["Inc", "Ltd", "Corp", "Limited"],
+    "IN": ["Private Limited", "Pvt Ltd", "Limited"],
+    "AU": ["Pty Ltd", "Limited", "Ltd"],
+    "CH": ["AG", "SA", "GmbH"],
+    "NL": ["N.V.", "B.V."],
+    "IT": ["S.p.A.", "S.r.l."],
+    "ES": ["S.A.", "S.L."],
+    "KR": ["Co., Ltd.", "Corporation"],
+    "BR": ["Ltda", "S.A."],
+    "SE": ["AB"],
+    "HK": ["Limited", "Holdings Limited"],
+    "SG": ["Pte Ltd", "Limited"],
+    "MX": ["S.A. de C.V.", "S.A."],
+    "ZA": ["(Pty) Ltd", "Limited"],
+    "BE": ["NV", "SA", "BV"],
+    "AT": ["GmbH", "AG"],
+    "NO": ["ASA", "AS"],
+    "DK": ["A/S", "ApS"],
+    "IE": ["Limited", "DAC", "plc"],
+    "LU": ["S.A.", "S.à r.l."],
+    "FI": ["Oyj", "Oy"],
+    "PL": ["S.A.", "Sp. z o.o."],
+    "NZ": ["Limited"],
+    "CL": ["S.A.", "SpA"],
+}
+# Native-script names: (share of the country's rows, characters, legal suffix)
+NATIVE_SCRIPTS = {
+    "JP": (0.15, "三菱住友日本東京大和丸紅興業電機精工化学製鉄", "株式会社"),
+    "CN": (0.15, "华中国海天新龙金建银联盛达通信科技", "有限公司"),
+    "KR": (0.10, "한국삼성현대산업전자화학금융", "주식회사"),
+}
+SURNAMES = {
+    "DE": ["Müller", "Schröder", "Bäcker", "Weiß", "Köhler", "Jäger", "Groß", "Hoffmann",
+           "Schäfer", "Krüger"],
+    "AT": ["Müller", "Gruber", "Huber", "Wagner", "Pölzl", "Strauß"],
+    "FR": ["Lefèvre", "Gérard", "Bérenger", "Moreau", "Dubois", "Lemaître", "Noël", "Girard"],
+    "ES": ["Muñoz", "Peña", "Núñez", "Ibáñez", "García", "Rodríguez"],
+    "MX": ["Muñoz", "Peña", "Hernández", "López", "Martínez"],
+    "CL": ["Muñoz", "Peña", "Fernández", "Pérez"],
+    "BR": ["Gonçalves", "Araújo", "Simões", "Conceição", "Magalhães"],
+    "SE": ["Åberg", "Löfgren", "Nyström", "Sjöberg", "Lindqvist"],
+    "NO": ["Sørensen", "Ødegård", "Hansen", "Bjørnstad"],
+    "DK": ["Sørensen", "Jørgensen", "Møller", "Nielsen"],
+    "FI": ["Mäkinen", "Häkkinen", "Virtanen", "Järvinen"],
+    "PL": ["Wiśniewski", "Łukasik", "Żak", "Kowalski", "Wójcik"],
+}
+DEFAULT_SURNAMES = ["Smith", "Baker", "Turner", "Walker", "Harper", "Fletcher", "Cooper",
+                    "Hughes", "Morgan", "Bennett", "Carter", "Foster", "Palmer", "Reed"]
+PLACES = {
+    "US": ["New York", "Houston", "Chicago", "Denver", "Boston", "Atlanta", "Seattle"],
+    "GB": ["London", "Leeds", "Bristol", "Manchester", "Aberdeen"],
+    "DE": ["München", "Köln", "Düsseldorf", "Hamburg", "Nürnberg"],
+    "FR": ["Paris", "Lyon", "Orléans", "Besançon", "Nîmes"],
+    "JP": ["Tokyo", "Osaka", "Nagoya", "Kyoto"],
+    "CN": ["Shanghai", "Shenzhen", "Beijing", "Guangzhou"],
+    "CH": ["Zürich", "Genève", "Basel"],
+    "SE": ["Malmö", "Göteborg", "Uppsala"],
+    "PL": ["Łódź", "Kraków", "Gdańsk"],
+    "BR": ["São Paulo", "Brasília", "Goiânia"],
+    "ES": ["Málaga", "Córdoba", "León"],
+}
+DEFAULT_PLACES = ["Central", "Northern", "Pacific", "Atlantic", "Western", "Eastern"]
+SYLLABLES = ["ac", "al", "an", "ar", "as", "bel", "bor", "bra", "cal", "cor", "cra", "dan",
+             "del", "dor", "el", "en", "fen", "fir", "gal", "gen", "gor", "hal", "hel", "ka",
+             "kel", "lan", "lex", "lor", "lu", "mar", "mer", "mon", "nor", "nov", "or", "pal",
+             "par", "per", "quin", "ran", "rho", "sel", "sol", "sta", "tel", "tor", "tra",
+             "tri", "um", "val", "ven", "ver", "vol", "wes", "yor", "zan", "zen", "zu"]
+INDUSTRY_WORDS = ["Mining", "Metals", "Group", "Holdings", "Capital", "Energy", "Bank",
+                  "Resources", "Technologies", "Partners", "Gold", "Industries", "Logistics",
+                  "Pharma", "Foods", "Motors", "Chemicals", "Systems", "Software", "Media",
+                  "Insurance", "Steel", "Shipping", "Semiconductors", "Airlines", "Retail",
+                  "Telecom", "Realty", "Solar", "Biotech", "Textiles", "Robotics"]
+# Syllables never used in generated names, for queries with no true match
+UNKNOWN_SYLLABLES = ["qox", "vyb", "jux", "zyq", "wox", "kyv", "fyx", "xib"]
+
+_LOU_PREFIXES = ["5493", "2138", "5299", "9695", "8156", "3157", "0292", "7245", "8945",
+                 "6354", "2549", "9845", "3912", "5967", "2221", "4469", "5380", "2594"]
+_ALNUM = np.array(list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def lei_check_digits(body):
+    """The two ISO 7064 MOD 97-10 check digits for an 18-character LEI body"""
+    remainder = 0
+    for char in body:
+        value = int(char, 36)
+        remainder = (remainder * (100 if value > 9 else 10) + value) % 97
+    return f"{98 - remainder * 100 % 97:02d}"
+
+
+def is_valid_lei(lei):
+    """True when lei is 20 alphanumeric characters with valid check digits"""
+    if not isinstance(lei, str) or len(lei) != 20 or not lei.isalnum():
+        return False
+    return int("".join(str(int(c, 36)) for c in lei.upper())) % 97 == 1
+
+
+def _leis(rng, n, keep=None):
+    """n random LEIs (LOU prefix, '00', 12 random characters, check digits)
+
+    All n are drawn, but only the first ``keep`` are built and returned.
+    """
+    prefixes = np.array(_LOU_PREFIXES)[rng.integers(0, len(_LOU_PREFIXES), n)]
+    bodies = rng.integers(0, len(_ALNUM), size=(n, 12))
+    out = []
+    for prefix, chars in zip(prefixes[:keep], _ALNUM[bodies[:keep]]):
+        body = f"{prefix}00{''.join(chars)}"
+        out.append(body + lei_check_digits(body))
+    return out
+
+
+@lru_cache(maxsize=1)
+def _stems():
+    """Every capitalized two- and three-syllable stem, indexed by syllable codes"""
+    two = [(a + b).capitalize() for a in SYLLABLES for b in SYLLABLES]
+    three = [(a + b + c).capitalize() for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+    return two, three
+
+
+def _stem_names(syllables, n_syllables):
+    """Stems for rows of syllable codes, using the first n_syllables (2 or 3) of each"""
+    two, three = _stems()
+    k = len(SYLLABLES)
+    codes2 = syllables[:, 0] * k + syllables[:, 1]
+    codes3 = codes2 * k + syllables[:, 2]
+    return [three[c3] if m == 3 else two[c2] for c2, c3, m in zip(codes2, codes3, n_syllables)]
+
+
+def _block(seed, block, rows=BLOCK_ROWS):
+    """Generate the first ``rows`` candidate rows (before de-duplication) of one block
+
+    Every random draw is made for all BLOCK_ROWS rows, so a row does not
+    depend on how many are built, but names and strings are built for the
+    first ``rows`` only.
+    """
+    rng = np.random.default_rng([seed, block])
+    n = BLOCK_ROWS
+    codes = list(COUNTRY_WEIGHTS)
+    weights = np.array(list(COUNTRY_WEIGHTS.values()), dtype=float)
+    countries = np.array(codes)[rng.choice(len(codes), size=n, p=weights / weights.sum())]
+
+    pattern = rng.choice(7, size=n, p=[0.35, 0.15, 0.15, 0.10, 0.10, 0.10, 0.05])
+    syllables = rng.integers(0, len(SYLLABLES), size=(n, 3))
+    n_syllables = rng.integers(2, 4, size=n)
+    words = rng.integers(0, len(INDUSTRY_WORDS), size=(n, 2))
+    picks = rng.integers(0, 1 << 30, size=(n, 4))
+    native = rng.random(n)
+    native_chars = rng.integers(0, 1 << 16, size=(n, 4))
+    stems = _stem_names(syllables, n_syllables)
+
+    cores, suffixes, cities = [], [], []
+    for i in range(rows):
+        country = countries[i]
+        places = PLACES.get(country, DEFAULT_PLACES)
+        surnames = SURNAMES.get(country, DEFAULT_SURNAMES)
+        suffix_pool = LEGAL_SUFFIXES[country]
+        city = places[picks[i, 0] % len(places)]
+        script = NATIVE_SCRIPTS.get(country)
+        if script and native[i] < script[0]:
+            chars = script[1]
+            length = 2 + picks[i, 2] % 3
+            cores.append("".join(chars[j % len(chars)] for j in native_chars[i, :length]))
+            suffixes.append(script[2])
+            cities.append(city)
+            continue
+        stem = stems[i]
+        word, word2 = INDUSTRY_WORDS[words[i, 0]], INDUSTRY_WORDS[words[i, 1]]
+        p = pattern[i]
+        if p == 0:
+            core = f"{stem} {word}"
+        elif p == 1:
+            core = f"{stem} {word} {word2}" if word != word2 else f"{stem} {word}"
+        elif p == 2:
+            core = f"{surnames[picks[i, 1] % len(surnames)]} {word}"
+        elif p == 3:
+            first = surnames[picks[i, 1] % len(surnames)]
+            second = surnames[picks[i, 2] % len(surnames)]
+            core = f"{first} & {second}" if first != second else f"{first} & {stem}"
+        elif p == 4:
+            core = f"{city} {word}"
+        elif p == 5:
+            core = stem
+        else:
+            initials = "".join(chr(65 + j % 26) for j in picks[i, 1:4])
+            core = f"{initials} {word}"
+        cores.append(core)
+        suffixes.append(suffix_pool[picks[i, 3] % len(suffix_pool)])
+        cities.append(city)
+
+    has_lei = rng.random(n) < LEI_FRACTION
+    leis = np.full(rows, None, dtype=object)
+    kept = np.flatnonzero(has_lei[:rows])
+    leis[kept] = _leis(rng, int(has_lei.sum()), keep=len(kept))
+    has_qid = rng.random(n) < QID_FRACTION
+    qids = np.full(rows, None, dtype=object)
+    kept = np.flatnonzero(has_qid[:rows])
+    qid_values = rng.integers(1_000, 130_000_000, int(has_qid.sum()))
+    qids[kept] = [f"Q{v}" for v in qid_values[:len(kept)]]
+    alias_draw = rng.random(n)
+    renamed = alias_draw < FORMER_NAME_FRACTION
+    former_syllables = rng.integers(0, len(SYLLABLES), size=(int(renamed.sum()), 3))
+    former_words = rng.integers(0, len(INDUSTRY_WORDS), int(renamed.sum()))
+    kept = np.flatnonzero(renamed[:rows])
+    former = np.full(rows, None, dtype=object)
+    former[kept] = [f"{stem} {INDUSTRY_WORDS[w]}" for stem, w in
+                    zip(_stem_names(former_syllables[:len(kept)], np.full(len(kept), 2)),
+                        former_words)]
+    brand_syllables = rng.integers(0, len(SYLLABLES), size=(n, 3))[:rows]
+    return {
+        "core": cores, "suffix": suffixes, "country": countries[:rows], "city": cities,
+        "lei": leis, "wikidata_qid": qids, "alias_draw": alias_draw[:rows], "former": former,
+        "brand": _stem_names(brand_syllables, np.full(rows, 3)),
+    }
+
+
+def _isin_sorted(keys, seen):
+    """Mask of keys present in the sorted array seen"""
+    if not len(seen):
+        return np.zeros(len(keys), dtype=bool)
+    found = np.minimum(np.searchsorted(seen, keys), len(seen) - 1)
+    return seen[found] == keys
+
+
+def _names(cores, suffixes):
+    return [f"{core} {suffix}" for core, suffix in zip(cores, suffixes)]
+
+
+def _dedupe_keys(names, norms, countries):
+    """Hash of (name_norm, country), using the name when name_norm is empty"""
+    text = np.where(norms == "", names, norms)
+    return pd.util.hash_pandas_object(pd.DataFrame({"t": text, "c": countries}),
+                                      index=False).to_numpy()
+
+
+def iter_company_blocks(n, seed=0):
+    """Yield DataFrames of consecutive rows of the n-row table
+
+    De-duplication state is carried across blocks, so the concatenated
+    blocks equal generate_companies(n, seed).
+    """
+    seen = np.empty(0, dtype=np.uint64)
+    produced = 0
+    block = 0
+    while produced < n:
+        take = min(BLOCK_ROWS, n - produced)
+        raw = _block(seed, block, take)
+        cores = np.array(raw["core"][:take], dtype=object)
+        suffixes = np.array(raw["suffix"][:take], dtype=object)
+        countries = raw["country"][:take]
+        cities = np.array(raw["city"][:take], dtype=object)
+        brands = np.array(raw["brand"][:take], dtype=object)
+
+        names = np.array(_names(cores, suffixes), dtype=object)
+        norms = np.array(normalize_names(names), dtype=object)
+        keys = np.array(_dedupe_keys(names, norms, countries))
+        # Names colliding with an earlier row get a brand stem, then a number, before the suffix
+        base = cores.copy()
+        attempt = 0
+        while True:
+            clash = pd.Series(keys).duplicated().to_numpy() | _isin_sorted(keys, seen)
+            if not clash.any():
+                break
+            attempt += 1
+            if attempt == 1:
+                # A second brand stem first ("Velmar Houston Holdings"); then 2, 3, ...
+                cores[clash] = [f"{brand} {core}" for brand, core in
+                                zip(brands[clash], cores[clash])]
+                base = cores.copy()
+            else:
+                cores[clash] = [f"{core} {attempt}" for core in base[clash]]
+            names[clash] = _names(cores[clash], suffixes[clash])
+            norms[clash] = normalize_names(names[clash])
+            keys[clash] = _dedupe_keys(names[clash], norms[clash], countries[clash])
+        keys = np.sort(keys)
+        seen = np.insert(seen, np.searchsorted(seen, keys), keys)
+
+        short = raw["alias_draw"][:take] < ALIAS_FRACTION
+        former = raw["alias_draw"][:take] < FORMER_NAME_FRACTION
+        alias1 = np.where(short, cores, None)
+        alias2 = np.where(former, raw["former"][:take], None)
+        aliases = [[a for a in (a1, a2) if a is not None] or None
+                   for a1, a2 in zip(alias1, alias2)]
+        yield pd.DataFrame({
+            "name": names,
+            "name_norm": norms,
+            "country": countries,
+            "lei": raw["lei"][:take],
+            "wikidata_qid": raw["wikidata_qid"][:take],
+            "aliases": aliases,
+            "address": None,
+            "city": cities,
+            "postal_code": None,
+            "source": "synthetic",
+            "alias1": alias1,
+            "alias2": alias2,
+            "alias3": None,
+            "alias4": None,
+            "alias5": None,
+        }, index=pd.RangeIndex(produced, produced + take))
+        produced += take
+        block += 1
+
+
+def generate_companies(n, seed=0, include_bundled=False):
+    """Deterministic n-row company table with the list_companies() schema
+
+    Args:
+        n: Synthetic rows
+        seed: Seed; the first m rows of a table are the m-row table
+        include_bundled: Put entityidentity's bundled companies first, so
+            tests written against the bundled data keep their answers
+    """
+    frames = list(iter_company_blocks(n, seed))
+    if include_bundled:
+        from entityidentity.companies.companyidentity import load_companies
+
+        bundled = load_companies.__wrapped__(None)
+        frames.insert(0, bundled.astype(object).where(bundled.notna(), None))
+    companies = pd.concat(frames, ignore_index=True) if frames else next(
+        iter_company_blocks(1, seed)).iloc[:0]
+    return companies
+
+
+def write_database(path, n, seed=0, include_bundled=False):
+    """Write an n-row table to .parquet (streamed block by block) or .csv
+
+    Returns:
+        The path written
+    """
+    path = Path(path)
+    if path.suffix == ".csv" or include_bundled:
+        companies = generate_companies(n, seed, include_bundled)
+        if path.suffix == ".csv":
+            companies.drop(columns="aliases").to_csv(path, index=False)
+        else:
+            companies.to_parquet(path, index=False)
+        return path
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for frame in iter_company_blocks(n, seed):
+            table = pa.Table.from_pandas(frame.astype(object), preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+NOISE_KINDS = ("exact", "case", "suffix", "typo", "punctuation", "accents", "alias")
+
+
+def split_suffix(name, country):
+    """Split a generated name into (core, legal suffix); suffix is '' if none"""
+    pool = list(LEGAL_SUFFIXES.get(country, []))
+    if country in NATIVE_SCRIPTS:
+        pool.append(NATIVE_SCRIPTS[country][2])
+    for suffix in sorted(pool, key=len, reverse=True):
+        if name.endswith(" " + suffix):
+            return name[:-len(suffix) - 1], suffix
+    return name, ""
+
+
+def _noisy(name, country, alias, kind, rng):
+    """Apply one kind of noise to a company name"""
+    core, suffix = split_suffix(name, country)
+    if kind == "case":
+        return name.upper() if rng.random() < 0.5 else name.lower()
+    if kind == "suffix":
+        other = ["Inc", "Ltd", "Co", "Corp"][int(rng.integers(0, 4))]
+        return core if not suffix or rng.random() < 0.5 else f"{core} {other}"
+    if kind == "typo" and len(core) >= 5:
+        i = int(rng.integers(1, len(core) - 2))
+        if rng.random() < 0.5:
+            core = core[:i] + core[i + 1:]  # dropped character
+        else:
+            core = core[:i] + core[i + 1] + core[i] + core[i + 2:]  # transposition
+        return f"{core} {suffix}".rstrip()
+    if kind == "punctuation":
+        return name.replace(" ", "-", 1) if rng.random() < 0.5 else f"{core}, {suffix}"
+    if kind == "accents":
+        text = unicodedata.normalize("NFKD", name)
+        return "".join(c for c in text if not unicodedata.combining(c))
+    if kind == "alias" and alias:
+        return alias
+    return name
+
+
+def generate_queries(companies, n, seed=0, known_fraction=0.8, country_hint=0.6):
+    """Noisy queries with ground truth for a generated company table
+
+    Args:
+        companies: Table from generate_companies (or any list_companies()-shaped
+            table; noise is then applied without suffix awareness)
+        n: Number of queries
+        known_fraction: Share of queries derived from a real row; the rest are
+            invented names built from syllables the generator never uses
+        country_hint: Share of queries carrying the true country
+
+    Returns:
+        DataFrame with name, country (hint or None), expected_row (row position
+        in companies, -1 for no true match), expected_lei and noise
+    """
+    rng = np.random.default_rng([seed, 1 << 20])
+    names = companies["name"].to_numpy(dtype=object)
+    countries = companies["country"].to_numpy(dtype=object)
+    alias1 = (companies["alias1"].to_numpy(dtype=object) if "alias1" in companies
+              else np.full(len(companies), None, dtype=object))
+    leis = (companies["lei"].to_numpy(dtype=object) if "lei" in companies
+            else np.full(len(companies), None, dtype=object))
+
+    rows = []
+    for _ in range(n):
+        if len(companies) and rng.random() < known_fraction:
+            row = int(rng.integers(0, len(companies)))
+            kind = NOISE_KINDS[int(rng.integers(0, len(NOISE_KINDS)))]
+            alias = alias1[row] if isinstance(alias1[row], str) else None
+            kind = kind if kind != "alias" or alias else "exact"
+            lei = leis[row] if isinstance(leis[row], str) else None
+            rows.append((_noisy(names[row], countries[row], alias, kind, rng),
+                         countries[row] if rng.random() < country_hint else None,
+                         row, lei, kind))
+        else:
+            stem = "".join(UNKNOWN_SYLLABLES[i] for i in rng.integers(0, len(UNKNOWN_SYLLABLES), 2))
+            word = INDUSTRY_WORDS[int(rng.integers(0, len(INDUSTRY_WORDS)))]
+            code = list(COUNTRY_WEIGHTS)[int(rng.integers(0, len(COUNTRY_WEIGHTS)))]
+            rows.append((f"{stem.capitalize()} {word} {LEGAL_SUFFIXES[code][0]}",
+                         code if rng.random() < country_hint else None, -1, None, "unknown"))
+    return pd.DataFrame(rows, columns=["name", "country", "expected_row", "expected_lei",
+                                       "noise"])
+
+
+@contextmanager
+def use_database(source):
+    """Make entityidentity load source in place of its bundled company data
+
+    Inside the block, list_companies(), resolve_company(), match_company() and
+    every other caller of load_companies() without a data_path get source;
+    explicit data_path arguments are unaffected. The tests.bench default
+    indexes are rebuilt on first use inside and after the block.
+
+    Args:
+        source: Path to a .parquet/.csv table, or a DataFrame
+    """
+    import sys
+
+    from entityidentity.companies import companyidentity
+    from tests.bench.index import default_index
+    from tests.bench.suggest import default_prefix_index
+
+    original = companyidentity.load_companies
+    if isinstance(source, pd.DataFrame):
+        def load(data_path=None):
+            return source if data_path is None else original(data_path)
+    else:
+        def load(data_path=None):
+            return original(str(source) if data_path is None else data_path)
+    load.cache_clear = original.cache_clear
+    load.__wrapped__ = original.__wrapped__
+
+    def reset():
+        original.cache_clear()
+        default_index.cache_clear()
+        default_prefix_index.cache_clear()
+
+    # Every entityidentity module global bound to the loader (e.g. companyapi's
+    # _load_companies) is swapped, not just the defining module's
+    bindings = [(module, name) for module_name, module in list(sys.modules.items())
+                if module_name.split(".")[0] == "entityidentity" and module is not None
+                for name, value in vars(module).items() if value is original]
+    reset()
+    for module, name in bindings:
+        setattr(module, name, load)
+    try:
+        yield source
+    finally:
+        for module, name in bindings:
+            setattr(module, name, original)
+        reset()
+
+
+def dataset_benchmark(sizes, seed=0, n_queries=200):
+    """Generation, write and load time of synthetic databases, plus match accuracy
+
+    Accuracy goes through tests.bench.index.default_index(), which mirrors
+    entityidentity's resolve_company pipeline over list_companies(), so it
+    also checks that the installed database is the one being matched.
+
+    Returns:
+        List of dicts with size, write seconds, rows per second generated,
+        file MB, list_companies() load seconds, and the share of known
+        queries whose confident match is the expected company
+    """
+    import tempfile
+
+    from entityidentity import list_companies
+    from tests.bench.index import default_index
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="entityidentity-dataset-") as directory:
+        for n in sizes:
+            path = Path(directory) / f"companies_{n}.parquet"
+            start = time.perf_counter()
+            write_database(path, n, seed)
+            write_seconds = time.perf_counter() - start
+            with use_database(path):
+                start = time.perf_counter()
+                companies = list_companies()
+                load_seconds = time.perf_counter() - start
+                queries = generate_queries(companies, n_queries, seed)
+                known = queries[queries["expected_row"] >= 0]
+                correct = 0
+                for name, country, row in zip(known["name"], known["country"],
+                                              known["expected_row"]):
+                    match = default_index().match(name, None if pd.isna(country) else country)
+                    correct += match is not None and match["name"] == companies["name"].iat[row]
+            results.append({
+                "size": n,
+                "write_seconds": write_seconds,
+                "rows_per_second": n / write_seconds,
+                "file_mb": path.stat().st_size / 1e6,
+                "load_seconds": load_seconds,
+                "match_accuracy": correct / len(known) if len(known) else 0.0,
+            })
+    return results
@@ -0,0 +1,354 @@
+"""
+Incremental add/modify/delete updates with versioned snapshots
+
+Refreshing the company data today means rebuilding everything behind
+list_companies() and restarting. LiveIndex applies a delta (a CSV/Parquet
+file or DataFrame with an ``op`` column of add/modify/delete) to the company
+table and its CompanyIndex without a rebuild:
+
+- deleted and modified rows are tombstoned: dropped from the country scopes
+  and blocking keys, but left in the row arrays
+- added and modified rows are appended and merged into the sorted blocking
+  keys of every scope
+
+The result is a new immutable Snapshot, published with one reference swap.
+A call that took a snapshot before the swap finishes on the old version; new
+calls see the new one. Because survivors keep their relative order and new
+rows go last, a snapshot answers exactly as a CompanyIndex rebuilt from its
+live rows would.
+
+``entityidentity-bench delta`` compares apply time with a full rebuild.
+"""
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.index import CompanyIndex
+from tests.bench.normalize import normalize_names
+
+OPS = ("add", "modify", "delete")
+DEFAULT_KEY = ("name", "country")
+
+
+def read_delta(path):
+    """Read a delta file (.parquet, otherwise CSV with empty cells as missing)"""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""])
+
+
+def _keys(df, key):
+    """Hashable key tuples for every row of df"""
+    columns = [df[col].astype(object).where(df[col].notna(), None) for col in key]
+    return list(zip(*columns))
+
+
+class Snapshot:
+    """One immutable version of the company table and its index
+
+    Attributes:
+        version: Version number (0 for the base data)
+        index: CompanyIndex over every row ever added, including tombstones
+        live: Boolean mask of rows that are current
+    """
+
+    def __init__(self, version, index, live):
+        self.version = version
+        self.index = index
+        self.live = live
+
+    def __len__(self):
+        return int(self.live.sum())
+
+    def companies(self):
+        """Live rows as a DataFrame (row labels are the snapshot's row ids)"""
+        return self.index.companies[self.live]
+
+    def list_companies(self, country=None, search=None, limit=None):
+        """list_companies() filters applied to this version's live rows"""
+        df = self.companies()
+        if country:
+            df = df[df["country"] == country.upper()]
+        if search:
+            search_lower = search.lower()
+            mask = (df["name"].str.lower().str.contains(search_lower, na=False)
+                    | df["name_norm"].str.contains(search_lower, na=False))
+            df = df[mask]
+        return df.head(limit) if limit else df
+
+    def resolve_company(self, name, country=None):
+        """resolve_company against this version"""
+        return self.index.resolve(name, country)
+
+    def match_company(self, name, country=None):
+        """match_company against this version"""
+        return self.index.match(name, country)
+
+
+class LiveIndex:
+    """Company table and index that accept deltas while serving queries
+
+    Args:
+        companies: Base DataFrame shaped like list_companies() (defaults to
+            the bundled data)
+        key: Columns identifying a company in deltas
+        keep_versions: Number of recent snapshots retained for snapshot(version)
+
+    Readers call snapshot() once per request (resolve_company and
+    match_company do this) and use that object throughout. Writers are
+    serialized by a lock; a failed delta leaves the current version untouched.
+    """
+
+    def __init__(self, companies=None, key=DEFAULT_KEY, keep_versions=4):
+        self.key = tuple(key)
+        self.keep_versions = keep_versions
+        index = CompanyIndex(companies)
+        self._rows = {k: row for row, k in enumerate(_keys(index.companies, self.key))}
+        if len(self._rows) != len(index):
+            raise ValueError(f"Key {self.key} is not unique in the base data")
+        self._current = Snapshot(0, index, np.ones(len(index), dtype=bool))
+        self._history = {0: self._current}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._current.version
+
+    def snapshot(self, version=None):
+        """The current Snapshot, or a retained earlier version"""
+        if version is None:
+            return self._current
+        try:
+            return self._history[version]
+        except KeyError:
+            raise KeyError(f"Version {version} is not retained") from None
+
+    def resolve_company(self, name, country=None):
+        """resolve_company against the current version"""
+        return self.snapshot().resolve_company(name, country)
+
+    def match_company(self, name, country=None):
+        """match_company against the current version"""
+        return self.snapshot().match_company(name, country)
+
+    def apply(self, delta):
+        """Apply a delta and publish it as a new version
+
+        Args:
+            delta: DataFrame or path to a CSV/Parquet file with an ``op``
+                column (add, modify or delete), the key columns and, for add
+                and modify, the company columns to set. Columns missing from
+                the delta keep their old values on modify; name_norm is
+                recomputed from name unless given.
+
+        Returns:
+            The new version number
+
+        Raises:
+            ValueError: Unknown op, a key repeated in the delta, an add of an
+                existing company, or a modify/delete of a missing one
+        """
+        if not isinstance(delta, pd.DataFrame):
+            delta = read_delta(delta)
+        with self._lock:
+            old = self._current
+            ops = delta["op"].str.lower().to_numpy(dtype=object)
+            unknown = set(ops) - set(OPS)
+            if unknown:
+                raise ValueError(f"Unknown delta ops: {sorted(unknown)}")
+            keys = _keys(delta, self.key)
+            if len(set(keys)) != len(keys):
+                raise ValueError("A company key appears more than once in the delta")
+
+            existing = [k in self._rows for k in keys]
+            bad_adds = [k for k, op, e in zip(keys, ops, existing) if op == "add" and e]
+            missing = [k for k, op, e in zip(keys, ops, existing) if op != "add" and not e]
+            if bad_adds:
+                raise ValueError(f"Cannot add existing companies: {bad_adds[:5]}")
+            if missing:
+                raise ValueError(f"Cannot modify/delete missing companies: {missing[:5]}")
+
+            dead = np.array([self._rows[k] for k, op in zip(keys, ops) if op != "add"],
+                            dtype=np.int64)
+            appended = self._appended_rows(old.index.companies, delta, ops)
+            index = _updated_index(old.index, dead, appended)
+            live = np.concatenate([old.live, np.ones(len(appended), dtype=bool)])
+            live[dead] = False
+
+            snapshot = Snapshot(old.version + 1, index, live)
+            for k, op in zip(keys, ops):
+                if op != "add":
+                    del self._rows[k]
+            appended_keys = [k for k, op in zip(keys, ops) if op != "delete"]
+            for offset, k in enumerate(appended_keys):
+                self._rows[k] = len(old.index) + offset
+
+            self._current = snapshot
+            self._history[snapshot.version] = snapshot
+            self._history.pop(snapshot.version - self.keep_versions, None)
+            return snapshot.version
+
+    def _appended_rows(self, companies, delta, ops):
+        """Rows to append, in delta order: modified records (old values updated) and adds"""
+        upserts = delta[ops != "delete"].drop(columns=["op"]).reset_index(drop=True)
+        columns = [col for col in upserts.columns if col in companies.columns]
+        modified = (ops[ops != "delete"] == "modify")
+        keys = _keys(upserts[modified], self.key)
+
+        appended = pd.DataFrame(index=upserts.index, columns=companies.columns, dtype=object)
+        if modified.any():
+            previous = companies.iloc[[self._rows[k] for k in keys]]
+            appended.loc[modified] = previous.to_numpy(dtype=object)
+            if "name" in columns and "name_norm" not in columns:
+                # Renamed companies get their name_norm recomputed below
+                renamed = previous["name"].to_numpy(dtype=object) \
+                    != upserts.loc[modified, "name"].to_numpy(dtype=object)
+                appended.loc[np.flatnonzero(modified)[renamed], "name_norm"] = None
+        for col in columns:
+            given = upserts[col].to_numpy(dtype=object)
+            appended.loc[modified, col] = given[modified]
+            appended.loc[~modified, col] = given[~modified]
+        missing = appended["name_norm"].isna().to_numpy()
+        if missing.any():
+            appended.loc[missing, "name_norm"] = normalize_names(appended.loc[missing, "name"])
+        # Matching dtypes keeps the later concat from converting the whole table
+        for col, dtype in companies.dtypes.items():
+            try:
+                appended[col] = appended[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+        return appended
+
+
+def _updated_index(index, dead, appended):
+    """New CompanyIndex: rows in dead tombstoned, appended rows added at the end"""
+    if index.shortlist_index is not None:
+        raise ValueError("Incremental updates support blocking='prefix' only")
+    new = CompanyIndex.__new__(CompanyIndex)
+    new.blocking = index.blocking
+    new.shortlist_index = None
+    n_old, n_new = len(index), len(appended)
+    new.companies = pd.concat([index.companies, appended], ignore_index=True)
+
+    add = CompanyIndex(appended) if n_new else None
+    new.name_norm = np.concatenate([index.name_norm, add.name_norm if add else []]).astype(object)
+    new.country = np.concatenate([index.country, add.country if add else []]).astype(object)
+    new.has_lei = np.concatenate([index.has_lei, add.has_lei if add else []]).astype(bool)
+    new.alias_norm, new.alias_present = [], []
+    for i in range(len(index.alias_norm)):
+        norms = add.alias_norm[i] if add else np.array([], dtype=object)
+        present = add.alias_present[i] if add else np.array([], dtype=bool)
+        new.alias_norm.append(np.concatenate([index.alias_norm[i], norms]))
+        new.alias_present.append(np.concatenate([index.alias_present[i], present]))
+
+    is_dead = np.zeros(n_old + n_new, dtype=bool)
+    is_dead[dead] = True
+    new_rows = np.arange(n_old, n_old + n_new)
+
+    new.scope_rows = {}
+    new._block_keys = {}
+    new._lock = threading.Lock()
+    scopes = set(index.scope_rows) | set(new.country[new_rows])
+    for scope in scopes:
+        old_rows = index.scope_rows.get(scope, new_rows[:0])
+        added = new_rows if scope is None else new_rows[new.country[new_rows] == scope]
+        rows = np.concatenate([old_rows[~is_dead[old_rows]], added])
+        if scope is not None and (not scope or not len(rows)):
+            continue
+        new.scope_rows[scope] = rows
+        if scope in index._block_keys:
+            keys, key_rows = index._block_keys[scope]
+            keep = ~is_dead[key_rows]
+            new._block_keys[scope] = _merge_keys(keys[keep], key_rows[keep], new, added)
+    return new
+
+
+def _merge_keys(keys, key_rows, index, rows):
+    """Insert the name and alias keys of rows into sorted (keys, key_rows)"""
+    add_keys = [index.name_norm[rows]]
+    add_rows = [rows]
+    for norms, present in zip(index.alias_norm, index.alias_present):
+        alias_rows = rows[present[rows]]
+        add_keys.append(norms[alias_rows])
+        add_rows.append(alias_rows)
+    add_keys = np.concatenate(add_keys).astype(str)
+    add_rows = np.concatenate(add_rows)
+    if not len(add_keys):
+        return keys, key_rows
+    order = np.argsort(add_keys, kind="stable")
+    add_keys, add_rows = add_keys[order], add_rows[order]
+    if add_keys.dtype.itemsize > keys.dtype.itemsize:
+        keys = keys.astype(add_keys.dtype)
+    at = np.searchsorted(keys, add_keys, side="right")
+    return np.insert(keys, at, add_keys), np.insert(key_rows, at, add_rows)
+
+
+def synthetic_delta(companies, n_add, n_modify, n_delete, key=DEFAULT_KEY, seed=0):
+    """Random delta against companies: new companies, changed LEIs/aliases, deletions
+
+    Returns:
+        DataFrame with an ``op`` column followed by the company columns
+    """
+    from tests.bench.corpus import synthetic_companies
+
+    rng = np.random.default_rng(seed)
+    existing = set(_keys(companies, key))
+    chosen = rng.choice(len(companies), size=n_modify + n_delete, replace=False)
+
+    modify = companies.iloc[chosen[:n_modify]][list(key)].copy()
+    fresh = synthetic_companies(n_modify, seed=seed + 1)
+    modify["lei"] = fresh["lei"].to_numpy(dtype=object)
+    modify["alias1"] = fresh["name"].to_numpy(dtype=object)
+    modify.insert(0, "op", "modify")
+
+    delete = companies.iloc[chosen[n_modify:]][list(key)].copy()
+    delete.insert(0, "op", "delete")
+
+    adds = synthetic_companies(n_add * 2, seed=seed + 2)
+    adds = adds[[k not in existing for k in _keys(adds, key)]]
+    adds = adds.drop_duplicates(subset=list(key)).head(n_add).drop(columns=["name_norm"])
+    adds.insert(0, "op", "add")
+    return pd.concat([modify, delete, adds], ignore_index=True)
+
+
+def delta_benchmark(base_size, n_add=1_000, n_modify=1_000, n_delete=500, seed=0):
+    """Time applying a delta against rebuilding the index from scratch
+
+    Both are timed including the first query in each country scope, since
+    that is when the rebuilt index sorts its blocking keys.
+
+    Returns:
+        Dict with base size, delta size, apply and rebuild seconds and speedup
+    """
+    from tests.bench.corpus import synthetic_companies
+
+    base = synthetic_companies(base_size, seed=seed).drop_duplicates(list(DEFAULT_KEY))
+    live = LiveIndex(base)
+    for scope in list(live.snapshot().index.scope_rows):
+        live.snapshot().index.block_keys(scope)
+    delta = synthetic_delta(base, n_add, n_modify, n_delete, seed=seed)
+
+    def warm(index):
+        for scope in list(index.scope_rows):
+            index.block_keys(scope)
+
+    start = time.perf_counter()
+    live.apply(delta)
+    warm(live.snapshot().index)
+    apply_seconds = time.perf_counter() - start
+
+    compacted = live.snapshot().companies()
+    start = time.perf_counter()
+    warm(CompanyIndex(compacted))
+    rebuild_seconds = time.perf_counter() - start
+    return {
+        "base_size": base_size,
+        "delta_size": len(delta),
+        "apply_seconds": apply_seconds,
+        "rebuild_seconds": rebuild_seconds,
+        "speedup": rebuild_seconds / apply_seconds,
+    }
@@ -0,0 +1,335 @@
+"""
+Seeded fuzz harness for pathological-latency inputs
+
+test_no_match_for_garbage_input tries one garbage string. This harness
+generates many adversarial company names and sends each one through
+normalize_name, match_company, resolve_company and the bench CompanyIndex.
+It records every call's latency and exception, and checks a few properties
+of the results.
+
+The input categories are:
+
+- long: many words, up to max_length characters
+- unicode: combining marks, right-to-left and CJK scripts, emoji with
+  joiners, fullwidth forms, control characters and lone surrogates
+- suffixes: a short name followed by many repeated legal suffixes
+- hot_tokens: first tokens that are the most common name prefixes in the
+  table, or too short to block on, so the candidate set is huge
+- garbage: empty, whitespace, punctuation and digit strings
+
+growth_curves() times one input family at rising lengths and fits the
+log-log slope of latency against length. A slope above SUPERLINEAR means
+an input can stall a worker far longer than its size suggests.
+
+Only calls that return are timed: a call that raises measures the failure
+path, not resolution. Exceptions are grouped and reported on their own, and
+a target that raised on every input is listed in 'failing_targets'.
+
+hypothesis is not a dependency, so inputs come from random.Random(seed).
+A run is reproducible from its seed, and every reported input can be
+replayed.
+
+    entityidentity-bench fuzz [--inputs 200] [--seed 0] [--rows 5000]
+"""
+import random
+import unicodedata
+
+import numpy as np
+
+from tests.bench.corpus import LEGAL_SUFFIXES, synthetic_companies
+from tests.bench.timing import summarize, time_call
+
+CATEGORIES = ("long", "unicode", "suffixes", "hot_tokens", "garbage")
+GROWTH_FAMILIES = ("words", "suffixes", "unicode", "hot_token", "single_char")
+GROWTH_LENGTHS = (64, 256, 1024, 4096)
+# Log-log slope of latency against input length above which growth is flagged
+SUPERLINEAR = 1.5
+# Calls faster than this are timer noise and left out of the growth fit
+_MIN_FIT_SECONDS = 5e-5
+
+_UNICODE_POOLS = [
+    "\u0301\u0308\u0327\u20dd\u0489",                       # combining marks
+    "\u0627\u0644\u0634\u0631\u0643\u0629\u05d7\u05d1\u05e8\u05d4\u200f\u202e",  # RTL
+    "\u682a\u5f0f\u4f1a\u793e\u6709\u9650\u516c\u53f8\u30b0\u30eb\u30fc\u30d7",  # CJK
+    "\U0001F468\u200d\U0001F469\u200d\U0001F467\U0001F3ED\ufe0f\U0001F4B0",        # emoji
+    "\uff21\uff22\uff23\uff29\uff4e\uff43\ufb01\ufb02\u2126\u212b",   # fullwidth, ligatures
+    "\x00\x07\x1b\u200b\u00a0\ufeff\t\r\n",                       # control, invisible
+    "\ud800\udfff\U0001d400",                                  # lone surrogates, math
+]
+_GARBAGE = ["", " ", "\t\n", ".", "&&&", "-_-", "()[]{}", "Inc", "Ltd.", "0", "123456789",
+            "a", "ab", "%s%s%n", "'; DROP TABLE companies; --", "\\\\", "?" * 40]
+_COUNTRIES = [None, None, None, "US", "GB", "AU", "us", "ZZ", "", "USA", "éé"]
+
+
+def hot_prefixes(companies, n=10):
+    """Return the n three-letter name prefixes shared by the most companies"""
+    norms = companies["name_norm"].fillna("").astype(str)
+    prefixes = norms.str[:3]
+    counts = prefixes[prefixes.str.len() == 3].value_counts()
+    return list(counts.index[:n])
+
+
+def _words(rng, length):
+    """Random lowercase words separated by spaces, about length characters"""
+    words = []
+    size = 0
+    while size < length:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def _unicode(rng, length):
+    """Random text drawn from the adversarial unicode pools"""
+    pools = rng.sample(_UNICODE_POOLS, rng.randint(1, 3))
+    return "".join(rng.choice(rng.choice(pools)) for _ in range(length))
+
+
+def _suffixes(rng, length):
+    """A short name followed by legal suffixes repeated up to length characters"""
+    name = rng.choice(["Acme", "Borvel Mining", "Zan", "BHP Group"])
+    repeated = [rng.choice(LEGAL_SUFFIXES) for _ in range(3)]
+    text = name
+    while len(text) < length:
+        text += " " + rng.choice(repeated)
+    return text[:length]
+
+
+def generate_inputs(n, companies=None, seed=0, max_length=4096):
+    """Generate adversarial (category, name, country) inputs
+
+    Args:
+        n: Number of inputs, spread evenly over CATEGORIES
+        companies: Company table used to pick hot prefixes (synthetic if None)
+        seed: Seed for random.Random; the same seed gives the same inputs
+        max_length: Longest generated name, in characters
+
+    Returns:
+        List of (category, name, country) tuples
+    """
+    rng = random.Random(seed)
+    companies = companies if companies is not None else synthetic_companies(2_000, seed=seed)
+    hot = hot_prefixes(companies) or ["abc"]
+    lengths = [2 ** p for p in range(4, max(5, max_length.bit_length()))] + [max_length]
+    lengths = [length for length in lengths if length <= max_length]
+
+    inputs = []
+    for i in range(n):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        length = rng.choice(lengths)
+        if category == "long":
+            name = _words(rng, length)
+        elif category == "unicode":
+            name = _unicode(rng, rng.choice(lengths[:4]))
+            if rng.random() < 0.5:
+                name = _words(rng, 12) + " " + unicodedata.normalize(
+                    rng.choice(["NFC", "NFD", "NFKC", "NFKD"]), name)
+        elif category == "suffixes":
+            name = _suffixes(rng, length)
+        elif category == "hot_tokens":
+            token = rng.choice(hot + ["ab", "x", "the", "co"])
+            name = token + " " + _words(rng, rng.choice(lengths[:4]))
+        else:
+            name = rng.choice(_GARBAGE)
+            if rng.random() < 0.3:
+                name = name * rng.randint(2, 200)
+        inputs.append((category, name, rng.choice(_COUNTRIES)))
+    return inputs
+
+
+def fuzz_targets(index=None):
+    """Return the fuzzed functions as {name: fn(name, country)}
+
+    Args:
+        index: CompanyIndex for the 'index_resolve' target (omitted if None)
+    """
+    from entityidentity import match_company, normalize_name, resolve_company
+
+    targets = {
+        "normalize_name": lambda name, country: normalize_name(name),
+        "match_company": lambda name, country: match_company(name, country=country),
+        "resolve_company": lambda name, country: resolve_company(name, country=country),
+    }
+    if index is not None:
+        targets["index_resolve"] = index.resolve
+    return targets
+
+
+def check_properties(target, result):
+    """Return a description of the first property result breaks, or None
+
+    normalize_name must return a string that normalizes to itself; a match
+    must be None or a dict with a name; a resolve result must list matches
+    best first with scores in [0, 100]. Other targets have no properties.
+    """
+    from entityidentity import normalize_name
+
+    if target == "normalize_name":
+        if not isinstance(result, str):
+            return f"returned {type(result).__name__}, not str"
+        if normalize_name(result) != result:
+            return "not idempotent"
+    elif target == "match_company":
+        if result is not None and not (isinstance(result, dict) and "name" in result):
+            return "match is neither None nor a dict with a name"
+    elif target in ("resolve_company", "index_resolve"):
+        scores = [m["score"] for m in result["matches"]]
+        if any(not 0 <= s <= 100 for s in scores):
+            return "score outside [0, 100]"
+        if scores != sorted(scores, reverse=True):
+            return "matches not sorted by score"
+        if result["decision"] not in ("auto_high_conf", "needs_hint_or_llm", "no_match"):
+            return f"unknown decision {result['decision']!r}"
+    return None
+
+
+def run_inputs(inputs, targets):
+    """Call every target on every input
+
+    Returns:
+        List of records with target, category, name, country, length,
+        seconds, error (exception type name or None), message and violation
+        (broken property or None)
+    """
+    records = []
+    for category, name, country in inputs:
+        for target, fn in targets.items():
+            seconds, result, error = time_call(fn, name, country)
+            violation = None if error is not None else check_properties(target, result)
+            records.append({
+                "target": target, "category": category, "name": name, "country": country,
+                "length": len(name), "seconds": seconds,
+                "error": None if error is None else type(error).__name__,
+                "message": None if error is None else str(error)[:200],
+                "violation": violation,
+            })
+    return records
+
+
+def family_input(family, length, hot="bor", seed=0):
+    """Return one input of a growth family at a given length"""
+    rng = random.Random(seed)
+    if family == "words":
+        return _words(rng, length)
+    if family == "suffixes":
+        return ("Acme" + " Inc" * length)[:length]
+    if family == "unicode":
+        return ("é株\U0001F3EDﬁ " * length)[:length]
+    if family == "hot_token":
+        return (hot + " " + _words(rng, length))[:length]
+    if family == "single_char":
+        return "x" * length
+    raise ValueError(f"family must be one of {GROWTH_FAMILIES}, got {family!r}")
+
+
+def growth_exponent(lengths, seconds):
+    """Log-log slope of latency against input length (None if too fast to fit)"""
+    points = [(n, s) for n, s in zip(lengths, seconds) if s >= _MIN_FIT_SECONDS]
+    if len(points) < 2:
+        return None
+    x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def growth_curves(targets, families=GROWTH_FAMILIES, lengths=GROWTH_LENGTHS, repeats=3,
+                  hot="bor"):
+    """Time each target on each input family at rising lengths
+
+    Returns:
+        List of dicts with target, family, lengths, best-of-repeats seconds
+        at each length, the fitted exponent and whether it is super-linear.
+        If the target raises, the curve stops at that length with the
+        exception type in 'error' and no exponent.
+    """
+    curves = []
+    for target, fn in targets.items():
+        for family in families:
+            seconds, error = [], None
+            for length in lengths:
+                name = family_input(family, length, hot)
+                calls = [time_call(fn, name, None) for _ in range(repeats)]
+                failed = [e for _, _, e in calls if e is not None]
+                if failed:
+                    error = type(failed[0]).__name__
+                    break
+                seconds.append(min(t for t, _, _ in calls))
+            exponent = None if error else growth_exponent(lengths, seconds)
+            curves.append({
+                "target": target, "family": family, "lengths": list(lengths),
+                "seconds": seconds, "exponent": exponent, "error": error,
+                "superlinear": exponent is not None and exponent > SUPERLINEAR,
+            })
+    return curves
+
+
+def preview(name, width=60):
+    """Short printable form of an input for reports"""
+    text = repr(name[:width])
+    return text if len(name) <= width else f"{text}... ({len(name)} chars)"
+
+
+def fuzz_report(records, curves=(), top=10):
+    """Summarize fuzz records and growth curves
+
+    Returns:
+        Dict with the slowest calls, exceptions grouped by target and type
+        (with a count and an example), targets that raised on every input,
+        property violations, per-target and per-category latency summaries,
+        all growth curves and the super-linear ones. The slowest calls and
+        the latency summaries cover only calls that returned.
+    """
+    returned = [r for r in records if r["error"] is None]
+    slowest = sorted(returned, key=lambda r: -r["seconds"])[:top]
+    exceptions = {}
+    for r in records:
+        if r["error"] is not None:
+            key = (r["target"], r["error"])
+            group = exceptions.setdefault(key, {"target": r["target"], "error": r["error"],
+                                                "count": 0, "message": r["message"],
+                                                "example": preview(r["name"])})
+            group["count"] += 1
+    by_category = {}
+    for r in returned:
+        by_category.setdefault(r["target"], {}).setdefault(r["category"], []).append(r["seconds"])
+    return {
+        "calls": len(records),
+        "slowest": [{"target": r["target"], "category": r["category"], "ms": r["seconds"] * 1000,
+                     "length": r["length"], "country": r["country"], "input": preview(r["name"])}
+                    for r in slowest],
+        "exceptions": sorted(exceptions.values(), key=lambda g: -g["count"]),
+        "failing_targets": sorted({r["target"] for r in records}
+                                  - {r["target"] for r in returned}),
+        "violations": [{"target": r["target"], "violation": r["violation"],
+                        "input": preview(r["name"])} for r in records if r["violation"]],
+        "latency": {target: {category: summarize(seconds) for category, seconds in cats.items()}
+                    for target, cats in by_category.items()},
+        "growth": list(curves),
+        "superlinear": [c for c in curves if c["superlinear"]],
+    }
+
+
+def run_fuzz(n_inputs=200, seed=0, rows=5_000, max_length=4096, lengths=GROWTH_LENGTHS,
+             repeats=3, top=10):
+    """Fuzz every target against a synthetic table of ``rows`` companies
+
+    The upstream functions read the synthetic table through
+    tests.bench.dataset.use_database, so hot tokens block to large candidate
+    sets for them too.
+
+    Returns:
+        fuzz_report() of the generated inputs and growth curves, plus seed,
+        rows and the number of inputs
+    """
+    from tests.bench.dataset import use_database
+    from tests.bench.index import CompanyIndex
+
+    companies = synthetic_companies(rows, seed=seed)
+    inputs = generate_inputs(n_inputs, companies, seed=seed, max_length=max_length)
+    hot = hot_prefixes(companies, 1)[0]
+    with use_database(companies):
+        targets = fuzz_targets(CompanyIndex(companies))
+        records = run_inputs(inputs, targets)
+        curves = growth_curves(targets, lengths=lengths, repeats=repeats, hot=hot)
+    return {"seed": seed, "rows": rows, "inputs": len(inputs),
+            **fuzz_report(records, curves, top)}
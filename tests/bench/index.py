@@ -0,0 +1,428 @@
+"""
+Precomputed company index for bulk resolution benchmarks
+
+Mirrors entityidentity's resolve_company pipeline over arrays built once from
+list_companies(), so that many queries can be blocked and scored together:
+
+1. Country blocking (falls back to all companies for unknown countries)
+2. First-token prefix blocking on name_norm and normalized aliases
+3. RapidFuzz WRatio scoring, best alias score, +2 country match, +1 has LEI
+4. Auto-accept when the best score >= 88 and leads the runner-up by >= 6
+
+With ``blocking="tokens"`` step 2 is replaced by a precomputed inverted index
+over words and character n-grams (see tests.bench.blocking), and with
+``blocking="minhash"`` by MinHash LSH retrieval (see tests.bench.ann).
+
+An index can be shared between threads: lazily built blocking keys are
+built under a lock, and scoring releases the GIL (see tests.bench.threads).
+"""
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from entityidentity import list_companies, normalize_name
+from tests.bench.ann import MinHashIndex
+from tests.bench.blocking import TokenBlockIndex
+from tests.bench.instrument import current_observer
+from tests.bench.threads import once
+
+# Blocking strategies: entityidentity's first-token prefix, the token index or LSH
+BLOCKING_MODES = ("prefix", "tokens", "minhash")
+
+# Decision rule and limits used by entityidentity.resolve_company
+HIGH_CONF_THRESHOLD = 88.0
+HIGH_CONF_GAP = 6.0
+MAX_CANDIDATES = 50_000
+ALIAS_COLUMNS = [f"alias{i}" for i in range(1, 6)]
+
+# Upper bound for prefix range lookups in sorted key arrays
+_PREFIX_END = "\U0010ffff"
+# Largest query x candidate score matrix computed in one cdist call
+_MAX_CELLS = 4_000_000
+
+
+def first_token(query_norm):
+    """Return the blocking token for a normalized query ('' if too short)"""
+    tokens = query_norm.split()
+    if tokens and len(tokens[0]) >= 3:
+        return tokens[0]
+    return ""
+
+
+class CompanyIndex:
+    """Company table plus the per-company arrays needed to block and score queries
+
+    Args:
+        companies: DataFrame shaped like list_companies() (defaults to it)
+        blocking: "prefix" reproduces entityidentity's candidate blocking;
+            "tokens" builds a TokenBlockIndex once and shortlists from it;
+            "minhash" does the same with a MinHashIndex
+        blocking_options: Keyword arguments for the TokenBlockIndex or
+            MinHashIndex (e.g. max_candidates)
+    """
+
+    def __init__(self, companies=None, blocking="prefix", blocking_options=None):
+        if blocking not in BLOCKING_MODES:
+            raise ValueError(f"blocking must be one of {BLOCKING_MODES}, got {blocking!r}")
+        self.blocking = blocking
+        if companies is None:
+            companies = list_companies()
+        self.companies = companies.reset_index(drop=True)
+        n = len(self.companies)
+
+        self.name_norm = self.companies["name_norm"].fillna("").astype(str).to_numpy(dtype=object)
+        self.country = (
+            self.companies["country"].fillna("").astype(str).str.upper().to_numpy(dtype=object)
+        )
+        if "lei" in self.companies.columns:
+            lei = self.companies["lei"]
+            self.has_lei = (lei.notna() & lei.ne("")).to_numpy(dtype=bool)
+        else:
+            self.has_lei = np.zeros(n, dtype=bool)
+
+        self.alias_norm = []
+        self.alias_present = []
+        for col in ALIAS_COLUMNS:
+            if col not in self.companies.columns:
+                continue
+            values = self.companies[col]
+            present = values.notna().to_numpy(dtype=bool)
+            norms = [normalize_name(str(v)) if p else "" for v, p in zip(values, present)]
+            self.alias_norm.append(np.array(norms, dtype=object))
+            self.alias_present.append(present)
+
+        self.scope_rows = {None: np.arange(n)}
+        for code in pd.unique(self.country):
+            if code:
+                self.scope_rows[code] = np.flatnonzero(self.country == code)
+        self._block_keys = {}
+        self._lock = threading.Lock()
+        # Candidate shortlist (TokenBlockIndex or MinHashIndex) replacing prefix blocking
+        self.shortlist_index = None
+        if blocking != "prefix":
+            shortlist = TokenBlockIndex if blocking == "tokens" else MinHashIndex
+            self.shortlist_index = shortlist(
+                self.name_norm, self.country, list(zip(self.alias_norm, self.alias_present)),
+                **(blocking_options or {})
+            )
+
+    def __len__(self):
+        return len(self.name_norm)
+
+    def to_arrays(self):
+        """Flatten the index into named NumPy arrays with fixed-width strings
+
+        Every scope's blocking keys are built and included, so an index loaded
+        from these arrays needs no warm-up.
+        """
+        arrays = {
+            "name_norm": self.name_norm.astype(str),
+            "country": self.country.astype(str),
+            "has_lei": self.has_lei,
+        }
+        for i, (norms, present) in enumerate(zip(self.alias_norm, self.alias_present)):
+            arrays[f"alias_norm{i}"] = norms.astype(str)
+            arrays[f"alias_present{i}"] = present
+
+        scopes = list(self.scope_rows)
+        blocks = [self.block_keys(scope) for scope in scopes]
+        arrays["scope_codes"] = np.array([scope or "" for scope in scopes], dtype=str)
+        arrays["scope_rows"] = np.concatenate([self.scope_rows[scope] for scope in scopes])
+        arrays["scope_row_offsets"] = np.cumsum([0] + [len(self.scope_rows[s]) for s in scopes])
+        arrays["block_keys"] = np.concatenate([keys for keys, _ in blocks]).astype(str)
+        arrays["block_rows"] = np.concatenate([rows for _, rows in blocks])
+        arrays["block_offsets"] = np.cumsum([0] + [len(keys) for keys, _ in blocks])
+        arrays["blocking"] = np.array(self.blocking)
+        if self.shortlist_index is not None:
+            arrays.update(self.shortlist_index.to_arrays())
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, companies=None):
+        """Rebuild an index from to_arrays() output without recomputing anything
+
+        Arrays are used as given, so memory-mapped arrays stay memory-mapped.
+        Without ``companies`` the index can block, score and rank but not build
+        result dicts.
+        """
+        index = cls.__new__(cls)
+        index.companies = companies
+        index.blocking = arrays["blocking"].item() if "blocking" in arrays else "prefix"
+        index.shortlist_index = None
+        if index.blocking == "tokens":
+            index.shortlist_index = TokenBlockIndex.from_arrays(arrays)
+        elif index.blocking == "minhash":
+            index.shortlist_index = MinHashIndex.from_arrays(arrays)
+        index.name_norm = arrays["name_norm"]
+        index.country = arrays["country"]
+        index.has_lei = arrays["has_lei"]
+        index.alias_norm = []
+        index.alias_present = []
+        i = 0
+        while f"alias_norm{i}" in arrays:
+            index.alias_norm.append(arrays[f"alias_norm{i}"])
+            index.alias_present.append(arrays[f"alias_present{i}"])
+            i += 1
+
+        index.scope_rows = {}
+        index._block_keys = {}
+        index._lock = threading.Lock()
+        row_offsets = arrays["scope_row_offsets"]
+        key_offsets = arrays["block_offsets"]
+        for i, code in enumerate(arrays["scope_codes"]):
+            scope = str(code) or None
+            index.scope_rows[scope] = arrays["scope_rows"][row_offsets[i]:row_offsets[i + 1]]
+            index._block_keys[scope] = (
+                arrays["block_keys"][key_offsets[i]:key_offsets[i + 1]],
+                arrays["block_rows"][key_offsets[i]:key_offsets[i + 1]],
+            )
+        return index
+
+    def save(self, directory):
+        """Write the index arrays as .npy files that can be memory-mapped"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self.to_arrays().items():
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+        return directory
+
+    @classmethod
+    def load(cls, directory, companies=None, mmap_mode="r"):
+        """Open an index written by save(); arrays are memory-mapped read-only"""
+        arrays = {
+            path.stem: np.load(path, mmap_mode=mmap_mode)
+            for path in Path(directory).glob("*.npy")
+        }
+        return cls.from_arrays(arrays, companies)
+
+    def scope_for(self, country):
+        """Return the country scope used for blocking (None means all companies)"""
+        if country:
+            code = str(country).upper()
+            if code in self.scope_rows:
+                return code
+        return None
+
+    def block_keys(self, scope):
+        """Return sorted (key, row) arrays of every name_norm and alias norm in a scope
+
+        Built on first use; concurrent first callers wait for one build.
+        """
+        block = self._block_keys.get(scope)
+        if block is not None:
+            return block
+        with self._lock:
+            if scope in self._block_keys:
+                return self._block_keys[scope]
+            rows = self.scope_rows[scope]
+            keys = [self.name_norm[rows]]
+            key_rows = [rows]
+            for norms, present in zip(self.alias_norm, self.alias_present):
+                alias_rows = rows[present[rows]]
+                keys.append(norms[alias_rows])
+                key_rows.append(alias_rows)
+            keys = np.concatenate(keys).astype(str)
+            key_rows = np.concatenate(key_rows)
+            order = np.argsort(keys, kind="stable")
+            self._block_keys[scope] = (keys[order], key_rows[order])
+            return self._block_keys[scope]
+
+    def candidate_groups(self, query_norms, country=None):
+        """Block a batch of normalized queries in one pass
+
+        Returns:
+            List of (query positions, candidate rows) pairs; every query appears in
+            exactly one group and candidate rows are ascending, as in entityidentity
+        """
+        if len(query_norms) == 0:
+            return []
+        scope = self.scope_for(country)
+        if self.shortlist_index is not None:
+            return [
+                (np.array([pos]), self.shortlist_index.candidates(query_norm, scope))
+                for pos, query_norm in enumerate(query_norms)
+            ]
+        keys, key_rows = self.block_keys(scope)
+        tokens = np.array([first_token(q) for q in query_norms], dtype=str)
+
+        lo = np.searchsorted(keys, tokens, side="left")
+        hi = np.searchsorted(keys, np.char.add(tokens, _PREFIX_END), side="left")
+        hit = (hi > lo) & (tokens != "")
+
+        groups = {}
+        for pos in np.flatnonzero(hit):
+            groups.setdefault(tokens[pos], []).append(pos)
+
+        result = []
+        for token, positions in groups.items():
+            pos = positions[0]
+            rows = np.unique(key_rows[lo[pos]:hi[pos]])[:MAX_CANDIDATES]
+            result.append((np.array(positions), rows))
+        misses = np.flatnonzero(~hit)
+        if len(misses):
+            result.append((misses, self.scope_rows[scope][:MAX_CANDIDATES]))
+        return result
+
+    def block(self, query_norm, country=None):
+        """Return candidate rows for one normalized query"""
+        return self.candidate_groups([query_norm], country)[0][1]
+
+    def score(self, query_norms, rows, country=None, score_cutoff=None):
+        """Score normalized queries against candidate rows
+
+        Args:
+            score_cutoff: Optional RapidFuzz cutoff; name and alias similarities
+                below it are computed as 0 (see tests.bench.pruning)
+
+        Returns:
+            Tuple of (score, score_primary, score_alias) arrays of shape
+            (len(query_norms), len(rows))
+        """
+        choices = self.name_norm[rows].tolist()
+        # entityidentity stores the cdist result (float32) before boosting
+        primary = process.cdist(query_norms, choices, scorer=fuzz.WRatio,
+                                score_cutoff=score_cutoff).astype(np.float64)
+
+        alias = np.zeros_like(primary)
+        for norms, present in zip(self.alias_norm, self.alias_present):
+            mask = present[rows]
+            if not mask.any():
+                continue
+            cols = np.flatnonzero(mask)
+            scores = process.cdist(
+                query_norms, norms[rows[cols]].tolist(), scorer=fuzz.WRatio, dtype=np.float64,
+                score_cutoff=score_cutoff,
+            )
+            alias[:, cols] = np.maximum(alias[:, cols], scores)
+
+        boost = self.has_lei[rows].astype(np.float64)
+        if country:
+            boost = boost + 2.0 * (self.country[rows] == str(country).upper())
+        score = np.minimum(np.maximum(primary, alias) + boost, 100.0)
+        return score, primary, alias
+
+    def rank(self, query_norms, country=None, k=5):
+        """Block, score and keep the top k candidates for each normalized query
+
+        Returns:
+            Dict of (len(query_norms), k) arrays: 'rows' (-1 where fewer than k
+            candidates), 'score', 'score_primary' and 'score_alias' (NaN padded)
+        """
+        query_norms = list(query_norms)
+        groups = self.candidate_groups(query_norms, country) if len(self) else []
+        return self._rank_groups(query_norms, groups, country, k)
+
+    def _rank_groups(self, query_norms, groups, country, k):
+        """Score and keep the top k of already blocked (positions, rows) groups"""
+        n = len(query_norms)
+        out = {
+            "rows": np.full((n, k), -1, dtype=np.int64),
+            "score": np.full((n, k), np.nan),
+            "score_primary": np.full((n, k), np.nan),
+            "score_alias": np.full((n, k), np.nan),
+        }
+        for positions, rows in groups:
+            if len(rows) == 0:
+                continue
+            chunk = max(1, _MAX_CELLS // max(1, len(rows)))
+            top = min(k, len(rows))
+            for start in range(0, len(positions), chunk):
+                pos = positions[start:start + chunk]
+                score, primary, alias = self.score([query_norms[p] for p in pos], rows, country)
+                order = np.argsort(-score, axis=1, kind="stable")[:, :top]
+                out["rows"][pos, :top] = rows[order]
+                out["score"][pos, :top] = np.take_along_axis(score, order, axis=1)
+                out["score_primary"][pos, :top] = np.take_along_axis(primary, order, axis=1)
+                out["score_alias"][pos, :top] = np.take_along_axis(alias, order, axis=1)
+        return out
+
+    def resolve(self, name, country=None, k=5):
+        """Resolve one name; returns the same structure as entityidentity.resolve_company
+
+        Inside a tests.bench.instrument.instrument() block, per-stage timings
+        are reported to the active observer.
+        """
+        observer = current_observer()
+        if observer is None:
+            return self._resolve(name, country, k)
+        return self._resolve_observed(name, country, k, observer)
+
+    def _resolve(self, name, country=None, k=5):
+        """Uninstrumented resolve"""
+        query_norm = normalize_name(name)
+        return self._result(name, query_norm, country, self.rank([query_norm], country, k))
+
+    def _resolve_observed(self, name, country, k, observer):
+        """resolve with back-to-back stage timers reported to observer"""
+        clock = time.perf_counter
+        start = clock()
+        query_norm = normalize_name(name)
+        normalized = clock()
+        groups = self.candidate_groups([query_norm], country) if len(self) else []
+        blocked = clock()
+        ranked = self._rank_groups([query_norm], groups, country, k)
+        scored = clock()
+        result = self._result(name, query_norm, country, ranked)
+        end = clock()
+        observer({
+            "stages": {"normalize": normalized - start, "block": blocked - normalized,
+                       "score": scored - blocked, "build": end - scored},
+            "wall_seconds": end - start,
+            "candidates": sum(len(rows) for _, rows in groups),
+            "decision": result["decision"],
+        })
+        return result
+
+    def _result(self, name, query_norm, country, ranked):
+        """Build the resolve_company-shaped dict for the first ranked query"""
+        matches = []
+        for j, row_id in enumerate(ranked["rows"][0]):
+            if row_id < 0:
+                break
+            row = self.companies.iloc[row_id]
+            matches.append({
+                "name": row["name"],
+                "score": float(ranked["score"][0, j]),
+                "country": row.get("country"),
+                "lei": row.get("lei"),
+                "wikidata_qid": row.get("wikidata_qid"),
+                "aliases": [row.get(c) for c in ALIAS_COLUMNS if pd.notna(row.get(c))],
+                "explain": {
+                    "name_norm": row["name_norm"],
+                    "country_match": bool(country) and self.country[row_id] == str(country).upper(),
+                    "has_lei": bool(self.has_lei[row_id]),
+                    "score_primary": float(ranked["score_primary"][0, j]),
+                    "score_alias": float(ranked["score_alias"][0, j]),
+                },
+            })
+
+        result = {
+            "query": {"name": name, "name_norm": query_norm, "country": country,
+                      "address_hint": None},
+            "matches": matches,
+            "final": None,
+            "decision": "no_match",
+        }
+        if matches:
+            best = matches[0]["score"]
+            second = matches[1]["score"] if len(matches) > 1 else 0.0
+            if best >= HIGH_CONF_THRESHOLD and best - second >= HIGH_CONF_GAP:
+                result["final"] = matches[0]
+                result["decision"] = "auto_high_conf"
+            else:
+                result["decision"] = "needs_hint_or_llm"
+        return result
+
+    def match(self, name, country=None):
+        """Return the confident match for one name or None, like match_company"""
+        return self.resolve(name, country)["final"]
+
+
+@once
+def default_index():
+    """Build (once per process) the index over the bundled company data"""
+    return CompanyIndex()
@@ -0,0 +1,197 @@
+"""
+Opt-in per-stage instrumentation of resolve
+
+CompanyIndex.resolve (the per-call resolve_company path) reports, for every
+call made inside an ``instrument()`` block, how long it spent in each stage:
+
+- normalize: normalize_name on the query
+- block: choosing the candidate rows
+- score: RapidFuzz scoring and top-k selection
+- build: building the matches list and applying the decision rule
+
+plus the candidate count and decision. The stages are back-to-back intervals
+of one timer, so they add up to the call's wall time.
+
+When no instrument() block is active, resolve pays for one ContextVar lookup.
+The observer is stored in a ContextVar, so instrumentation follows the
+current thread and asyncio task.
+
+    with instrument() as recorder:
+        index.resolve("BHP Group", "AU")
+    print(recorder.to_prometheus())
+
+``entityidentity-bench stages [--prometheus PATH]`` prints the breakdown.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+
+STAGES = ("normalize", "block", "score", "build")
+# Histogram upper bounds in seconds (Prometheus "le" labels)
+SECONDS_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0)
+CANDIDATE_BUCKETS = (1, 10, 100, 1_000, 10_000, 50_000)
+
+_OBSERVER = contextvars.ContextVar("entityidentity_observer", default=None)
+
+
+def current_observer():
+    """The active observer callable, or None when instrumentation is off"""
+    return _OBSERVER.get()
+
+
+@contextmanager
+def instrument(observer=None):
+    """Report every resolve call in this block to observer
+
+    Args:
+        observer: Callable taking one event dict (see StageRecorder.__call__);
+            defaults to a new StageRecorder
+
+    Yields:
+        The observer
+    """
+    observer = observer if observer is not None else StageRecorder()
+    token = _OBSERVER.set(observer)
+    try:
+        yield observer
+    finally:
+        _OBSERVER.reset(token)
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def lines(self, metric, labels):
+        """Prometheus text lines for this histogram"""
+        prefix = f"{labels}," if labels else ""
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            out.append(f'{metric}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        out.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{metric}_sum{suffix} {self.total!r}")
+        out.append(f"{metric}_count{suffix} {self.count}")
+        return out
+
+
+class StageRecorder:
+    """Thread-safe observer aggregating stage timings into counters and histograms
+
+    Args:
+        keep_events: Also keep every raw event in ``events`` (for tests and
+            one-off profiling; off by default so memory stays bounded)
+    """
+
+    def __init__(self, keep_events=False):
+        self.keep_events = keep_events
+        self.events = []
+        self.calls = {}
+        self.stage_seconds = {stage: _Histogram(SECONDS_BUCKETS) for stage in STAGES}
+        self.wall_seconds = _Histogram(SECONDS_BUCKETS)
+        self.candidates = _Histogram(CANDIDATE_BUCKETS)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Record one event
+
+        Args:
+            event: Dict with 'stages' (stage name -> seconds), 'wall_seconds',
+                'candidates' and 'decision'
+        """
+        with self._lock:
+            if self.keep_events:
+                self.events.append(event)
+            self.calls[event["decision"]] = self.calls.get(event["decision"], 0) + 1
+            for stage, seconds in event["stages"].items():
+                self.stage_seconds[stage].observe(seconds)
+            self.wall_seconds.observe(event["wall_seconds"])
+            self.candidates.observe(event["candidates"])
+
+    def summary(self):
+        """Total calls and, per stage, total and mean seconds"""
+        with self._lock:
+            count = self.wall_seconds.count
+            return {
+                "calls": count,
+                "wall_seconds": self.wall_seconds.total,
+                "stages": {
+                    stage: {"seconds": h.total, "mean_ms": h.total / count * 1000 if count else 0.0}
+                    for stage, h in self.stage_seconds.items()
+                },
+                "mean_candidates": self.candidates.total / count if count else 0.0,
+            }
+
+    def to_prometheus(self, prefix="entityidentity_resolve"):
+        """Render the counters and histograms in Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_calls_total Resolve calls by decision",
+                f"# TYPE {prefix}_calls_total counter",
+            ]
+            for decision, count in sorted(self.calls.items()):
+                lines.append(f'{prefix}_calls_total{{decision="{decision}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_stage_seconds Time spent in each resolve stage",
+                f"# TYPE {prefix}_stage_seconds histogram",
+            ]
+            for stage, histogram in self.stage_seconds.items():
+                lines += histogram.lines(f"{prefix}_stage_seconds", f'stage="{stage}"')
+            lines += [
+                f"# HELP {prefix}_seconds Wall time of resolve calls",
+                f"# TYPE {prefix}_seconds histogram",
+            ]
+            lines += self.wall_seconds.lines(f"{prefix}_seconds", "")
+            lines += [
+                f"# HELP {prefix}_candidates Candidate rows scored per call",
+                f"# TYPE {prefix}_candidates histogram",
+            ]
+            lines += self.candidates.lines(f"{prefix}_candidates", "")
+            return "\n".join(lines) + "\n"
+
+
+def instrumentation_overhead(index, queries, repeats=5):
+    """Per-call cost of resolve with instrumentation off and on
+
+    Returns:
+        Dict with the best-of-repeats mean microseconds per call for the
+        uninstrumented internal path, resolve with no observer, and resolve
+        under instrument(), plus the recorder's stage summary
+    """
+    import time
+
+    def run(fn):
+        start = time.perf_counter()
+        for name, country in queries:
+            fn(name, country)
+        return (time.perf_counter() - start) / len(queries) * 1e6
+
+    recorder = StageRecorder()
+
+    def observed(name, country):
+        with instrument(recorder):
+            return index.resolve(name, country)
+
+    # Repeats are interleaved so that drift (caches, other load) hits every path alike
+    best = {"baseline_us": float("inf"), "off_us": float("inf"), "on_us": float("inf")}
+    for _ in range(repeats):
+        for key, fn in (("baseline_us", index._resolve), ("off_us", index.resolve),
+                        ("on_us", observed)):
+            best[key] = min(best[key], run(fn))
+    return dict(best, summary=recorder.summary())
@@ -0,0 +1,170 @@
+"""
+Multi-process resolution over one shared, read-only company index
+
+Fanning resolve_company out over a ProcessPoolExecutor makes every worker load
+list_companies() and rebuild its matching state. ParallelResolver instead
+builds the CompanyIndex once in the parent, writes its arrays to .npy files and
+has each worker memory-map them read-only: workers start without warm-up and
+share the index pages through the OS page cache.
+
+``entityidentity-bench parallel`` records throughput and worker RSS/PSS at
+1, 2, 4 and 8 workers.
+"""
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.batch import as_series, build_result, rank_names
+from tests.bench.corpus import synthetic_queries
+from tests.bench.index import CompanyIndex, default_index
+from tests.bench.timing import process_memory
+
+# Per-worker index, set by _init_worker
+_WORKER_INDEX = None
+
+
+def _init_worker(directory, data_path=None, blocking="prefix"):
+    """Open the shared index, or without one reload the company data and rebuild it
+
+    Args:
+        directory: Saved index to memory-map, or None
+        data_path: Parquet file of the companies to reload when not shared
+            (None reloads the bundled data the way entityidentity does)
+        blocking: Blocking mode of the rebuilt index
+    """
+    global _WORKER_INDEX
+    if directory:
+        _WORKER_INDEX = CompanyIndex.load(directory)
+    elif data_path:
+        _WORKER_INDEX = CompanyIndex(pd.read_parquet(data_path), blocking=blocking)
+    else:
+        _WORKER_INDEX = CompanyIndex()
+
+
+def _rank_chunk(names, countries):
+    """Rank one chunk of names in a worker and report the worker's memory"""
+    ranked = rank_names(pd.Series(names, dtype=object), pd.Series(countries, dtype=object),
+                        _WORKER_INDEX)
+    return ranked, os.getpid(), process_memory()
+
+
+class ParallelResolver:
+    """Resolve names across worker processes sharing one memory-mapped index
+
+    Args:
+        index: CompanyIndex to share (defaults to the bundled data)
+        workers: Number of worker processes
+        shared: If False, each worker reloads the company data itself instead of
+            mapping the shared index (the behaviour this class replaces); a
+            given index's companies are written to a Parquet file for them
+        start_method: multiprocessing start method; "spawn" keeps workers from
+            inheriting the parent's copy of the data
+
+    Use as a context manager, or call close() to stop the workers and remove
+    the shared files.
+    """
+
+    def __init__(self, index=None, workers=4, shared=True, start_method="spawn"):
+        self.index = index if index is not None else default_index()
+        self.workers = workers
+        self.directory = None
+        data_path = None
+        if shared:
+            self.directory = tempfile.mkdtemp(prefix="entityidentity-index-")
+            self.index.save(self.directory)
+        elif index is not None:
+            self.directory = tempfile.mkdtemp(prefix="entityidentity-index-")
+            data_path = os.path.join(self.directory, "companies.parquet")
+            self.index.companies.to_parquet(data_path, index=False)
+        self.worker_memory = {}
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(self.directory if shared else None, data_path, self.index.blocking),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the workers and delete the shared index files"""
+        self._pool.shutdown(wait=True)
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def warm_up(self):
+        """Start every worker and wait until each has opened its index"""
+        list(self._pool.map(_rank_chunk, [[]] * self.workers, [[]] * self.workers))
+
+    def match_companies(self, names, country=None, chunk_size=None):
+        """Parallel counterpart of tests.bench.batch.match_companies"""
+        names, countries = as_series(names, country)
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(names) / (self.workers * 4)))
+
+        starts = range(0, len(names), chunk_size)
+        futures = [
+            self._pool.submit(_rank_chunk, names.iloc[i:i + chunk_size].tolist(),
+                              countries.iloc[i:i + chunk_size].tolist())
+            for i in starts
+        ]
+        parts = []
+        for future in futures:
+            ranked, pid, memory = future.result()
+            parts.append(ranked)
+            self.worker_memory[pid] = memory
+
+        if parts:
+            best_row, best_score, second_score = (np.concatenate(p) for p in zip(*parts))
+        else:
+            best_row, best_score, second_score = rank_names(names, countries, self.index)
+        return build_result(names, countries, best_row, best_score, second_score,
+                            self.index.companies)
+
+
+def parallel_scaling(workers=(1, 2, 4, 8), n=100_000, shared=True, index=None, seed=0):
+    """Record throughput and worker memory at several worker counts
+
+    Returns:
+        List of dicts with workers, startup seconds, rows/sec and the summed and
+        per-worker RSS/PSS of the worker processes
+    """
+    index = index if index is not None else default_index()
+    queries = synthetic_queries(n, index.companies, seed=seed)
+    results = []
+    for count in workers:
+        start = time.perf_counter()
+        with ParallelResolver(index, workers=count, shared=shared) as resolver:
+            resolver.warm_up()
+            startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            resolver.match_companies(queries["name"], queries["country"])
+            seconds = time.perf_counter() - start
+            memory = list(resolver.worker_memory.values())
+
+        rss = sum(m["rss"] or 0 for m in memory)
+        pss = sum(m["pss"] or 0 for m in memory) if all(m["pss"] for m in memory) else None
+        results.append({
+            "workers": count,
+            "shared": shared,
+            "startup_seconds": startup,
+            "rows_per_sec": n / seconds,
+            "worker_processes": len(memory),
+            "rss_total_mb": rss / 2**20,
+            "rss_per_worker_mb": rss / 2**20 / max(1, len(memory)),
+            "pss_total_mb": pss / 2**20 if pss is not None else None,
+        })
+    return results
@@ -0,0 +1,307 @@
+"""
+Country-partitioned company database, loaded one country at a time
+
+entityidentity's load_companies() reads the whole table even when a
+deployment only ever resolves names in a few jurisdictions.
+write_partitions() stores the table as one Parquet file per country plus a
+JSON manifest, and PartitionedCompanies opens the directory without reading
+any of them:
+
+- Countries listed in ``countries`` (or in the ENTITYIDENTITY_COUNTRIES
+  environment variable, comma separated) are read when it is opened.
+- Any other country's partition is read the first time list_companies() or
+  resolve() asks for it.
+- Calls without a country, or with a country that has no companies, need the
+  whole table (resolve_company then falls back to all companies), so they
+  read every partition.
+
+resolve() and match() score a country-scoped query against an index built
+from that country's partition only. Candidate rows, scores and their order
+are the same as in the full index, because a country scope in CompanyIndex
+is exactly that country's rows in their original order. Rows keep their
+original position in a ``_row`` column, so list_companies() returns the
+same frame, with the same index, as entityidentity.list_companies().
+
+``entityidentity-bench partitions`` reports load time and RSS for several
+country sets.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.index import CompanyIndex
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+ROW_COLUMN = "_row"
+# Partition for rows without a country code
+NO_COUNTRY = "_none"
+COUNTRIES_ENV = "ENTITYIDENTITY_COUNTRIES"
+
+
+def partition_key(country):
+    """Return the partition a country code belongs to (NO_COUNTRY for missing codes)"""
+    if country is None or country != country or str(country) == "":
+        return NO_COUNTRY
+    return str(country).upper()
+
+
+def write_partitions(companies, directory):
+    """Write a list_companies()-shaped DataFrame as per-country Parquet partitions
+
+    Args:
+        companies: Company DataFrame (e.g. list_companies())
+        directory: Destination directory; created if missing
+
+    Returns:
+        Path of the directory
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    df = companies.reset_index(drop=True)
+    df.insert(0, ROW_COLUMN, np.arange(len(df), dtype=np.int64))
+
+    keys = np.array([partition_key(c) for c in df["country"]], dtype=object)
+    partitions = {}
+    for key in pd.unique(keys):
+        part = df[keys == key]
+        name = f"country={key}.parquet"
+        part.to_parquet(directory / name, index=False)
+        partitions[key] = {"file": name, "rows": len(part)}
+
+    manifest = {"format": FORMAT_VERSION, "rows": len(df), "columns": list(companies.columns),
+                "partitions": partitions}
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=1))
+    return directory
+
+
+def partition_database(directory, data_path=None):
+    """Partition a data file (defaults to the bundled companies data) into directory"""
+    from entityidentity.companies.companyidentity import load_companies
+
+    from tests.bench.features import bundled_data_file
+
+    data_path = data_path or bundled_data_file()
+    return write_partitions(load_companies.__wrapped__(str(data_path)), directory)
+
+
+def configured_countries():
+    """Return the country codes listed in ENTITYIDENTITY_COUNTRIES (may be empty)"""
+    value = os.environ.get(COUNTRIES_ENV, "")
+    return [code.strip().upper() for code in value.split(",") if code.strip()]
+
+
+class PartitionedCompanies:
+    """Company table read one country partition at a time
+
+    Safe to share between threads: partitions and per-country indexes are
+    read and built under a lock the first time they are needed.
+
+    Args:
+        directory: Directory written by write_partitions()
+        countries: Country codes to read up front; defaults to
+            configured_countries(). Pass "all" to read every partition.
+        blocking: Blocking mode of the per-country indexes
+    """
+
+    def __init__(self, directory, countries=None, blocking="prefix"):
+        self.directory = Path(directory)
+        manifest = json.loads((self.directory / MANIFEST).read_text())
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{self.directory} is not a version {FORMAT_VERSION} partition "
+                             f"directory")
+        self.columns = manifest["columns"]
+        self.partitions = manifest["partitions"]
+        self.blocking = blocking
+        self._frames = {}
+        self._indexes = {}
+        self._lock = threading.RLock()
+
+        self.load(configured_countries() if countries is None else countries)
+
+    def __len__(self):
+        return sum(part["rows"] for part in self.partitions.values())
+
+    @property
+    def countries(self):
+        """Country codes that have a partition"""
+        return sorted(key for key in self.partitions if key != NO_COUNTRY)
+
+    @property
+    def loaded(self):
+        """Partitions read so far"""
+        return sorted(self._frames)
+
+    def load(self, countries):
+        """Read the partitions of several countries (or "all") now rather than on first use"""
+        keys = list(self.partitions) if countries == "all" else \
+            [partition_key(country) for country in countries]
+        for key in keys:
+            if key in self.partitions:
+                self._read(key)
+
+    def partition(self, country):
+        """Return one country's rows (read on first use); None if it has no partition"""
+        key = partition_key(country)
+        return self._read(key) if key in self.partitions else None
+
+    def _read(self, key):
+        """Return the rows of one partition, reading its file the first time"""
+        frame = self._frames.get(key)
+        if frame is not None:
+            return frame
+        with self._lock:
+            if key not in self._frames:
+                path = self.directory / self.partitions[key]["file"]
+                self._frames[key] = pd.read_parquet(path)
+            return self._frames[key]
+
+    def to_pandas(self):
+        """Read every partition and return the whole table, like list_companies()"""
+        frames = [self._read(key) for key in self.partitions]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        df = pd.concat(frames).sort_values(ROW_COLUMN, kind="stable")
+        df.index = pd.Index(df.pop(ROW_COLUMN).to_numpy())
+        return df
+
+    def _empty(self):
+        """Zero-row table with the stored column types, without reading any rows"""
+        if not self.partitions:
+            return pd.DataFrame(columns=self.columns)
+        smallest = min(self.partitions.values(), key=lambda part: part["rows"])
+        df = pd.read_parquet(self.directory / smallest["file"], filters=[(ROW_COLUMN, "<", 0)])
+        return df.set_index(pd.Index(df.pop(ROW_COLUMN).to_numpy()))
+
+    def list_companies(self, country=None, search=None, limit=None):
+        """Same filters and result as entityidentity.list_companies
+
+        With a country, only that country's partition is read.
+        """
+        if country:
+            part = self.partition(country.upper())
+            if part is None:
+                return self._empty()
+            df = part[part["country"] == country.upper()]
+            df = df.set_index(pd.Index(df[ROW_COLUMN].to_numpy())).drop(columns=ROW_COLUMN)
+        else:
+            df = self.to_pandas()
+
+        if search:
+            search_lower = search.lower()
+            mask = (df["name"].str.lower().str.contains(search_lower, na=False)
+                    | df["name_norm"].str.contains(search_lower, na=False))
+            df = df[mask]
+        if limit:
+            df = df.head(limit)
+        return df
+
+    def index(self, country=None):
+        """Return the CompanyIndex that resolves queries for a country
+
+        A country with a partition gets an index over its rows only; None or
+        an unknown country gets the index over the whole table.
+        """
+        key = partition_key(country)
+        if key == NO_COUNTRY or key not in self.partitions:
+            key = None
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        with self._lock:
+            if key not in self._indexes:
+                if key is None:
+                    companies = self.to_pandas()
+                else:
+                    companies = self._read(key).drop(columns=ROW_COLUMN)
+                self._indexes[key] = CompanyIndex(companies, blocking=self.blocking)
+            return self._indexes[key]
+
+    def resolve(self, name, country=None, k=5):
+        """Resolve one name like CompanyIndex.resolve, reading only what the query needs"""
+        return self.index(country).resolve(name, country, k)
+
+    def match(self, name, country=None):
+        """Return the confident match for one name or None, like match_company"""
+        return self.resolve(name, country)["final"]
+
+
+# Executed in a fresh interpreter so RSS reflects only the chosen partitions
+_PARTITION_PROBE = r"""
+import json, sys, time
+directory, countries, query_country = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3]
+from tests.bench.timing import peak_rss, process_memory, reset_peak_rss
+import pandas, pyarrow.parquet
+from tests.bench.partitions import PartitionedCompanies
+reset_peak_rss()
+before = process_memory()["rss"]
+start = time.perf_counter()
+table = PartitionedCompanies(directory, countries=countries)
+loaded = time.perf_counter()
+result = table.resolve("Borvel Mining Holdings", query_country or None)
+end = time.perf_counter()
+after = process_memory()["rss"]
+print(json.dumps({"load_seconds": loaded - start, "first_query_seconds": end - loaded,
+                  "rows_loaded": sum(len(table._read(key)) for key in table.loaded),
+                  "partitions": table.loaded, "decision": result["decision"],
+                  "rss_delta": after - before, "peak_rss_delta": max(0, peak_rss() - before)}))
+"""
+
+
+def measure_partitions(directory, countries, query_country=None):
+    """Load the chosen partitions and run one query in a fresh subprocess
+
+    Args:
+        directory: Directory written by write_partitions()
+        countries: Country codes to read up front, or "all"
+        query_country: Country of the query (defaults to the first chosen one)
+
+    Returns:
+        Dict with load_seconds, first_query_seconds, rows_loaded, the
+        partitions read, and RSS growth and peak RSS growth (bytes) over the
+        interpreter with pandas/pyarrow imported
+    """
+    if query_country is None and countries != "all" and countries:
+        query_country = countries[0]
+    proc = subprocess.run(
+        [sys.executable, "-c", _PARTITION_PROBE, str(directory), json.dumps(countries),
+         query_country or ""],
+        capture_output=True, text=True, cwd=str(Path(__file__).resolve().parents[2]),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Partition probe failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def partition_benchmark(size=500_000, country_sets=(("NL",), ("NL", "CH", "IN"), "all"),
+                        directory=None, seed=0):
+    """Load time and memory of a synthetic partitioned table for several country sets
+
+    Returns:
+        List of dicts, one per country set, with the measure_partitions()
+        fields plus the countries chosen and the write time
+    """
+    import tempfile
+
+    from tests.bench.corpus import synthetic_companies
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(directory or tmp) / f"partitions-{size}"
+        companies = synthetic_companies(size, seed=seed)
+        start = time.perf_counter()
+        write_partitions(companies, directory)
+        write_seconds = time.perf_counter() - start
+        results = []
+        for countries in country_sets:
+            countries = countries if countries == "all" else list(countries)
+            query_country = None if countries == "all" else countries[0]
+            r = measure_partitions(directory, countries, query_country)
+            results.append({"countries": countries, "write_seconds": write_seconds, **r})
+        return results
@@ -0,0 +1,226 @@
+"""
+Early termination and score-cutoff pruning when only the top matches matter
+
+CompanyIndex scores every blocked candidate of a query and sorts them all,
+as entityidentity's score_candidates does, although resolve() keeps five
+matches, example_full_resolution shows three and match_company needs only
+the best two (the winner and the gap to the runner-up).
+score_candidates() keeps only what can still reach the top k:
+
+- Candidates are scored in chunks of growing size, in row order, and a
+  bounded heap keeps the k best scores so far.
+- Once the heap is full, a candidate must beat its weakest entry to get in.
+  Boosts add at most +1 (LEI) and +2 (country), so later chunks are scored
+  with a RapidFuzz score_cutoff that much lower. RapidFuzz skips work for
+  choices that cannot reach the cutoff, and returns 0 for them.
+- A name or alias equal to the normalized query scores 100, the maximum.
+  Rows after the k-th such exact hit cannot outrank it (ties keep row
+  order), so they are never scored, and scoring stops once the heap holds k
+  scores of 100.
+- An optional min_score is applied the same way from the first chunk.
+
+The top k rows, their order and their scores are exactly those of
+exhaustive scoring. The reported primary and alias similarities are
+recomputed without a cutoff for those k rows only. Each query is scored on
+its own, so this suits per-query calls rather than large batches.
+
+match() asks for two matches with min_score=MATCH_MIN_SCORE. A runner-up
+below that score is always at least HIGH_CONF_GAP behind an acceptable best
+match, so dropping it never changes the answer.
+
+``entityidentity-bench pruning`` compares per-query latency with exhaustive
+scoring on queries with many candidates.
+"""
+import heapq
+
+import numpy as np
+
+from entityidentity import normalize_name
+from tests.bench.index import HIGH_CONF_GAP, HIGH_CONF_THRESHOLD, CompanyIndex
+
+# Below this a candidate cannot change match_company's answer
+MATCH_MIN_SCORE = HIGH_CONF_THRESHOLD - HIGH_CONF_GAP
+FIRST_CHUNK = 1024
+MAX_CHUNK = 16_384
+
+
+def _exact_hits(index, query_norm, rows):
+    """Mask of rows whose name_norm or a normalized alias equals query_norm"""
+    exact = index.name_norm[rows] == query_norm
+    for norms, present in zip(index.alias_norm, index.alias_present):
+        exact |= present[rows] & (norms[rows] == query_norm)
+    return exact
+
+
+def _max_boost(index, rows, country):
+    """Largest LEI + country boost any of rows can get"""
+    boost = index.has_lei[rows].astype(np.float64)
+    if country:
+        boost = boost + 2.0 * (index.country[rows] == str(country).upper())
+    return float(boost.max()) if len(boost) else 0.0
+
+
+def score_candidates(index, query_norm, rows, country=None, top_k=5, min_score=None):
+    """Top-k candidates of one normalized query, scoring as few rows as possible
+
+    Args:
+        index: CompanyIndex holding the candidate arrays
+        query_norm: Normalized query
+        rows: Blocked candidate rows, ascending
+        country: Query country (for the boost)
+        top_k: Matches to keep
+        min_score: Optional lowest score to keep
+
+    Returns:
+        Dict with 'rows', 'score', 'score_primary' and 'score_alias' arrays
+        of the best top_k candidates, best first, equal to the first top_k of
+        exhaustive scoring with scores >= min_score; and 'scored', the number
+        of candidates scored
+    """
+    rows = np.asarray(rows)
+    if query_norm and top_k:
+        exact = np.flatnonzero(_exact_hits(index, query_norm, rows))
+        if len(exact) >= top_k:
+            rows = rows[:exact[top_k - 1] + 1]
+
+    # (score, -position): heap[0] is the weakest entry, the later row on ties
+    heap = []
+    start, size, scored = 0, FIRST_CHUNK, 0
+    while start < len(rows) and top_k:
+        full = len(heap) == top_k
+        threshold = heap[0][0] if full else min_score
+        if full and threshold >= 100.0:
+            break
+        chunk = rows[start:start + size]
+        cutoff = None
+        if threshold is not None:
+            cutoff = threshold - _max_boost(index, chunk, country)
+            cutoff = cutoff if cutoff > 0 else None
+        score = index.score([query_norm], chunk, country, score_cutoff=cutoff)[0][0]
+        scored += len(chunk)
+
+        candidates = np.arange(len(chunk)) if threshold is None else \
+            np.flatnonzero(score >= threshold)
+        candidates = candidates[np.argsort(-score[candidates], kind="stable")[:top_k]]
+        for j in candidates:
+            item = (score[j], -(start + j))
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        start += size
+        size = min(size * 2, MAX_CHUNK)
+
+    best = rows[[-position for _, position in sorted(heap, reverse=True)]]
+    score, primary, alias = index.score([query_norm], best, country)
+    return {"rows": best, "score": score[0], "score_primary": primary[0],
+            "score_alias": alias[0], "scored": scored}
+
+
+class PrunedIndex(CompanyIndex):
+    """CompanyIndex that ranks each query with score_candidates()
+
+    resolve() returns the same result as CompanyIndex.resolve() for any k;
+    with min_score, matches scoring below it are left out.
+    """
+
+    def rank(self, query_norms, country=None, k=5, min_score=None):
+        """Block and keep the top k (scoring at least min_score) of each normalized query"""
+        query_norms = list(query_norms)
+        groups = self.candidate_groups(query_norms, country) if len(self) else []
+        return self._rank_groups(query_norms, groups, country, k, min_score)
+
+    def _rank_groups(self, query_norms, groups, country, k, min_score=None):
+        """Rank every query of already blocked (positions, rows) groups with pruning"""
+        n = len(query_norms)
+        out = {
+            "rows": np.full((n, k), -1, dtype=np.int64),
+            "score": np.full((n, k), np.nan),
+            "score_primary": np.full((n, k), np.nan),
+            "score_alias": np.full((n, k), np.nan),
+        }
+        for positions, rows in groups:
+            if len(rows) == 0:
+                continue
+            for pos in positions:
+                top = score_candidates(self, query_norms[pos], rows, country, k, min_score)
+                found = len(top["rows"])
+                for name in out:
+                    out[name][pos, :found] = top[name]
+        return out
+
+    def resolve(self, name, country=None, k=5, min_score=None):
+        """Resolve one name, keeping k matches that score at least min_score"""
+        if min_score is None:
+            return super().resolve(name, country, k)
+        query_norm = normalize_name(name)
+        return self._result(name, query_norm, country,
+                            self.rank([query_norm], country, k, min_score))
+
+    def match(self, name, country=None):
+        """Return the confident match for one name or None, like match_company"""
+        return self.resolve(name, country, k=2, min_score=MATCH_MIN_SCORE)["final"]
+
+
+def many_candidate_queries(index, n_queries=100, min_candidates=1_000, seed=0):
+    """Synthetic (name, country) queries whose blocked candidate sets are largest
+
+    Returns:
+        List of (name, country, candidate count), most candidates first, of
+        queries with at least min_candidates candidates
+    """
+    import pandas as pd
+
+    from tests.bench.corpus import synthetic_queries
+
+    frame = synthetic_queries(n_queries * 10, index.companies, seed=seed)
+    sized = []
+    for name, country in frame.itertuples(index=False):
+        country = None if pd.isna(country) else country
+        count = len(index.block(normalize_name(name), country))
+        if count >= min_candidates:
+            sized.append((name, country, count))
+    sized.sort(key=lambda q: -q[2])
+    return sized[:n_queries]
+
+
+def pruning_benchmark(size=200_000, n_queries=100, min_candidates=1_000, seed=0):
+    """Per-query latency of exhaustive and pruned scoring on queries with many candidates
+
+    Returns:
+        Dict with size, query count, mean candidates, mismatches against
+        exhaustive results, and a latency summary (tests.bench.timing) for
+        resolve with k=5, top-3 resolve and match, each exhaustive and pruned
+    """
+    from tests.bench.corpus import synthetic_companies
+    from tests.bench.timing import replay, summarize
+
+    companies = synthetic_companies(size, seed=seed)
+    exhaustive = CompanyIndex(companies)
+    pruned = PrunedIndex(companies)
+    sized = many_candidate_queries(exhaustive, n_queries, min_candidates, seed=seed + 1)
+    queries = [(name, country) for name, country, _ in sized]
+
+    mismatches = 0
+    for name, country in queries:
+        for k in (1, 3, 5):
+            mismatches += pruned.resolve(name, country, k) != exhaustive.resolve(name, country, k)
+        mismatches += pruned.match(name, country) != exhaustive.match(name, country)
+
+    calls = {
+        "resolve_k5": (exhaustive.resolve, pruned.resolve),
+        "resolve_k3": (lambda name, country: exhaustive.resolve(name, country, 3),
+                       lambda name, country: pruned.resolve(name, country, 3)),
+        "match": (exhaustive.match, pruned.match),
+    }
+    latency = {}
+    for label, (full_call, pruned_call) in calls.items():
+        latency[label] = {"exhaustive": summarize(replay(full_call, queries)[0]),
+                          "pruned": summarize(replay(pruned_call, queries)[0])}
+    return {
+        "size": size,
+        "queries": len(queries),
+        "mean_candidates": float(np.mean([count for _, _, count in sized])) if sized else 0.0,
+        "mismatches": mismatches,
+        "latency": latency,
+    }
@@ -0,0 +1,394 @@
+"""
+Compact record store and lightweight result views
+
+list_companies() keeps every company as a DataFrame row, and each
+resolve_company match copies that row into a dict of separate Python strings.
+With a large table held in many worker processes, both costs are paid in
+every process.
+
+RecordStore packs the columns a match needs into flat arrays:
+
+- text columns (name, name_norm, wikidata_qid, alias1..alias5): one UTF-8
+  buffer per column plus an offsets array; strings are decoded on access
+- country: codes into a tuple of interned strings (int16 per company)
+- lei: fixed-width 20-byte ASCII (``S20``); a column holding anything other
+  than 20-character ASCII LEIs is stored as text instead
+
+CompanyRecord, Match and Resolution are ``__slots__`` views over a store row.
+They behave like the dicts resolve_company returns for key lookups and only
+build real dicts when ``to_dict()`` is called.
+
+``entityidentity-bench records`` reports bytes per company against the
+list_companies() DataFrame.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.index import ALIAS_COLUMNS, HIGH_CONF_GAP, HIGH_CONF_THRESHOLD, CompanyIndex
+
+TEXT_COLUMNS = ("name", "name_norm", "wikidata_qid") + tuple(ALIAS_COLUMNS)
+LEI_WIDTH = 20
+
+
+class _TextColumn:
+    """Strings as one UTF-8 buffer with offsets; missing values are None"""
+
+    def __init__(self, values):
+        present = pd.notna(values)
+        encoded = [str(v).encode("utf-8") if p else b"" for v, p in zip(values, present)]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        dtype = np.uint32 if offsets[-1] < 2 ** 32 else np.uint64
+        self.buffer = b"".join(encoded)
+        self.offsets = offsets.astype(dtype)
+        # None when every value is present, so full columns cost nothing extra
+        self.present = None if present.all() else np.asarray(present, dtype=bool)
+
+    def __getitem__(self, row):
+        if self.present is not None and not self.present[row]:
+            return None
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes + (
+            self.present.nbytes if self.present is not None else 0)
+
+
+class _InternedColumn:
+    """Small-vocabulary strings as int16 codes into a tuple of interned values"""
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        self.values = tuple(sys.intern(str(v)) for v in uniques)
+        self.codes = codes.astype(np.int16)
+
+    def __getitem__(self, row):
+        code = self.codes[row]
+        return self.values[code] if code >= 0 else None
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(sys.getsizeof(v) for v in self.values)
+
+
+class _LeiColumn:
+    """20-character LEIs as fixed-width ASCII bytes; missing values are empty"""
+
+    def __init__(self, values):
+        self.codes = np.array([v.encode("ascii") if v else b"" for v in values],
+                              dtype=f"S{LEI_WIDTH}")
+
+    @staticmethod
+    def fits(values):
+        """True when every present value is a 20-character ASCII string"""
+        return all(isinstance(v, str) and len(v) == LEI_WIDTH and v.isascii()
+                   for v in values if v is not None)
+
+    def __getitem__(self, row):
+        code = self.codes[row]
+        return code.decode("ascii") if code else None
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+
+def _values(companies, col):
+    """Column as an object array with None for missing values"""
+    if col not in companies:
+        return np.full(len(companies), None, dtype=object)
+    values = companies[col].to_numpy(dtype=object)
+    return np.where(pd.notna(values), values, None)
+
+
+class RecordStore:
+    """Array-backed company records built from a list_companies()-shaped table
+
+    Args:
+        companies: DataFrame shaped like list_companies(); its row positions
+            are the store's rows
+    """
+
+    def __init__(self, companies):
+        self._size = len(companies)
+        self._text = {col: _TextColumn(_values(companies, col)) for col in TEXT_COLUMNS}
+        self._country = _InternedColumn(_values(companies, "country"))
+        lei = _values(companies, "lei")
+        self._lei = _LeiColumn(lei) if _LeiColumn.fits(lei) else _TextColumn(lei)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        if not -self._size <= row < self._size:
+            raise IndexError(row)
+        return CompanyRecord(self, row % self._size)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the store's buffers and arrays"""
+        columns = list(self._text.values()) + [self._country, self._lei]
+        return sum(column.nbytes for column in columns)
+
+    def text(self, col, row):
+        return self._text[col][row]
+
+    def country(self, row):
+        return self._country[row]
+
+    def lei(self, row):
+        return self._lei[row]
+
+    def aliases(self, row):
+        return [alias for alias in (self._text[col][row] for col in ALIAS_COLUMNS)
+                if alias is not None]
+
+
+class CompanyRecord:
+    """Read-only view of one company in a RecordStore"""
+
+    __slots__ = ("_store", "row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self.row = row
+
+    @property
+    def name(self):
+        return self._store.text("name", self.row)
+
+    @property
+    def name_norm(self):
+        return self._store.text("name_norm", self.row)
+
+    @property
+    def country(self):
+        return self._store.country(self.row)
+
+    @property
+    def lei(self):
+        return self._store.lei(self.row)
+
+    @property
+    def wikidata_qid(self):
+        return self._store.text("wikidata_qid", self.row)
+
+    @property
+    def aliases(self):
+        return self._store.aliases(self.row)
+
+    def to_dict(self):
+        return {"name": self.name, "name_norm": self.name_norm, "country": self.country,
+                "lei": self.lei, "wikidata_qid": self.wikidata_qid, "aliases": self.aliases}
+
+    def __eq__(self, other):
+        if not isinstance(other, CompanyRecord):
+            return NotImplemented
+        return self._store is other._store and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self._store), self.row))
+
+    def __repr__(self):
+        return f"CompanyRecord({self.name!r}, country={self.country!r}, lei={self.lei!r})"
+
+
+class Match:
+    """One ranked candidate: a CompanyRecord plus its scores
+
+    ``match[key]`` accepts the keys of a resolve_company match dict.
+    """
+
+    __slots__ = ("record", "score", "score_primary", "score_alias", "country_match", "has_lei")
+    _KEYS = ("name", "score", "country", "lei", "wikidata_qid", "aliases", "explain")
+
+    def __init__(self, record, score, score_primary, score_alias, country_match, has_lei):
+        self.record = record
+        self.score = score
+        self.score_primary = score_primary
+        self.score_alias = score_alias
+        self.country_match = country_match
+        self.has_lei = has_lei
+
+    def explain(self):
+        return {"name_norm": self.record.name_norm, "country_match": self.country_match,
+                "has_lei": self.has_lei, "score_primary": self.score_primary,
+                "score_alias": self.score_alias}
+
+    def __getitem__(self, key):
+        if key == "score":
+            return self.score
+        if key == "explain":
+            return self.explain()
+        if key in self._KEYS:
+            return getattr(self.record, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._KEYS else default
+
+    def to_dict(self):
+        """The resolve_company match dict for this candidate"""
+        return {key: self[key] for key in self._KEYS}
+
+    def __repr__(self):
+        return f"Match({self.record.name!r}, score={self.score:.1f})"
+
+
+class Resolution:
+    """resolve_company result whose matches are Match views
+
+    ``result[key]`` accepts 'query', 'matches', 'final' and 'decision'.
+    """
+
+    __slots__ = ("name", "name_norm", "country", "matches", "final", "decision")
+    _KEYS = ("query", "matches", "final", "decision")
+
+    def __init__(self, name, name_norm, country, matches, final, decision):
+        self.name = name
+        self.name_norm = name_norm
+        self.country = country
+        self.matches = matches
+        self.final = final
+        self.decision = decision
+
+    def query(self):
+        return {"name": self.name, "name_norm": self.name_norm, "country": self.country,
+                "address_hint": None}
+
+    def __getitem__(self, key):
+        if key == "query":
+            return self.query()
+        if key in self._KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._KEYS else default
+
+    def to_dict(self):
+        """The resolve_company dict, with every match converted too"""
+        final = self.final.to_dict() if self.final is not None else None
+        return {"query": self.query(), "matches": [m.to_dict() for m in self.matches],
+                "final": final, "decision": self.decision}
+
+    def __repr__(self):
+        return f"Resolution({self.name!r}, decision={self.decision!r})"
+
+
+class CompactIndex(CompanyIndex):
+    """CompanyIndex whose results are views over a RecordStore
+
+    The company DataFrame is dropped once the store is built, so only the
+    blocking/scoring arrays and the store stay in memory. resolve() returns a
+    Resolution; ``resolve(...).to_dict()`` equals CompanyIndex.resolve(...)
+    with missing values as None.
+    """
+
+    def __init__(self, companies=None, blocking="prefix"):
+        super().__init__(companies, blocking)
+        self.records = RecordStore(self.companies)
+        self.companies = None
+
+    def _result(self, name, query_norm, country, ranked):
+        code = str(country).upper() if country else None
+        matches = []
+        for j, row_id in enumerate(ranked["rows"][0]):
+            if row_id < 0:
+                break
+            row_id = int(row_id)
+            matches.append(Match(
+                CompanyRecord(self.records, row_id),
+                float(ranked["score"][0, j]),
+                float(ranked["score_primary"][0, j]),
+                float(ranked["score_alias"][0, j]),
+                bool(country) and self.country[row_id] == code,
+                bool(self.has_lei[row_id]),
+            ))
+        final, decision = None, "no_match"
+        if matches:
+            best = matches[0].score
+            second = matches[1].score if len(matches) > 1 else 0.0
+            if best >= HIGH_CONF_THRESHOLD and best - second >= HIGH_CONF_GAP:
+                final, decision = matches[0], "auto_high_conf"
+            else:
+                decision = "needs_hint_or_llm"
+        return Resolution(name, query_norm, country, tuple(matches), final, decision)
+
+
+def _retained_bytes(build):
+    """Bytes still allocated (per tracemalloc) by the object build() returns"""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del obj
+    return current
+
+
+def record_memory(sizes, dict_sample=20_000, n_queries=500, seed=0):
+    """Bytes per company for the DataFrame, dict records and RecordStore
+
+    For each size a synthetic table goes through entityidentity's
+    load_companies (so it has list_companies()'s columns and dtypes), then:
+
+    - frame: ``list_companies()`` DataFrame, ``memory_usage(deep=True)``
+    - dicts: the same rows as one dict per company (measured on up to
+      dict_sample rows with tracemalloc)
+    - store: RecordStore.nbytes
+
+    and n_queries resolve results are kept alive from CompanyIndex (dicts)
+    and CompactIndex (views) to compare bytes per result.
+
+    Returns:
+        List of dicts with size, build seconds and the byte counts
+    """
+    import tempfile
+    from pathlib import Path
+
+    from entityidentity.companies.companyidentity import load_companies
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="entityidentity-records-") as directory:
+        for n in sizes:
+            path = str(Path(directory) / f"companies_{n}.parquet")
+            synthetic_companies(n, seed=seed).to_parquet(path)
+            companies = load_companies(path).reset_index(drop=True)
+
+            frame_bytes = int(companies.memory_usage(deep=True).sum())
+            sample = companies.head(dict_sample)
+            dict_bytes = _retained_bytes(lambda: sample.to_dict("records"))
+            start = time.perf_counter()
+            store = RecordStore(companies)
+            build_seconds = time.perf_counter() - start
+
+            queries = [(name, None if pd.isna(country) else country) for name, country in
+                       synthetic_queries(n_queries, companies, seed=seed).itertuples(index=False)]
+            plain, compact = CompanyIndex(companies), CompactIndex(companies)
+            for index in (plain, compact):  # build the blocking keys outside the measurement
+                for name, country in queries:
+                    index.resolve(name, country)
+            dict_results = _retained_bytes(lambda: [plain.resolve(q, c) for q, c in queries])
+            view_results = _retained_bytes(lambda: [compact.resolve(q, c) for q, c in queries])
+            results.append({
+                "size": n,
+                "build_seconds": build_seconds,
+                "frame_bytes_per_company": frame_bytes / n,
+                "dict_bytes_per_company": dict_bytes / len(sample),
+                "store_bytes_per_company": store.nbytes / n,
+                "dict_bytes_per_result": dict_results / len(queries),
+                "view_bytes_per_result": view_results / len(queries),
+            })
+            load_companies.cache_clear()
+    return results
@@ -0,0 +1,669 @@
+#!/usr/bin/env python
+"""
+CLI runner for entityidentity benchmarks
+"""
+import argparse
+import json
+import sys
+
+from tests import LATENCY_BUDGET_MS
+from tests.bench.corpus import QUERY_CORPUS
+from tests.bench.timing import measure_latency
+
+
+def _target(name):
+    """Return the entityidentity function to benchmark"""
+    import entityidentity
+
+    return {"match": entityidentity.match_company, "resolve": entityidentity.resolve_company}[name]
+
+
+def print_summary(label, summary):
+    """Print one latency summary as a table row"""
+    errors = sum(summary["errors"].values())
+    print(
+        f"  {label:<16} n={summary['count']:<6} "
+        f"p50={summary['p50_ms']:8.2f}ms p95={summary['p95_ms']:8.2f}ms "
+        f"p99={summary['p99_ms']:8.2f}ms qps={summary['qps']:10.1f} errors={errors}"
+    )
+
+
+def cmd_latency(args):
+    """Replay the fixed corpus and report latency percentiles"""
+    report = measure_latency(_target(args.target), QUERY_CORPUS, repeats=args.repeats)
+    report["target"] = args.target
+    report["budget_ms"] = LATENCY_BUDGET_MS
+
+    print(f"Target: {args.target}_company   corpus: {len(QUERY_CORPUS)} queries")
+    cold_note = f" ({report['cold_error']})" if report["cold_error"] else ""
+    print(f"  {'cold':<16} first call {report['cold_ms']:.2f}ms{cold_note}")
+    print_summary("warm+country", report["with_country"])
+    print_summary("warm-country", report["without_country"])
+    print_summary("warm (all)", report["warm"])
+
+    errors = sum(report["warm"]["errors"].values())
+    within_budget = not errors and report["warm"]["p50_ms"] < LATENCY_BUDGET_MS
+    print()
+    if errors:
+        print(f"❌ {errors} of {report['warm']['count']} calls raised; "
+              f"latency not checked against the {LATENCY_BUDGET_MS}ms budget")
+    elif within_budget:
+        print(f"✅ p50 within {LATENCY_BUDGET_MS}ms budget")
+    else:
+        print(f"❌ p50 exceeds {LATENCY_BUDGET_MS}ms budget")
+    return report, within_budget
+
+
+def cmd_batch(args):
+    """Compare match_companies throughput with a per-call match loop"""
+    from tests.bench.batch import batch_throughput, compare_with_per_call
+    from tests.bench.corpus import synthetic_queries
+
+    mismatches, fallbacks = compare_with_per_call(synthetic_queries(args.check, seed=1))
+    print(f"Batch vs per-call check: {args.check} queries, {len(mismatches)} mismatches, "
+          f"{fallbacks} compared with CompanyIndex.match because match_company raised")
+
+    results = batch_throughput(args.sizes, per_call_sample=args.per_call_sample)
+    for r in results:
+        print(
+            f"  n={r['size']:<9} batch={r['batch_rows_per_sec']:12.0f} rows/s "
+            f"per-call={r['per_call_rows_per_sec']:9.0f} rows/s speedup={r['speedup']:8.1f}x"
+        )
+    return {"mismatches": mismatches, "fallbacks": fallbacks, "throughput": results}, \
+        not mismatches
+
+
+def cmd_dataframe(args):
+    """Compare resolve_dataframe with per-row DataFrame.apply on duplicated names"""
+    from tests.bench.batch import dataframe_benchmark
+
+    r = dataframe_benchmark(args.rows, args.unique, apply_sample=args.apply_sample)
+    print(f"{r['rows']} rows, {r['distinct_pairs']} distinct (name, country) pairs")
+    print(f"  resolve_dataframe: {r['frame_seconds']:8.2f}s ({r['frame_rows_per_sec']:.0f} rows/s)")
+    print(f"  apply (estimated): {r['apply_seconds_estimate']:8.2f}s "
+          f"({r['apply_rows_per_sec']:.0f} rows/s)  speedup={r['speedup']:.0f}x")
+    print(f"  mismatches on {args.apply_sample} sampled rows: {r['mismatches']}")
+    return r, r["mismatches"] == 0
+
+
+def cmd_parallel(args):
+    """Record throughput and worker memory at several worker counts"""
+    from tests.bench.parallel import parallel_scaling
+
+    modes = {"shared": [True], "reload": [False], "both": [True, False]}[args.mode]
+    results = []
+    for shared in modes:
+        print(f"Mode: {'shared memory-mapped index' if shared else 'reload per worker'}")
+        for r in parallel_scaling(args.workers, n=args.size, shared=shared):
+            pss = f"{r['pss_total_mb']:8.1f}MB" if r["pss_total_mb"] is not None else "     n/a"
+            print(
+                f"  workers={r['workers']:<3} startup={r['startup_seconds']:6.2f}s "
+                f"rows/s={r['rows_per_sec']:10.0f} rss/worker={r['rss_per_worker_mb']:7.1f}MB "
+                f"pss total={pss}"
+            )
+            results.append(r)
+    return {"scaling": results}, True
+
+
+def cmd_columnar(args):
+    """Compare the memory-mapped columnar loader with entityidentity's pandas loader"""
+    import tempfile
+    from pathlib import Path
+
+    from tests.bench.columnar import measure_loader, write_columnar
+    from tests.bench.corpus import synthetic_companies
+
+    with tempfile.TemporaryDirectory() as directory:
+        companies = synthetic_companies(args.size)
+        parquet_path = Path(directory) / "companies.parquet"
+        companies.to_parquet(parquet_path)
+        arrow_path = write_columnar(companies, Path(directory) / "companies.arrow")
+
+        results = {}
+        for kind, path in [("pandas", parquet_path), ("columnar", arrow_path)]:
+            r = measure_loader(kind, path, country=args.country, limit=args.limit)
+            results[kind] = r
+            print(
+                f"  {kind:<9} open={r['open_seconds'] * 1000:9.1f}ms "
+                f"query={r['query_seconds'] * 1000:8.1f}ms "
+                f"rss +{r['rss_delta'] / 2**20:7.1f}MB peak +{r['peak_rss_delta'] / 2**20:7.1f}MB"
+            )
+    return results, True
+
+
+def cmd_partitions(args):
+    """Load time and memory of a country-partitioned table for chosen country sets"""
+    from tests.bench.partitions import partition_benchmark
+
+    country_sets = [c.split(",") if c != "all" else c for c in args.countries]
+    results = partition_benchmark(args.size, country_sets)
+    for r in results:
+        print(
+            f"  {','.join(r['partitions']) if r['countries'] != 'all' else 'all':<24} "
+            f"rows={r['rows_loaded']:>9} load={r['load_seconds'] * 1000:8.1f}ms "
+            f"first query={r['first_query_seconds'] * 1000:8.1f}ms "
+            f"rss +{r['rss_delta'] / 2**20:7.1f}MB"
+        )
+    return results, True
+
+
+def cmd_cache(args):
+    """Replay a Zipf-distributed stream with and without the result cache"""
+    from tests.bench.cache import cache_benchmark
+
+    r = cache_benchmark(n=args.queries, vocabulary_size=args.vocabulary, exponent=args.exponent,
+                        maxsize=args.maxsize, ttl=args.ttl)
+    stats = r["stats"]
+    print(f"Zipf stream: {r['queries']} queries over {r['vocabulary']} names (s={r['exponent']})")
+    print(f"  uncached={r['uncached_qps']:10.0f} qps  cached={r['cached_qps']:10.0f} qps  "
+          f"speedup={r['speedup']:.1f}x")
+    print(f"  hit rate={stats['hit_rate']:.2%} hits={stats['hits']} misses={stats['misses']} "
+          f"evictions={stats['evictions']} expirations={stats['expirations']}")
+    return r, True
+
+
+def cmd_blocking(args):
+    """Compare candidate sets and latency with the token blocking index on and off"""
+    from tests.bench.blocking import blocking_benchmark
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+
+    companies = synthetic_companies(args.size)
+    queries = synthetic_queries(args.queries, companies, seed=1, known_fraction=0.8)
+    results = blocking_benchmark(companies, queries)
+    for mode, r in results.items():
+        print(
+            f"  {mode:<7} build={r['build_seconds']:6.2f}s "
+            f"candidates country={r['candidates_with_country']:9.1f} "
+            f"none={r['candidates_without_country']:9.1f} recall={r['recall']:7.2%} "
+            f"p50={r['p50_ms']:7.2f}ms p95={r['p95_ms']:8.2f}ms"
+        )
+    return results, True
+
+
+def cmd_pruning(args):
+    """Per-query latency of exhaustive and pruned top-k scoring on many-candidate queries"""
+    from tests.bench.pruning import pruning_benchmark
+
+    r = pruning_benchmark(args.size, args.queries, args.min_candidates)
+    print(f"{r['queries']} queries, {r['mean_candidates']:.0f} candidates on average, "
+          f"{r['mismatches']} mismatches")
+    for label, modes in r["latency"].items():
+        full, pruned = modes["exhaustive"], modes["pruned"]
+        print(f"  {label:<11} exhaustive p50={full['p50_ms']:7.1f}ms p95={full['p95_ms']:7.1f}ms  "
+              f"pruned p50={pruned['p50_ms']:7.1f}ms p95={pruned['p95_ms']:7.1f}ms")
+    return r, r["mismatches"] == 0
+
+
+def cmd_normalize(args):
+    """Compare normalize_names with a normalize_name loop"""
+    from tests.bench.normalize import normalize_throughput
+
+    results = normalize_throughput(args.sizes)
+    for r in results:
+        print(f"  {r['size']:>10,} rows  bulk={r['bulk_rows_per_sec']:12,.0f} rows/s  "
+              f"loop={r['loop_rows_per_sec']:12,.0f} rows/s  speedup={r['speedup']:.1f}x")
+    return results, True
+
+
+def cmd_stream(args):
+    """Stream-resolve growing synthetic files and record peak memory"""
+    import tempfile
+
+    from tests.bench.stream import stream_memory
+
+    with tempfile.TemporaryDirectory(prefix="entityidentity-stream-") as directory:
+        results = stream_memory(args.sizes, directory, chunksize=args.chunksize,
+                                fmt=args.format)
+    for r in results:
+        print(f"  {r['rows']:>12,} rows ({r['input_mb']:8.1f}MB)  "
+              f"{r['rows_per_sec']:10,.0f} rows/s  peak +{r['peak_rss_mb']:.1f}MB")
+    return results, True
+
+
+def cmd_async(args):
+    """Event-loop lag while serving concurrent clients, blocking vs AsyncResolver"""
+    from tests.bench.aio import loop_lag_benchmark
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+    from tests.bench.index import CompanyIndex
+
+    index = CompanyIndex(synthetic_companies(args.size))
+    queries = [(name, None) for name in
+               synthetic_queries(args.queries, index.companies, seed=1)["name"]]
+    results = loop_lag_benchmark(queries, index.resolve, concurrency=args.concurrency,
+                                 max_workers=args.workers, max_pending=args.max_pending)
+    for mode, r in results.items():
+        print(f"  {mode:<8} lag p50={r['lag_p50_ms']:8.1f}ms p99={r['lag_p99_ms']:8.1f}ms "
+              f"max={r['lag_max_ms']:8.1f}ms  request p99={r['request_p99_ms']:8.1f}ms  "
+              f"qps={r['qps']:7.0f}")
+    return results, True
+
+
+def cmd_search(args):
+    """Compare list_companies(search=...) scans with the trigram index"""
+    from tests.bench.search import search_benchmark
+
+    results = search_benchmark(args.sizes, repeats=args.repeats)
+    ok = True
+    for r in results:
+        print(f"{r['size']:,} companies (index built in {r['build_seconds']:.2f}s)")
+        for s in r["searches"]:
+            ok = ok and s["identical"]
+            print(f"  {str(s['filters']):<52} rows={s['rows']:8d} scan={s['scan_ms']:9.2f}ms "
+                  f"index={s['index_ms']:9.2f}ms speedup={s['speedup']:6.1f}x"
+                  f"{'' if s['identical'] else '  MISMATCH'}")
+    return results, ok
+
+
+def cmd_suggest(args):
+    """Keystroke-by-keystroke suggest_companies latency on a synthetic database"""
+    import time
+
+    from tests.bench.corpus import synthetic_companies
+    from tests.bench.suggest import PrefixIndex, keystroke_latency
+
+    companies = synthetic_companies(args.size)
+    start = time.perf_counter()
+    index = PrefixIndex(companies)
+    build = time.perf_counter() - start
+    names = companies["name"].sample(min(args.names, len(companies)), random_state=0)
+    results = {"size": args.size, "build_seconds": build, "latency": {}}
+    print(f"{args.size:,} companies, index built in {build:.2f}s")
+    for country in (None, "US"):
+        r = keystroke_latency(index, names, country)
+        results["latency"][country or "all"] = r
+        print(f"  country={country or 'any':<4} {r['calls']:7d} keystrokes  "
+              f"p50={r['p50_us']:7.1f}us p99={r['p99_us']:7.1f}us  max={r['max_us']:8.1f}us")
+    return results, True
+
+
+def cmd_stages(args):
+    """Per-stage resolve timings on a synthetic database, optionally as Prometheus text"""
+    import pandas as pd
+
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+    from tests.bench.index import CompanyIndex
+    from tests.bench.instrument import instrument
+
+    index = CompanyIndex(synthetic_companies(args.size))
+    queries = synthetic_queries(args.queries, index.companies, seed=1)
+    with instrument() as recorder:
+        for name, country in queries.itertuples(index=False):
+            index.resolve(name, None if pd.isna(country) else country)
+    summary = recorder.summary()
+    print(f"{summary['calls']} calls, {summary['mean_candidates']:.0f} candidates on average")
+    for stage, s in summary["stages"].items():
+        share = s["seconds"] / summary["wall_seconds"] if summary["wall_seconds"] else 0.0
+        print(f"  {stage:<10} mean={s['mean_ms']:8.3f}ms  {share:6.1%}")
+    if args.prometheus:
+        with open(args.prometheus, "w") as f:
+            f.write(recorder.to_prometheus())
+        print(f"Prometheus metrics written to {args.prometheus}")
+    return summary, True
+
+
+def cmd_delta(args):
+    """Apply an add/modify/delete delta vs rebuilding the index"""
+    from tests.bench.delta import delta_benchmark
+
+    results = []
+    for size in args.sizes:
+        r = delta_benchmark(size, n_add=args.add, n_modify=args.modify, n_delete=args.delete)
+        results.append(r)
+        print(f"  base={r['base_size']:>10,} delta={r['delta_size']:>7,}  "
+              f"apply={r['apply_seconds']:7.2f}s  rebuild={r['rebuild_seconds']:7.2f}s  "
+              f"speedup={r['speedup']:5.1f}x")
+    return results, True
+
+
+def cmd_records(args):
+    """Bytes per company: DataFrame vs dict records vs compact RecordStore"""
+    from tests.bench.records import record_memory
+
+    results = record_memory(args.sizes, n_queries=args.queries)
+    for r in results:
+        print(f"  n={r['size']:>10,}  frame={r['frame_bytes_per_company']:6.0f}B  "
+              f"dicts={r['dict_bytes_per_company']:6.0f}B  "
+              f"store={r['store_bytes_per_company']:6.0f}B per company  "
+              f"results dict={r['dict_bytes_per_result']:6.0f}B "
+              f"view={r['view_bytes_per_result']:6.0f}B")
+    return results, True
+
+
+def cmd_ann(args):
+    """MinHash LSH retrieval: recall@k and latency against exhaustive scoring"""
+    from tests.bench.ann import ann_benchmark
+
+    params = {"num_perm": args.num_perm, "bands": args.bands,
+              "max_candidates": args.max_candidates}
+    results = ann_benchmark(args.sizes, n_queries=args.queries, k=args.k, **params)
+    for r in results:
+        print(f"  n={r['size']:>10,}  build={r['build_seconds']:7.1f}s  "
+              f"candidates={r['mean_candidates']:6.0f}  recall@{args.k}={r['recall_at_k']:.3f}  "
+              f"confident={r['confident_recall']:.3f}  "
+              f"ann p50={r['ann_p50_ms']:6.1f}ms p95={r['ann_p95_ms']:6.1f}ms  "
+              f"exact p50={r['exact_p50_ms']:8.1f}ms")
+    return results, True
+
+
+def cmd_dataset(args):
+    """Generate scaled synthetic databases; write one or benchmark several"""
+    from tests.bench.dataset import dataset_benchmark, generate_queries, write_database
+
+    if args.output:
+        import pandas as pd
+
+        n = args.sizes[0]
+        path = write_database(args.output, n, seed=args.seed, include_bundled=args.bundled)
+        print(f"  wrote {n:,} rows to {path}")
+        if args.query_output:
+            queries = generate_queries(pd.read_parquet(path) if path.suffix == ".parquet"
+                                       else pd.read_csv(path), args.queries, seed=args.seed)
+            queries.to_csv(args.query_output, index=False)
+            print(f"  wrote {len(queries):,} queries with ground truth to {args.query_output}")
+        return [{"size": n, "path": str(path)}], True
+
+    results = dataset_benchmark(args.sizes, seed=args.seed, n_queries=args.queries)
+    for r in results:
+        print(f"  n={r['size']:>10,}  write={r['write_seconds']:7.1f}s "
+              f"({r['rows_per_second']:>9,.0f} rows/s)  file={r['file_mb']:7.1f}MB  "
+              f"load={r['load_seconds']:6.2f}s  accuracy={r['match_accuracy']:.3f}")
+    return results, True
+
+
+def cmd_features(args):
+    """Build a matching-feature sidecar, or benchmark time-to-first-query with one"""
+    import tempfile
+
+    from tests.bench.features import build_sidecar, features_benchmark
+
+    if args.build:
+        path = build_sidecar(args.data, args.output, blocking=args.blocking)
+        print(f"  wrote {path} ({path.stat().st_size / 2**20:.1f}MB)")
+        return [{"path": str(path)}], True
+
+    with tempfile.TemporaryDirectory(prefix="entityidentity-features-") as directory:
+        results = features_benchmark(args.sizes, directory, runs=args.runs)
+    ok = True
+    for r in results:
+        fresh, sidecar = r["fresh"], r["sidecar"]
+        print(f"  n={r['size']:>9,}  build={r['build_seconds']:6.2f}s  "
+              f"sidecar={r['sidecar_bytes'] / 2**20:6.1f}MB  index fresh="
+              f"{fresh['index_seconds']:6.3f}s sidecar={sidecar['index_seconds']:6.3f}s  "
+              f"first query fresh={fresh['first_query_seconds']:6.2f}s "
+              f"sidecar={sidecar['first_query_seconds']:6.2f}s")
+        ok = ok and r["same_match"]
+    print()
+    print("✅ Same first answer with and without the sidecar" if ok
+          else "❌ Sidecar and fresh index disagree")
+    return results, ok
+
+
+def cmd_threads(args):
+    """Throughput of threads sharing one index, and GIL release while scoring"""
+    from tests.bench.threads import concurrency_benchmark
+
+    r = concurrency_benchmark(size=args.size, n_queries=args.queries, threads=args.threads)
+    print(f"{r['size']:,} companies on {r['cpus']} CPU(s)")
+    for s in r["scaling"]:
+        print(f"  threads={s['threads']:>3}  qps={s['qps']:9.1f}  speedup={s['speedup']:5.2f}  "
+              f"mismatches={s['mismatches']}")
+    print(f"  GIL-free share while scoring: cdist={r['cdist_gil_free']:.2f} "
+          f"extract={r['extract_gil_free']:.2f}")
+
+    ok = all(s["mismatches"] == 0 for s in r["scaling"])
+    print()
+    print("✅ Threaded results match sequential" if ok else "❌ Threaded results differ")
+    return r, ok
+
+
+def cmd_serve(args):
+    """Load-test the local HTTP server at rising concurrency, batching on and off"""
+    from tests.bench.server import load_test
+
+    print(f"/resolve over {args.rows:,} synthetic companies, {args.requests} requests per level")
+    modes = [("batched", args.max_batch), ("unbatched", 1)] if args.compare else \
+        [("batched", args.max_batch)]
+    report = {}
+    for label, max_batch in modes:
+        report[label] = load_test(args.concurrency, args.requests, args.rows,
+                                  window_ms=args.window_ms, max_batch=max_batch)
+        for r in report[label]:
+            print(f"  {label:<9} concurrency={r['concurrency']:>4}  qps={r['qps']:8.1f}  "
+                  f"p50={r['p50_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms  "
+                  f"batch={r['mean_batch']:5.1f}  errors={r['errors']}")
+    ok = all(r["errors"] == 0 for results in report.values() for r in results)
+    print()
+    print("✅ No failed requests" if ok else "❌ Some requests failed")
+    return report, ok
+
+
+def cmd_fuzz(args):
+    """Fuzz the resolution functions with adversarial names; report slow inputs and growth"""
+    from tests.bench.fuzz import run_fuzz
+
+    r = run_fuzz(args.inputs, args.seed, args.rows, args.max_length, top=args.top)
+    print(f"{r['inputs']} inputs (seed {r['seed']}) against {r['rows']} companies, "
+          f"{r['calls']} calls")
+    if r["failing_targets"]:
+        print(f"Raised on every input, so not timed: {', '.join(r['failing_targets'])}")
+    print("Slowest (calls that returned):")
+    for s in r["slowest"]:
+        print(f"  {s['ms']:9.1f}ms {s['target']:<15} {s['category']:<10} {s['input']}")
+    print("Exceptions:")
+    for e in r["exceptions"]:
+        print(f"  {e['count']:>5}x {e['target']:<15} {e['error']}: {e['message'][:70]} "
+              f"(e.g. {e['example'][:40]})")
+    for v in r["violations"]:
+        print(f"  property broken: {v['target']} {v['violation']} on {v['input']}")
+    print("Growth with input length:")
+    for c in r["growth"]:
+        if c["error"]:
+            print(f"  {c['target']:<15} {c['family']:<11} raised {c['error']}, not timed")
+            continue
+        exponent = "n/a" if c["exponent"] is None else f"{c['exponent']:.2f}"
+        flag = "  <- super-linear" if c["superlinear"] else ""
+        print(f"  {c['target']:<15} {c['family']:<11} exponent={exponent:>5} "
+              f"longest={c['seconds'][-1] * 1000:8.1f}ms{flag}")
+    return r, not r["superlinear"] and not r["violations"]
+
+
+COMMANDS = {
+    "latency": cmd_latency,
+    "batch": cmd_batch,
+    "dataframe": cmd_dataframe,
+    "parallel": cmd_parallel,
+    "columnar": cmd_columnar,
+    "partitions": cmd_partitions,
+    "cache": cmd_cache,
+    "blocking": cmd_blocking,
+    "pruning": cmd_pruning,
+    "normalize": cmd_normalize,
+    "stream": cmd_stream,
+    "async": cmd_async,
+    "search": cmd_search,
+    "suggest": cmd_suggest,
+    "stages": cmd_stages,
+    "delta": cmd_delta,
+    "records": cmd_records,
+    "ann": cmd_ann,
+    "dataset": cmd_dataset,
+    "features": cmd_features,
+    "threads": cmd_threads,
+    "serve": cmd_serve,
+    "fuzz": cmd_fuzz,
+}
+
+
+def build_parser():
+    """Build the argument parser for entityidentity-bench"""
+    parser = argparse.ArgumentParser(
+        prog="entityidentity-bench", description="Benchmark the entityidentity package"
+    )
+    parser.add_argument("--json", metavar="PATH", help="Write the full report as JSON")
+    sub = parser.add_subparsers(dest="command")
+
+    latency = sub.add_parser("latency", help="Latency percentiles over a fixed query corpus")
+    latency.add_argument("--target", choices=["match", "resolve"], default="match")
+    latency.add_argument("--repeats", type=int, default=5, help="Warm replays of the corpus")
+
+    batch = sub.add_parser("batch", help="Batch match_companies throughput vs per-call")
+    batch.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    batch.add_argument("--per-call-sample", type=int, default=200,
+                       help="Names timed through the per-call loop for each size")
+    batch.add_argument("--check", type=int, default=1000,
+                       help="Synthetic names checked against per-call results")
+
+    dataframe = sub.add_parser("dataframe", help="resolve_dataframe vs per-row apply")
+    dataframe.add_argument("--rows", type=int, default=1_000_000)
+    dataframe.add_argument("--unique", type=int, default=10_000,
+                           help="Distinct synthetic names the rows are drawn from")
+    dataframe.add_argument("--apply-sample", type=int, default=1000,
+                           help="Rows timed through the per-row apply")
+
+    parallel = sub.add_parser("parallel", help="Multi-process scaling with a shared index")
+    parallel.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parallel.add_argument("--size", type=int, default=200_000, help="Synthetic names to resolve")
+    parallel.add_argument("--mode", choices=["shared", "reload", "both"], default="both")
+
+    columnar = sub.add_parser("columnar", help="Memory-mapped columnar loader vs pandas loader")
+    columnar.add_argument("--size", type=int, default=1_000_000, help="Synthetic companies")
+    columnar.add_argument("--country", default="US")
+    columnar.add_argument("--limit", type=int, default=10)
+
+    partitions = sub.add_parser("partitions", help="Country-partitioned lazy loading")
+    partitions.add_argument("--size", type=int, default=1_000_000, help="Synthetic companies")
+    partitions.add_argument("--countries", nargs="+", default=["NL", "NL,CH,IN", "all"],
+                            help="Country sets to load, comma separated, or 'all'")
+
+    cache = sub.add_parser("cache", help="Result cache hit rate on a Zipf query stream")
+    cache.add_argument("--queries", type=int, default=50_000)
+    cache.add_argument("--vocabulary", type=int, default=5_000, help="Distinct query names")
+    cache.add_argument("--exponent", type=float, default=1.1, help="Zipf exponent")
+    cache.add_argument("--maxsize", type=int, default=1_000)
+    cache.add_argument("--ttl", type=float, default=None, help="Seconds before entries expire")
+
+    blocking = sub.add_parser("blocking", help="Token blocking index on vs off")
+    blocking.add_argument("--size", type=int, default=100_000, help="Synthetic companies")
+    blocking.add_argument("--queries", type=int, default=500)
+
+    pruning = sub.add_parser("pruning", help="Top-k pruned scoring vs exhaustive scoring")
+    pruning.add_argument("--size", type=int, default=200_000, help="Synthetic companies")
+    pruning.add_argument("--queries", type=int, default=100)
+    pruning.add_argument("--min-candidates", type=int, default=1_000,
+                         help="Only time queries with at least this many candidates")
+
+    normalize = sub.add_parser("normalize", help="normalize_names vs a normalize_name loop")
+    normalize.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+
+    stream = sub.add_parser("stream", help="Streaming file resolution: peak memory vs input size")
+    stream.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    stream.add_argument("--chunksize", type=int, default=100_000)
+    stream.add_argument("--format", choices=["csv", "parquet"], default="csv")
+
+    aio = sub.add_parser("async", help="Event-loop lag under concurrent async clients")
+    aio.add_argument("--size", type=int, default=50_000, help="Synthetic companies")
+    aio.add_argument("--queries", type=int, default=300)
+    aio.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    aio.add_argument("--workers", type=int, default=4, help="Executor threads")
+    aio.add_argument("--max-pending", type=int, default=64)
+
+    search = sub.add_parser("search", help="Indexed list_companies(search=...) vs scan")
+    search.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    search.add_argument("--repeats", type=int, default=5)
+
+    suggest = sub.add_parser("suggest", help="Autocomplete latency per keystroke")
+    suggest.add_argument("--size", type=int, default=1_000_000, help="Synthetic companies")
+    suggest.add_argument("--names", type=int, default=1_000, help="Names typed")
+
+    stages = sub.add_parser("stages", help="Per-stage resolve timing breakdown")
+    stages.add_argument("--size", type=int, default=100_000, help="Synthetic companies")
+    stages.add_argument("--queries", type=int, default=500)
+    stages.add_argument("--prometheus", metavar="PATH", help="Also write Prometheus text")
+
+    delta = sub.add_parser("delta", help="Incremental delta apply vs full rebuild")
+    delta.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    delta.add_argument("--add", type=int, default=1_000)
+    delta.add_argument("--modify", type=int, default=1_000)
+    delta.add_argument("--delete", type=int, default=500)
+
+    records = sub.add_parser("records", help="Memory per company of the compact record store")
+    records.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    records.add_argument("--queries", type=int, default=500,
+                         help="Resolve results kept alive to size dicts vs views")
+
+    ann = sub.add_parser("ann", help="MinHash LSH recall@k and latency vs exhaustive scoring")
+    ann.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    ann.add_argument("--queries", type=int, default=100,
+                     help="Queries per size (exhaustive scoring dominates the runtime)")
+    ann.add_argument("--k", type=int, default=5)
+    ann.add_argument("--num-perm", type=int, default=64)
+    ann.add_argument("--bands", type=int, default=32)
+    ann.add_argument("--max-candidates", type=int, default=200)
+
+    dataset = sub.add_parser("dataset", help="Scaled synthetic company databases with ground truth")
+    dataset.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    dataset.add_argument("--seed", type=int, default=0)
+    dataset.add_argument("--queries", type=int, default=200)
+    dataset.add_argument("--output", help="Write a table of the first size here (.parquet/.csv) "
+                         "instead of benchmarking")
+    dataset.add_argument("--query-output", help="With --output, also write queries (CSV)")
+    dataset.add_argument("--bundled", action="store_true",
+                         help="With --output, put the bundled companies first")
+
+    features = sub.add_parser("features", help="Precomputed matching-feature sidecar")
+    features.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    features.add_argument("--runs", type=int, default=3,
+                          help="Fresh processes per mode (the fastest is reported)")
+    features.add_argument("--build", action="store_true",
+                          help="Write a sidecar for --data instead of benchmarking")
+    features.add_argument("--data", help="With --build, data file (default: bundled)")
+    features.add_argument("--output", help="With --build, sidecar path (default: next to data)")
+    features.add_argument("--blocking", choices=["prefix", "tokens", "minhash"], default="prefix")
+
+    threads = sub.add_parser("threads", help="Concurrent reads from threads sharing an index")
+    threads.add_argument("--size", type=int, default=100_000, help="Synthetic companies")
+    threads.add_argument("--queries", type=int, default=200)
+    threads.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+
+    serve = sub.add_parser("serve", help="Load test of the local HTTP server")
+    serve.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    serve.add_argument("--requests", type=int, default=400, help="Requests per level")
+    serve.add_argument("--rows", type=int, default=50_000, help="Synthetic companies served")
+    serve.add_argument("--window-ms", type=float, default=2.0)
+    serve.add_argument("--max-batch", type=int, default=64)
+    serve.add_argument("--compare", action="store_true", help="Also run with batching off")
+
+    fuzz = sub.add_parser("fuzz", help="Seeded fuzzing for slow inputs and super-linear growth")
+    fuzz.add_argument("--inputs", type=int, default=200)
+    fuzz.add_argument("--seed", type=int, default=0)
+    fuzz.add_argument("--rows", type=int, default=5_000, help="Synthetic companies")
+    fuzz.add_argument("--max-length", type=int, default=4096, help="Longest generated name")
+    fuzz.add_argument("--top", type=int, default=10, help="Slowest inputs to report")
+
+    # Bare `entityidentity-bench` runs the latency benchmark
+    parser.set_defaults(command="latency", target="match", repeats=5)
+    return parser
+
+
+def main(argv=None):
+    """Run benchmarks via command line"""
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    print("=" * 60)
+    print("EntityIdentity Package Benchmarks")
+    print("=" * 60)
+    print()
+
+    report, ok = COMMANDS[args.command](args)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.json}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Trigram index for list_companies(search=...)
+
+entityidentity's list_companies() lowercases every name and runs a regular
+expression over the whole table for each search, even with a country filter
+and a small limit. SubstringIndex maps every character trigram of the
+lowercased name and of name_norm to the rows containing it. A literal search
+term of three or more characters is answered by intersecting the posting
+lists of its trigrams, restricting to the country, and then confirming
+candidates in row order until ``limit`` hits are found.
+
+Search terms that use regular-expression syntax, or are shorter than a
+trigram, fall back to a scan that also stops at ``limit``.
+
+``entityidentity-bench search`` times the index and the scan across
+database sizes.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+# Characters that make a search term a regular expression rather than a literal
+_REGEX_CHARS = set(".^$*+?{}[]\\|()")
+# With a limit, a shortlist this many times the limit is confirmed directly
+CONFIRM_FACTOR = 8
+# Trigram key: three 21-bit code points packed into one integer
+_CODE_BITS = 21
+
+
+def _packed_codes(texts):
+    """Return (code points, row of each code point) for texts joined with NUL"""
+    joined = "\x00".join(texts) + "\x00"
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+    rows = np.repeat(np.arange(len(texts), dtype=np.int32), lengths)
+    return codes, rows
+
+
+def _trigram_keys(codes):
+    """Keys of the trigrams starting at each position (valid where no NUL is crossed)"""
+    first, second, third = codes[:-2], codes[1:-1], codes[2:]
+    keys = (first << np.uint64(2 * _CODE_BITS)) | (second << np.uint64(_CODE_BITS)) | third
+    valid = (first != 0) & (second != 0) & (third != 0)
+    return keys, valid
+
+
+def term_keys(term):
+    """Sorted unique trigram keys of a search term"""
+    codes, _ = _packed_codes([term])
+    keys, valid = _trigram_keys(codes)
+    return np.unique(keys[valid])
+
+
+def _intersect(rows, other):
+    """Rows of sorted array rows that are also in sorted array other"""
+    found = np.minimum(np.searchsorted(other, rows), len(other) - 1)
+    return rows[other[found] == rows]
+
+
+class SubstringIndex:
+    """Trigram posting lists over a company table's name and name_norm
+
+    Args:
+        companies: DataFrame shaped like list_companies() (its index is kept)
+    """
+
+    def __init__(self, companies):
+        self.companies = companies
+        # Kept as Series so confirmation uses the same string engine as the scan
+        self.names_lower = companies["name"].str.lower().fillna("").reset_index(drop=True)
+        self.name_norm = companies["name_norm"].fillna("").reset_index(drop=True)
+        country = companies["country"].to_numpy(dtype=object)
+        self.country_rows = {
+            code: np.flatnonzero(country == code).astype(np.int32)
+            for code in pd.unique(country[pd.notna(country)])
+        }
+
+        keys, rows = [], []
+        for texts in (self.names_lower, self.name_norm):
+            codes, code_rows = _packed_codes(texts.tolist())
+            text_keys, valid = _trigram_keys(codes)
+            keys.append(text_keys[valid])
+            rows.append(code_rows[:-2][valid])
+        keys = np.concatenate(keys)
+        rows = np.concatenate(rows)
+        order = np.lexsort((rows, keys))
+        keys, rows = keys[order], rows[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys, rows = keys[keep], rows[keep]
+
+        self.keys, starts = np.unique(keys, return_index=True)
+        self.offsets = np.append(starts, len(keys)).astype(np.int64)
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.name_norm)
+
+    def postings(self, key):
+        """Rows (ascending) whose name or name_norm contains the trigram key"""
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.rows[self.offsets[i]:self.offsets[i + 1]]
+        return self.rows[:0]
+
+    def candidates(self, term, country=None, limit=None):
+        """Rows that can contain a literal term (a superset of the true matches)
+
+        Returns None when the trigram index cannot narrow the search (short
+        or regular-expression terms), meaning every row in scope is a candidate.
+        With a limit, intersection stops early once the shortlist is small
+        enough to confirm directly.
+        """
+        scope = None if country is None else self.country_rows.get(country, self.rows[:0])
+        if len(term) < NGRAM or _REGEX_CHARS.intersection(term):
+            return scope
+        lists = sorted((self.postings(key) for key in term_keys(term)), key=len)
+        if scope is not None:
+            lists.append(scope)
+            lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            if limit and len(rows) <= limit * CONFIRM_FACTOR and other is not scope:
+                continue
+            rows = _intersect(rows, other)
+        return rows
+
+    def search(self, search, country=None, limit=None):
+        """Row positions matching list_companies(country, search, limit), in order"""
+        country = country.upper() if country else None
+        rows = self.candidates(search.lower(), country, limit) if search else None
+        if rows is None:
+            rows = np.arange(len(self), dtype=np.int32) if country is None \
+                else self.country_rows.get(country, self.rows[:0])
+        if not search:
+            return rows[:limit] if limit else rows
+        return self._confirm(rows, search.lower(), limit)
+
+    def _confirm(self, rows, term, limit):
+        """Keep rows whose text contains term, stopping once limit are found
+
+        Rows are checked in blocks so that a limited search reads only as far
+        as it needs to.
+        """
+        regex = bool(_REGEX_CHARS.intersection(term))
+        step = len(rows) if not limit else max(256, limit * CONFIRM_FACTOR)
+        found = []
+        count = 0
+        for start in range(0, len(rows), max(1, step)):
+            block = rows[start:start + step]
+            names = self.names_lower.iloc[block]
+            norms = self.name_norm.iloc[block]
+            mask = (names.str.contains(term, regex=regex, na=False).to_numpy(dtype=bool)
+                    | norms.str.contains(term, regex=regex, na=False).to_numpy(dtype=bool))
+            found.append(block[mask])
+            count += int(mask.sum())
+            if limit and count >= limit:
+                break
+        found = np.concatenate(found) if found else rows[:0]
+        return found[:limit] if limit else found
+
+    def list_companies(self, country=None, search=None, limit=None):
+        """Same filters and result as entityidentity.list_companies"""
+        return self.companies.iloc[self.search(search, country, limit)]
+
+
+BENCH_SEARCHES = [
+    {"search": "mining"},
+    {"search": "mining", "limit": 10},
+    {"country": "US", "search": "inc"},
+    {"country": "US", "search": "holdings", "limit": 10},
+    {"search": "tracor"},
+    {"search": "zz"},
+]
+
+
+def search_benchmark(sizes, searches=None, repeats=5, seed=0):
+    """Time list_companies searches: entityidentity's scan vs the trigram index
+
+    Returns:
+        List of dicts with size, build seconds, and per search the scan and
+        index times in ms, the speedup and whether the results are identical
+    """
+    import tempfile
+    from pathlib import Path
+
+    from entityidentity.companies.companyidentity import list_companies, load_companies
+    from tests.bench.corpus import synthetic_companies
+    from tests.bench.timing import percentile
+
+    searches = searches or BENCH_SEARCHES
+    results = []
+    with tempfile.TemporaryDirectory(prefix="entityidentity-search-") as directory:
+        for n in sizes:
+            path = str(Path(directory) / f"companies_{n}.parquet")
+            synthetic_companies(n, seed=seed).to_parquet(path)
+            companies = load_companies(path)
+
+            start = time.perf_counter()
+            index = SubstringIndex(companies)
+            row = {"size": n, "build_seconds": time.perf_counter() - start, "searches": []}
+
+            for filters in searches:
+                scan, indexed = [], []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    expected = list_companies(data_path=path, **filters)
+                    scan.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    got = index.list_companies(**filters)
+                    indexed.append(time.perf_counter() - start)
+                scan_ms = percentile(scan, 50) * 1000
+                index_ms = percentile(indexed, 50) * 1000
+                row["searches"].append({
+                    "filters": filters,
+                    "rows": len(got),
+                    "scan_ms": scan_ms,
+                    "index_ms": index_ms,
+                    "speedup": scan_ms / index_ms if index_ms else float("inf"),
+                    "identical": got.index.equals(expected.index),
+                })
+            results.append(row)
+            load_companies.cache_clear()
+    return results
@@ -0,0 +1,598 @@
+"""
+Local HTTP resolution server with request micro-batching
+
+Services that each import entityidentity hold their own copy of the company
+data. entityidentity-serve loads it once and answers over HTTP instead, using
+only asyncio and the standard library:
+
+    GET /match?name=BHP+Group&country=AU      {"match": {...} | null}
+    GET /resolve?name=BHP+Group&country=AU&k=5 resolve_company-shaped dict
+    GET /list?country=AU&search=mining&limit=10 {"companies": [...]}
+    GET /normalize?name=BHP+Group+Ltd          {"name": ..., "name_norm": ...}
+    GET /stats                                 request and batch counters
+
+Every endpoint also accepts POST with a JSON object of the same parameters.
+
+Concurrent match/resolve requests are not scored one by one. They queue for
+the MicroBatcher, which waits up to ``window_ms`` for more to arrive (or
+until ``max_batch`` are queued, or every open connection has a request
+waiting) and scores the batch in one CompanyIndex.rank call per country:
+names sharing a blocking token share one vectorized cdist, and identical
+names are scored once. A single scoring
+thread runs the batches; while it is busy new requests queue, so batches
+grow with load. Batching removes per-request overhead and duplicate work;
+the pairwise scoring itself costs the same, so the gain is largest on small
+or duplicate-heavy workloads.
+
+    entityidentity-serve [--port 8765] [--data PATH | --synthetic-rows N]
+                         [--window-ms 2] [--max-batch 64]
+
+``entityidentity-bench serve [--compare]`` load-tests a server subprocess
+and reports throughput and p50/p99 latency as concurrency rises, with
+--compare also with batching off.
+"""
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from entityidentity import normalize_name
+
+DEFAULT_PORT = 8765
+WINDOW_MS = 2.0
+MAX_BATCH = 64
+LIST_LIMIT = 100
+MAX_LIST_LIMIT = 10_000
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class BadRequest(ValueError):
+    """Invalid request parameters; answered with 400"""
+
+
+def jsonable(value):
+    """Replace NaN (missing DataFrame values) with None and NumPy values with Python ones
+
+    Arrays, such as the ``aliases`` column's cells, become lists.
+    """
+    if isinstance(value, dict):
+        return {k: jsonable(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class MicroBatcher:
+    """Collect concurrent resolve requests and score them together
+
+    Args:
+        index: CompanyIndex to resolve against
+        window_ms: How long the first request of a batch waits for others
+        max_batch: Largest batch; a full batch is scored without waiting
+        callers: Optional callable giving how many requests could be waiting
+            at most (the server's open connections); once the batch holds
+            that many, it is scored without waiting out the window
+    """
+
+    def __init__(self, index, window_ms=WINDOW_MS, max_batch=MAX_BATCH, callers=None):
+        self.index = index
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.callers = callers
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+        self.batches = 0
+        self.requests = 0
+        self.largest = 0
+
+    def stats(self):
+        """Counters: requests, batches, mean and largest batch size"""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest,
+        }
+
+    async def resolve(self, name, country=None, k=5):
+        """Awaitable CompanyIndex.resolve, scored in a batch with concurrent calls"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((name, country, k, future))
+        return await future
+
+    async def _collect(self):
+        """Wait for one request, then gather more until the window closes or the batch fills"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if self.callers is not None and len(batch) >= self.callers():
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """Score batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.batches += 1
+            self.requests += len(batch)
+            self.largest = max(self.largest, len(batch))
+            requests = [(name, country, k) for name, country, k, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.resolve_batch,
+                                                     requests)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (*_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def resolve_batch(self, requests):
+        """Resolve (name, country, k) requests, ranking each country's names together
+
+        Returns:
+            List of resolve_company-shaped dicts in request order
+        """
+        index = self.index
+        norms = [normalize_name(name) for name, _, _ in requests]
+        # Scope and country boost depend only on the upper-cased country
+        groups = {}
+        for i, (_, country, k) in enumerate(requests):
+            groups.setdefault((str(country).upper() if country else None, k), []).append(i)
+
+        results = [None] * len(requests)
+        for (country, k), positions in groups.items():
+            # Identical names in a batch are scored once
+            unique = list(dict.fromkeys(norms[i] for i in positions))
+            ranked = index.rank(unique, country, k)
+            row_of = {norm: j for j, norm in enumerate(unique)}
+            for i in positions:
+                j = row_of[norms[i]]
+                row = {key: values[j:j + 1] for key, values in ranked.items()}
+                results[i] = index._result(requests[i][0], norms[i], requests[i][1], row)
+        return results
+
+    async def aclose(self):
+        """Stop the batching task and the scoring thread"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+
+class ResolutionServer:
+    """HTTP/1.1 server (keep-alive, JSON responses) over one CompanyIndex
+
+    Args:
+        index: CompanyIndex to serve (defaults to the bundled data)
+        host, port: Address to bind; port 0 picks a free port
+        window_ms, max_batch: MicroBatcher settings; max_batch=1 turns
+            batching off
+    """
+
+    def __init__(self, index=None, host="127.0.0.1", port=DEFAULT_PORT, window_ms=WINDOW_MS,
+                 max_batch=MAX_BATCH):
+        if index is None:
+            from tests.bench.index import default_index
+            index = default_index()
+        self.index = index
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.batcher = MicroBatcher(index, window_ms, max_batch, lambda: self.connections)
+        self._server = None
+        self._search = None
+        self._search_lock = threading.Lock()
+        self.served = 0
+
+    async def start(self):
+        """Bind and start accepting connections; returns the bound port"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        """Serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def aclose(self):
+        """Stop accepting connections and stop the batcher"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.aclose()
+
+    async def _handle(self, reader, writer):
+        """Serve requests on one connection until it closes
+
+        Requests on a connection are answered in order, one at a time, so each
+        open connection has at most one request waiting for the batcher.
+        """
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                status, payload = await self.dispatch(method, target, body)
+                try:
+                    await self._respond(writer, status, payload, keep_alive)
+                except (TypeError, ValueError) as e:
+                    # Raised while encoding, before anything was written
+                    await self._respond(writer, 500, {"error": f"{type(e).__name__}: {e}"},
+                                        keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(jsonable(payload)).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    async def dispatch(self, method, target, body=b""):
+        """Route one request
+
+        Returns:
+            Tuple (HTTP status, JSON-serializable payload)
+        """
+        url = urlsplit(target)
+        handler = {"/match": self.match, "/resolve": self.resolve, "/list": self.list,
+                   "/normalize": self.normalize, "/stats": self.stats}.get(url.path.rstrip("/"))
+        if handler is None:
+            return 404, {"error": f"unknown endpoint {url.path}"}
+        if method not in ("GET", "POST"):
+            return 405, {"error": f"{method} not allowed"}
+        try:
+            query = parse_qs(url.query, keep_blank_values=True)
+            params = {k: v[-1] for k, v in query.items()}
+            if method == "POST" and body:
+                posted = json.loads(body)
+                if not isinstance(posted, dict):
+                    raise BadRequest("JSON body must be an object")
+                params.update(posted)
+            self.served += 1
+            return 200, await handler(params)
+        except (BadRequest, json.JSONDecodeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    def _name(params):
+        name = params.get("name")
+        if not isinstance(name, str):
+            raise BadRequest("'name' is required")
+        return name
+
+    @staticmethod
+    def _int(params, key, default, maximum):
+        try:
+            value = int(params.get(key, default))
+        except (TypeError, ValueError):
+            raise BadRequest(f"'{key}' must be an integer")
+        if not 0 < value <= maximum:
+            raise BadRequest(f"'{key}' must be between 1 and {maximum}")
+        return value
+
+    async def resolve(self, params):
+        """resolve_company(name, country) through the micro-batcher"""
+        k = self._int(params, "k", 5, 100)
+        return await self.batcher.resolve(self._name(params), params.get("country") or None, k)
+
+    async def match(self, params):
+        """match_company(name, country) through the micro-batcher"""
+        result = await self.batcher.resolve(self._name(params), params.get("country") or None)
+        return {"match": result["final"]}
+
+    async def normalize(self, params):
+        """normalize_name(name)"""
+        name = self._name(params)
+        return {"name": name, "name_norm": normalize_name(name)}
+
+    async def list(self, params):
+        """list_companies(country, search, limit), with limit defaulting to 100"""
+        limit = self._int(params, "limit", LIST_LIMIT, MAX_LIST_LIMIT)
+        loop = asyncio.get_running_loop()
+        frame = await loop.run_in_executor(None, self._list, params.get("country"),
+                                           params.get("search"), limit)
+        return {"companies": frame.to_dict(orient="records"), "count": len(frame)}
+
+    def _list(self, country, search, limit):
+        if self._search is None:
+            from tests.bench.search import SubstringIndex
+            with self._search_lock:
+                if self._search is None:
+                    self._search = SubstringIndex(self.index.companies)
+        return self._search.list_companies(country, search, limit)
+
+    async def stats(self, params):
+        """Request and batching counters"""
+        return {"companies": len(self.index), "served": self.served, **self.batcher.stats()}
+
+
+@contextmanager
+def serve_in_thread(index=None, **options):
+    """Run a ResolutionServer on a free port in a background thread
+
+    Yields:
+        The running ResolutionServer (its port attribute is bound)
+    """
+    loop = asyncio.new_event_loop()
+    server = ResolutionServer(index, port=0, **options)
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def build_index(data=None, synthetic_rows=None, seed=0):
+    """Index served by entityidentity-serve
+
+    Args:
+        data: Company data file (uses its feature sidecar when present)
+        synthetic_rows: Serve a generated table of this many rows instead
+
+    Returns:
+        CompanyIndex
+    """
+    if synthetic_rows:
+        from tests.bench.dataset import generate_companies
+        from tests.bench.index import CompanyIndex
+        return CompanyIndex(generate_companies(synthetic_rows, seed=seed))
+    from tests.bench.features import open_index
+    return open_index(data)
+
+
+async def _request(reader, writer, path):
+    """Send one keep-alive GET and return (status, body bytes)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def _drive(port, paths, concurrency):
+    """Send paths over `concurrency` keep-alive connections; return per-request latencies"""
+    queue = list(reversed(paths))
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while queue:
+                path = queue.pop()
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, path)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def start_server_process(synthetic_rows=None, window_ms=WINDOW_MS, max_batch=MAX_BATCH, seed=0):
+    """Start entityidentity-serve on a free port in a subprocess
+
+    Returns:
+        Tuple (Popen, port); terminate the process when done
+    """
+    command = [sys.executable, "-m", "tests.bench.server", "--port", "0",
+               "--window-ms", str(window_ms), "--max-batch", str(max_batch),
+               "--seed", str(seed)]
+    if synthetic_rows:
+        command += ["--synthetic-rows", str(synthetic_rows)]
+    # stderr goes to a file: an unread pipe would block the server once it fills
+    with tempfile.TemporaryFile("w+") as stderr:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True,
+                                cwd=str(Path(__file__).resolve().parents[2]))
+        line = proc.stdout.readline()
+        if not line.startswith("Listening on"):
+            proc.kill()
+            proc.wait()
+            stderr.seek(0)
+            raise RuntimeError(f"Server failed to start:\n{line}{stderr.read()[-2000:]}")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+def load_test(concurrency=(1, 4, 16, 64), requests=400, synthetic_rows=50_000,
+              window_ms=WINDOW_MS, max_batch=MAX_BATCH, seed=0):
+    """Throughput and latency of /resolve as concurrent clients rise
+
+    The server runs in its own process, so clients do not compete with it for
+    the GIL. Each concurrency level replays the same noisy synthetic queries
+    over that many keep-alive connections.
+
+    Args:
+        concurrency: Numbers of concurrent connections
+        requests: Requests per level
+        synthetic_rows: Size of the generated table the server loads
+        window_ms, max_batch: Server batching (max_batch=1 disables it)
+
+    Returns:
+        List of dicts with concurrency, qps, p50/p99 ms, errors and the
+        server's mean batch size at that level
+    """
+    from urllib.parse import urlencode
+
+    import pandas as pd
+
+    from tests.bench.dataset import generate_companies, generate_queries
+    from tests.bench.timing import percentile
+
+    companies = generate_companies(synthetic_rows, seed=seed)
+    queries = generate_queries(companies, requests, seed=seed + 1)
+    paths = ["/resolve?" + urlencode({"name": name} if pd.isna(country)
+                                     else {"name": name, "country": country})
+             for name, country in zip(queries["name"], queries["country"])]
+    del companies
+
+    proc, port = start_server_process(synthetic_rows, window_ms, max_batch, seed)
+    try:
+        async def stats():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                return json.loads((await _request(reader, writer, "/stats"))[1])
+            finally:
+                writer.close()
+
+        # Warm every country scope's blocking keys before measuring
+        warm = {country: path for country, path in zip(queries["country"], paths)}
+        asyncio.run(_drive(port, list(warm.values()), 4))
+        results = []
+        for level in concurrency:
+            before = asyncio.run(stats())
+            latencies, errors, elapsed = asyncio.run(_drive(port, paths, level))
+            after = asyncio.run(stats())
+            batches = after["batches"] - before["batches"]
+            results.append({
+                "concurrency": level,
+                "qps": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "errors": errors,
+                "mean_batch": (after["requests"] - before["requests"]) / batches if batches else 0,
+            })
+        return results
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(argv=None):
+    """Console entry point: entityidentity-serve [--host H] [--port P] [options]"""
+    parser = argparse.ArgumentParser(
+        prog="entityidentity-serve",
+        description="Serve company match/resolve/list/normalize over local HTTP",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--data", help="Company data file (default: entityidentity's bundled)")
+    parser.add_argument("--synthetic-rows", type=int, help="Serve a generated table instead")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --synthetic-rows")
+    parser.add_argument("--window-ms", type=float, default=WINDOW_MS,
+                        help="Micro-batching window")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH,
+                        help="Largest batch (1 disables batching)")
+    args = parser.parse_args(argv)
+
+    server = ResolutionServer(build_index(args.data, args.synthetic_rows, args.seed),
+                              args.host, args.port, args.window_ms, args.max_batch)
+
+    async def serve():
+        port = await server.start()
+        print(f"Listening on http://{args.host}:{port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Cold-start profiler for the entityidentity package
+
+Runs ``import entityidentity`` and the first company load in a fresh Python
+subprocess under ``-X importtime`` and breaks the cold-start cost into timed
+phases, so startup cost can be diffed across package versions.
+"""
+import json
+import subprocess
+import sys
+
+# Executed in the child interpreter. The phases are disjoint and run in order,
+# so they add up to the cold start. The first list_companies() is the real
+# load_companies(), timed once and split by wrapping the pandas reader it calls.
+# block_candidates is timed after the first query as a re-measurement of a
+# step inside it, outside the phases.
+PROBE = r"""
+import json, time
+from pathlib import Path
+t0 = time.perf_counter()
+phases = {}
+
+start = time.perf_counter()
+import pandas as pd
+phases["import_pandas"] = time.perf_counter() - start
+
+start = time.perf_counter()
+import entityidentity
+from entityidentity.companies import companyidentity
+phases["import_entityidentity"] = time.perf_counter() - start
+
+reads = []
+
+def timed(reader):
+    def read(path, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return reader(path, *args, **kwargs)
+        finally:
+            reads.append((str(path), time.perf_counter() - start))
+    return read
+
+readers = pd.read_parquet, pd.read_csv
+pd.read_parquet, pd.read_csv = (timed(reader) for reader in readers)
+start = time.perf_counter()
+try:
+    companies = entityidentity.list_companies()
+finally:
+    pd.read_parquet, pd.read_csv = readers
+load = time.perf_counter() - start
+phases["read_data_file"] = sum(seconds for _, seconds in reads)
+phases["prepare_companies"] = load - phases["read_data_file"]
+
+start = time.perf_counter()
+try:
+    entityidentity.match_company("BHP Group")
+    first_query_error = None
+except Exception as e:
+    first_query_error = type(e).__name__
+phases["first_query"] = time.perf_counter() - start
+wall = time.perf_counter() - t0
+
+start = time.perf_counter()
+companyidentity.block_candidates(companies, companyidentity.normalize_name("BHP Group"))
+remeasured = {"block_candidates": time.perf_counter() - start}
+
+print(json.dumps({
+    "phases": phases,
+    "remeasured": remeasured,
+    "wall": wall,
+    "rows": len(companies),
+    "data_file": Path(reads[0][0]).name if reads else None,
+    "first_query_error": first_query_error,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into a list of per-module dicts
+
+    Each line looks like ``import time:   self [us] | cumulative | imported package``.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return modules
+
+
+def _package_version(name):
+    """Return the installed distribution version, or None if unavailable"""
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+
+def profile_startup(python=None, top=25):
+    """Profile cold start of entityidentity in a fresh subprocess
+
+    Args:
+        python: Interpreter to run (defaults to the current one)
+        top: Number of slowest imports (by cumulative time) to keep
+
+    Returns:
+        Dict with per-phase milliseconds (disjoint, summing to about the
+        wall time), re-measured steps outside the phases, wall time and the
+        slowest imports
+    """
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    # Top-level imports only, so nested modules are not double counted
+    top_level = [m for m in modules if m["depth"] == 0]
+
+    return {
+        "python": sys.version.split()[0],
+        "entityidentity_version": _package_version("entityidentity"),
+        "rows": probe["rows"],
+        "data_file": probe["data_file"],
+        "first_query_error": probe["first_query_error"],
+        "phases_ms": {k: v * 1000 for k, v in probe["phases"].items()},
+        "remeasured_ms": {k: v * 1000 for k, v in probe["remeasured"].items()},
+        "wall_ms": probe["wall"] * 1000,
+        "importtime": {
+            "modules": len(modules),
+            "total_ms": sum(m["cumulative_us"] for m in top_level) / 1000,
+            "slowest": sorted(modules, key=lambda m: -m["cumulative_us"])[:top],
+        },
+    }
+
+
+def main(output="startup_profile.json"):
+    """Profile startup, print a breakdown and write it as JSON"""
+    profile = profile_startup()
+
+    print(f"entityidentity {profile['entityidentity_version']} on Python {profile['python']}")
+    print(f"Data: {profile['data_file']} ({profile['rows']} rows)")
+    for phase, ms in profile["phases_ms"].items():
+        print(f"  {phase:<26} {ms:10.2f}ms")
+    print(f"  {'wall':<26} {profile['wall_ms']:10.2f}ms")
+    for step, ms in profile["remeasured_ms"].items():
+        print(f"  {step + ' (re-measured)':<26} {ms:10.2f}ms")
+    print()
+    print(f"Slowest imports (of {profile['importtime']['modules']}):")
+    for m in profile["importtime"]["slowest"][:10]:
+        print(f"  {m['module']:<40} {m['cumulative_us'] / 1000:10.2f}ms")
+
+    with open(output, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"\nStartup profile written to {output}")
+    return 0
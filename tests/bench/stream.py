@@ -0,0 +1,260 @@
+"""
+Streaming resolution of name columns in large CSV/Parquet files
+
+resolve_stream() reads an input file in fixed-size chunks and yields one
+match_companies() result per chunk, and resolve_file() writes those results to
+a CSV or Parquet file as they are produced. Only one chunk (plus the company
+index) is held in memory at a time, so memory use does not grow with the size
+of the input.
+
+Also installed as a console script:
+
+    entityidentity-resolve input.csv output.parquet --name-col company --country-col cc
+
+``entityidentity-bench stream`` records peak RSS as the input grows.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from tests.bench.batch import RESULT_COLUMNS, match_companies
+from tests.bench.index import default_index
+
+CHUNK_ROWS = 100_000
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet. Install with: pip install pyarrow")
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+def iter_chunks(path, columns, chunksize=CHUNK_ROWS):
+    """Yield DataFrames of at most chunksize rows holding the given columns
+
+    CSV cells are read as strings with only empty cells treated as missing,
+    so names such as "NA" survive.
+    """
+    if _is_parquet(path):
+        _require_pyarrow()
+        reader = pq.ParquetFile(str(path))
+        for batch in reader.iter_batches(batch_size=chunksize, columns=list(columns)):
+            yield batch.to_pandas()
+    else:
+        reader = pd.read_csv(path, usecols=list(columns), dtype=str, keep_default_na=False,
+                             na_values=[""], chunksize=chunksize)
+        with reader:
+            yield from reader
+
+
+def resolve_stream(path, name_col="name", country_col=None, country=None,
+                   chunksize=CHUNK_ROWS, index=None):
+    """Resolve a name column chunk by chunk
+
+    Args:
+        path: Input CSV or Parquet file (format taken from the suffix)
+        name_col: Column holding company names
+        country_col: Optional column of per-row country codes
+        country: Country code for every row (ignored if country_col is given)
+        chunksize: Rows read and resolved at a time
+        index: CompanyIndex to match against (defaults to the bundled data)
+
+    Yields:
+        match_companies() DataFrames, one per chunk, indexed by input row number
+    """
+    index = index if index is not None else default_index()
+    columns = [name_col] + ([country_col] if country_col else [])
+    offset = 0
+    for chunk in iter_chunks(path, columns, chunksize):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        countries = chunk[country_col] if country_col else country
+        yield match_companies(chunk[name_col], countries, index=index)
+
+
+class _Writer:
+    """Append result chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._header = True
+        if self.parquet:
+            _require_pyarrow()
+            self._writer = pq.ParquetWriter(str(self.path), pa.schema([
+                ("query", pa.string()),
+                ("query_country", pa.string()),
+                ("name", pa.string()),
+                ("country", pa.string()),
+                ("lei", pa.string()),
+                ("score", pa.float64()),
+                ("decision", pa.string()),
+            ]))
+
+    def write(self, result):
+        if self.parquet:
+            table = pa.Table.from_pandas(result, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            result.to_csv(self.path, mode="w" if self._header else "a", header=self._header,
+                          index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._header:
+            pd.DataFrame(columns=RESULT_COLUMNS).to_csv(self.path, index=False)
+
+
+def resolve_file(input_path, output_path, name_col="name", country_col=None, country=None,
+                 chunksize=CHUNK_ROWS, index=None):
+    """Resolve a name column of input_path and write the matches to output_path
+
+    The output has one row per input row with columns query, query_country,
+    name, country, lei, score and decision (see match_companies).
+
+    Returns:
+        Dict with rows, chunks, matched (auto_high_conf rows) and seconds
+    """
+    start = time.perf_counter()
+    rows = chunks = matched = 0
+    writer = _Writer(output_path)
+    try:
+        for result in resolve_stream(input_path, name_col, country_col, country, chunksize,
+                                     index):
+            writer.write(result)
+            rows += len(result)
+            chunks += 1
+            matched += int((result["decision"] == "auto_high_conf").sum())
+    finally:
+        writer.close()
+    return {"rows": rows, "chunks": chunks, "matched": matched,
+            "seconds": time.perf_counter() - start}
+
+
+def write_synthetic_input(path, rows, chunk_rows=100_000, seed=0):
+    """Write a name,country file of the given length without holding it in memory
+
+    Rows repeat one block of synthetic queries, so large files are quick to
+    generate.
+
+    Returns:
+        Size of the written file in bytes
+    """
+    from tests.bench.corpus import synthetic_queries
+
+    block = synthetic_queries(min(rows, chunk_rows), default_index().companies, seed=seed)
+    path = Path(path)
+    if _is_parquet(path):
+        _require_pyarrow()
+        table = pa.Table.from_pandas(block, preserve_index=False)
+        with pq.ParquetWriter(str(path), table.schema) as writer:
+            for start in range(0, rows, len(block)):
+                writer.write_table(table.slice(0, rows - start))
+    else:
+        for start in range(0, rows, len(block)):
+            block.head(rows - start).to_csv(path, mode="a" if start else "w",
+                                            header=not start, index=False)
+    return path.stat().st_size
+
+
+# Executed in a fresh interpreter so peak RSS reflects only the streaming run
+_STREAM_PROBE = r"""
+import json, sys
+from tests.bench.index import default_index
+from tests.bench.stream import resolve_file
+from tests.bench.timing import peak_rss, process_memory, reset_peak_rss
+source, target, chunksize = sys.argv[1], sys.argv[2], int(sys.argv[3])
+default_index()
+reset_peak_rss()
+before = process_memory()["rss"]
+stats = resolve_file(source, target, country_col="country", chunksize=chunksize)
+stats["peak_rss_delta"] = max(0, peak_rss() - before)
+print(json.dumps(stats))
+"""
+
+
+def measure_stream(input_path, output_path, chunksize=CHUNK_ROWS):
+    """Run resolve_file in a subprocess and report its peak RSS growth
+
+    Returns:
+        resolve_file() stats plus peak_rss_delta in bytes, measured from after
+        the imports and index load
+    """
+    proc = subprocess.run(
+        [sys.executable, "-c", _STREAM_PROBE, str(input_path), str(output_path),
+         str(chunksize)],
+        capture_output=True, text=True, cwd=str(Path(__file__).resolve().parents[2]),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Stream probe failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def stream_memory(sizes, directory, chunksize=CHUNK_ROWS, fmt="csv"):
+    """Measure time and peak memory of resolve_file at several input sizes
+
+    Returns:
+        List of dicts with rows, input_mb, rows_per_sec and peak_rss_mb
+    """
+    directory = Path(directory)
+    results = []
+    for rows in sizes:
+        source = directory / f"input_{rows}.{fmt}"
+        target = directory / f"output_{rows}.{fmt}"
+        size = write_synthetic_input(source, rows)
+        stats = measure_stream(source, target, chunksize)
+        source.unlink()
+        target.unlink()
+        results.append({
+            "rows": rows,
+            "input_mb": size / 2**20,
+            "rows_per_sec": stats["rows"] / stats["seconds"],
+            "peak_rss_mb": stats["peak_rss_delta"] / 2**20,
+            "matched": stats["matched"],
+        })
+    return results
+
+
+def main(argv=None):
+    """Console entry point: entityidentity-resolve INPUT OUTPUT [options]"""
+    parser = argparse.ArgumentParser(
+        prog="entityidentity-resolve",
+        description="Resolve a company name column of a CSV/Parquet file in chunks",
+    )
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--name-col", default="name", help="Column with company names")
+    parser.add_argument("--country-col", default=None, help="Column with country codes")
+    parser.add_argument("--country", default=None, help="Country code for every row")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Rows per chunk")
+    args = parser.parse_args(argv)
+
+    stats = resolve_file(args.input, args.output, name_col=args.name_col,
+                         country_col=args.country_col, country=args.country,
+                         chunksize=args.chunksize)
+    print(f"Resolved {stats['rows']:,} rows in {stats['chunks']} chunks "
+          f"({stats['seconds']:.1f}s): {stats['matched']:,} auto_high_conf matches "
+          f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Prefix autocomplete over name_norm
+
+Calling resolve_company on every keystroke scores the whole candidate block
+each time. suggest_companies(prefix, country=None, k=10) instead looks the
+prefix up in a sorted array of name_norm values (one bisect for each end of
+the range) and returns the k highest-ranked companies in that range.
+
+Short prefixes ("a", "mi") cover huge ranges, so the top-k of every prefix
+with more than ``HEAVY_RANGE`` names is computed when the index is built and
+returned as a stored tuple. Every other range is small enough for a heap
+scan. Either way a call allocates little more than its result.
+
+Ranking uses a stored popularity column when the data has one, and otherwise
+a quality signal: has an LEI, then the number of aliases. Ties go to the
+shorter, then alphabetically first, name.
+
+``entityidentity-bench suggest`` times it keystroke by keystroke.
+"""
+import bisect
+import heapq
+import re
+import time
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from tests.bench.index import ALIAS_COLUMNS
+from tests.bench.threads import once
+
+HEAVY_RANGE = 256
+POPULARITY_COLUMN = "popularity"
+
+Suggestion = namedtuple("Suggestion", ["name", "name_norm", "country", "lei", "popularity"])
+
+_PUNCT_RE = re.compile(r"[^a-z0-9&\-\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def prefix_key(prefix):
+    """Normalize typed text the way name_norm is, without suffix stripping
+
+    Legal suffixes are left alone because a half-typed word ("co", "inc")
+    is usually the start of a name. A trailing space is kept as one space,
+    so "rio " matches "rio tinto" but not "rioxx".
+    """
+    text = unicodedata.normalize("NFKD", prefix or "").encode("ascii", "ignore").decode("ascii")
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text.lower())).lstrip()
+
+
+def quality_signal(companies):
+    """Default ranking signal: 1 for an LEI plus 0.1 per alias"""
+    score = companies["lei"].notna().to_numpy(dtype=float) if "lei" in companies else 0.0
+    for col in ALIAS_COLUMNS:
+        if col in companies:
+            score = score + 0.1 * companies[col].notna().to_numpy(dtype=float)
+    return np.broadcast_to(np.asarray(score, dtype=float), (len(companies),))
+
+
+class PrefixIndex:
+    """Sorted name_norm array with precomputed top-k for heavy prefixes
+
+    Args:
+        companies: DataFrame shaped like list_companies()
+        popularity: Optional array/Series aligned with companies, or a column
+            name; defaults to the "popularity" column or quality_signal()
+        k_max: Largest k served from the precomputed heavy-prefix results
+    """
+
+    def __init__(self, companies, popularity=None, k_max=10):
+        self.k_max = k_max
+        if popularity is None:
+            popularity = (companies[POPULARITY_COLUMN] if POPULARITY_COLUMN in companies
+                          else quality_signal(companies))
+        elif isinstance(popularity, str):
+            popularity = companies[popularity]
+        popularity = np.asarray(popularity, dtype=float)
+
+        norms = companies["name_norm"].fillna("").astype(str).to_numpy(dtype=object)
+        countries = companies["country"].to_numpy(dtype=object)
+        # Global rank: most popular first, then shorter, then alphabetical
+        lengths = np.fromiter((len(n) for n in norms), dtype=np.int64, count=len(norms))
+        by_rank = np.lexsort((norms, lengths, -popularity))
+        self._names = companies["name"].to_numpy(dtype=object)[by_rank].tolist()
+        self._norms = norms[by_rank].tolist()
+        self._countries = countries[by_rank].tolist()
+        self._leis = [None if pd.isna(lei) else lei for lei in _column(companies, "lei")[by_rank]]
+        self._popularity = popularity[by_rank].tolist()
+        rank = np.empty(len(norms), dtype=np.int64)
+        rank[by_rank] = np.arange(len(norms))
+
+        self._partitions = {None: self._partition(norms, rank)}
+        valid = pd.notna(countries)
+        for code in pd.unique(countries[valid]):
+            rows = np.flatnonzero(countries == code)
+            self._partitions[code] = self._partition(norms[rows], rank[rows])
+
+    def _partition(self, norms, rank):
+        """Sorted keys, their ranks and the top-k of every heavy prefix"""
+        order = np.lexsort((rank, norms))
+        keys = norms[order].tolist()
+        ranks = rank[order]
+        heavy = {}
+        self._heavy_prefixes(keys, ranks, 0, len(keys), 0, heavy)
+        return keys, ranks.tolist(), heavy
+
+    def _heavy_prefixes(self, keys, ranks, lo, hi, depth, heavy):
+        """Store top-k for prefixes of keys[lo:hi] (sharing depth chars) with many names"""
+        prefix = keys[lo][:depth] if lo < hi else ""
+        if hi - lo <= HEAVY_RANGE:
+            return
+        top = np.sort(ranks[lo:hi])[:self.k_max]
+        heavy[prefix] = tuple(self._suggestion(r) for r in top.tolist())
+        # Split [lo, hi) by the next character; keys of length depth come first
+        start = lo
+        while start < hi and len(keys[start]) <= depth:
+            start += 1
+        while start < hi:
+            char = keys[start][depth]
+            end = bisect.bisect_left(keys, keys[start][:depth] + chr(ord(char) + 1), start, hi)
+            self._heavy_prefixes(keys, ranks, start, end, depth + 1, heavy)
+            start = end
+
+    def suggest(self, prefix, country=None, k=10):
+        """Top-k Suggestions whose name_norm starts with the normalized prefix
+
+        Args:
+            prefix: Text typed so far
+            country: Optional country code restricting suggestions
+            k: Number of suggestions
+
+        Returns:
+            Tuple of Suggestion(name, name_norm, country, lei, popularity),
+            best first
+        """
+        partition = self._partitions.get(country.upper() if country else None)
+        if partition is None or k <= 0:
+            return ()
+        keys, ranks, heavy = partition
+        key = prefix_key(prefix)
+        if k <= self.k_max:
+            cached = heavy.get(key)
+            if cached is not None:
+                return cached[:k]
+        lo = bisect.bisect_left(keys, key)
+        hi = bisect.bisect_left(keys, key + "\U0010ffff", lo)
+        return tuple(self._suggestion(r) for r in heapq.nsmallest(k, ranks[lo:hi]))
+
+    def _suggestion(self, r):
+        """Suggestion for the company with global rank r"""
+        return Suggestion(self._names[r], self._norms[r], self._countries[r], self._leis[r],
+                          self._popularity[r])
+
+
+def _column(companies, col):
+    if col in companies:
+        return companies[col].to_numpy(dtype=object)
+    return np.full(len(companies), None, dtype=object)
+
+
+@once
+def default_prefix_index():
+    """PrefixIndex over the bundled data (the rows list_companies() returns)"""
+    from entityidentity import list_companies
+
+    return PrefixIndex(list_companies())
+
+
+def suggest_companies(prefix, country=None, k=10):
+    """Suggest up to k companies whose normalized name starts with prefix
+
+    Returns:
+        Tuple of Suggestion namedtuples (name, name_norm, country, lei,
+        popularity), most popular first
+    """
+    return default_prefix_index().suggest(prefix, country, k)
+
+
+def keystroke_latency(index, names, country=None, k=10):
+    """Type each name one character at a time and time every suggest call
+
+    Returns:
+        Dict with calls and p50/p99/max latency in microseconds
+    """
+    from tests.bench.timing import percentile
+
+    latencies = []
+    for name in names:
+        for end in range(1, len(name) + 1):
+            start = time.perf_counter()
+            index.suggest(name[:end], country, k)
+            latencies.append(time.perf_counter() - start)
+    return {
+        "calls": len(latencies),
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "max_us": max(latencies) * 1e6,
+    }
@@ -0,0 +1,150 @@
+"""
+asyncio resolver: bounded executor, backpressure, coalescing and loop lag
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tests.bench.aio import AsyncResolver, loop_lag_benchmark
+from tests.bench.corpus import synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex, default_index
+
+
+class SlowResolve:
+    """resolve() stand-in that sleeps and records concurrency"""
+
+    def __init__(self, seconds=0.02):
+        self.seconds = seconds
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, name, country=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.active -= 1
+        return {"query": {"name": name, "country": country}, "final": {"name": name.upper()}}
+
+
+def test_results_equal_sync_resolve():
+    """Test aresolve_companies returns what the synchronous resolve returns"""
+    index = default_index()
+    names = ["BHP Group", "Rio Tinto", "Glencore", "Nonexistent Widgets"]
+    resolver = AsyncResolver(index.resolve)
+    try:
+        results = asyncio.run(resolver.aresolve_companies(names, "AU"))
+    finally:
+        resolver.close()
+
+    assert [r["final"] for r in results] == [index.resolve(n, "AU")["final"] for n in names]
+    assert [r["query"]["name"] for r in results] == names
+
+
+def test_identical_requests_coalesce():
+    """Test concurrent identical requests share one computation"""
+    slow = SlowResolve()
+    resolver = AsyncResolver(slow)
+    names = ["Apple Inc", "apple inc.", "APPLE", "Apple Inc"] * 5
+    try:
+        results = asyncio.run(resolver.aresolve_companies(names, "us"))
+    finally:
+        resolver.close()
+
+    assert slow.calls == 1
+    assert resolver.stats()["coalesced"] == len(names) - 1
+    # Each caller still sees its own query
+    assert [r["query"]["name"] for r in results] == names
+
+
+def test_backpressure_bounds_work_in_flight():
+    """Test no more than max_pending resolutions are queued or running at once"""
+    slow = SlowResolve(seconds=0.01)
+    resolver = AsyncResolver(slow, max_workers=2, max_pending=3)
+    try:
+        asyncio.run(resolver.aresolve_companies([f"Company {i}" for i in range(30)]))
+    finally:
+        resolver.close()
+
+    assert slow.calls == 30
+    assert slow.peak <= 2
+    assert resolver.stats()["peak_pending"] == 3
+    assert resolver.stats()["in_flight"] == 0
+
+
+def test_many_names_do_not_create_a_task_each():
+    """Test a long list is fed through a bounded number of tasks, in input order"""
+    resolver = AsyncResolver(SlowResolve(seconds=0.001), max_workers=2, max_pending=4)
+    names = [f"Company {i}" for i in range(300)]
+    peak_tasks = []
+
+    async def run():
+        stop = asyncio.Event()
+
+        async def sample():
+            while not stop.is_set():
+                peak_tasks.append(len(asyncio.all_tasks()))
+                await asyncio.sleep(0)
+
+        sampler = asyncio.ensure_future(sample())
+        results = await resolver.aresolve_companies(names)
+        stop.set()
+        await sampler
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        resolver.close()
+
+    assert [r["query"]["name"] for r in results] == names
+    # main + sampler + 4 feeders + at most 4 resolutions
+    assert max(peak_tasks) <= 10
+
+
+def test_errors_propagate_and_are_not_kept():
+    """Test an exception reaches every coalesced caller and is not reused"""
+    calls = []
+
+    def failing(name, country=None):
+        calls.append(name)
+        time.sleep(0.01)
+        raise KeyError(name)
+
+    resolver = AsyncResolver(failing)
+
+    async def run():
+        return await asyncio.gather(resolver.aresolve_company("Acme"),
+                                    resolver.aresolve_company("ACME"),
+                                    return_exceptions=True)
+
+    try:
+        first = asyncio.run(run())
+        second = asyncio.run(run())
+    finally:
+        resolver.close()
+
+    assert all(isinstance(e, KeyError) for e in first + second)
+    assert len(calls) == 2
+
+
+@pytest.mark.slow
+def test_event_loop_lag_stays_low_under_load():
+    """Test the loop keeps waking on time while 32 clients resolve concurrently"""
+    index = CompanyIndex(synthetic_companies(20_000, seed=7))
+    queries = [(name, None) for name in
+               synthetic_queries(120, index.companies, seed=8)["name"]]
+    results = loop_lag_benchmark(queries, index.resolve, concurrency=32)
+    for mode, r in results.items():
+        print(f"\n  {mode:<8} lag p99={r['lag_p99_ms']:8.1f}ms max={r['lag_max_ms']:8.1f}ms "
+              f"request p99={r['request_p99_ms']:8.1f}ms qps={r['qps']:7.0f}")
+
+    blocking, nonblocking = results["blocking"], results["async"]
+    assert nonblocking["lag_p99_ms"] < 50
+    assert nonblocking["lag_max_ms"] < blocking["lag_max_ms"] / 5
@@ -0,0 +1,74 @@
+"""
+MinHash LSH candidate retrieval
+"""
+import numpy as np
+import pytest
+
+from tests.bench.ann import MinHashIndex, ann_benchmark
+from tests.bench.corpus import synthetic_companies
+from tests.bench.index import CompanyIndex
+
+
+def test_minhash_finds_near_duplicates_within_country():
+    """Test near-duplicate names share buckets and the country scope filters"""
+    names = np.array(["bhp group", "rio tinto", "bhp billiton", "glencore"], dtype=object)
+    countries = np.array(["AU", "GB", "GB", "CH"], dtype=object)
+    index = MinHashIndex(names, countries)
+
+    assert 0 in index.candidates("bhp group")
+    assert 1 in index.candidates("rio tnto")
+    assert list(index.candidates("glencore", "CH")) == [3]
+    assert 3 not in index.candidates("glencore", "AU")
+    # Unknown countries fall back to all companies, as in entityidentity
+    assert 3 in index.candidates("glencore", "US")
+    assert len(index.candidates("")) == 0
+
+
+def test_bands_must_divide_signature():
+    """Test an invalid banding is rejected"""
+    with pytest.raises(ValueError):
+        MinHashIndex(np.array(["bhp"], dtype=object), np.array(["AU"]), num_perm=64, bands=5)
+
+
+@pytest.mark.bundled_data
+def test_minhash_resolves_bundled_companies(company_database):
+    """Test every bundled company still resolves to itself with LSH retrieval"""
+    index = CompanyIndex(company_database, blocking="minhash")
+    for name, country in zip(company_database["name"], company_database["country"]):
+        for hint in (country, None):
+            assert index.resolve(name, hint)["matches"][0]["name"] == name
+
+
+def test_minhash_saved_and_loaded_prebuilt(tmp_path):
+    """Test the LSH arrays round-trip through save/load and stay memory-mapped"""
+    companies = synthetic_companies(2_000, seed=3)
+    index = CompanyIndex(companies, blocking="minhash", blocking_options={"max_candidates": 50})
+    index.save(tmp_path)
+    loaded = CompanyIndex.load(tmp_path, companies=index.companies)
+
+    assert loaded.blocking == "minhash"
+    assert isinstance(loaded.shortlist_index.keys, np.memmap)
+    assert loaded.shortlist_index.max_candidates == 50
+    for norm, country in zip(index.name_norm[:50], index.country[:50]):
+        assert np.array_equal(loaded.block(norm, country), index.block(norm, country))
+
+
+@pytest.mark.slow
+def test_minhash_recall_and_latency():
+    """Test recall@5 against exhaustive scoring and that retrieval is faster"""
+    r = ann_benchmark([20_000], n_queries=60)[0]
+    assert r["mean_candidates"] <= 200
+    assert r["recall_at_k"] >= 0.75
+    assert r["confident_recall"] >= 0.9
+    assert r["ann_p50_ms"] < r["exact_p50_ms"]
+
+
+@pytest.mark.slow
+def test_minhash_recall_at_scale():
+    """Test recall and speedup hold at 300k companies"""
+    r = ann_benchmark([300_000], n_queries=40)[0]
+    print(f"\nrecall@5={r['recall_at_k']:.2f} confident={r['confident_recall']:.2f} "
+          f"ann p50={r['ann_p50_ms']:.1f}ms exact p50={r['exact_p50_ms']:.1f}ms")
+    assert r["recall_at_k"] >= 0.7
+    assert r["confident_recall"] >= 0.85
+    assert r["ann_p50_ms"] * 20 < r["exact_p50_ms"]
@@ -0,0 +1,180 @@
+"""
+Versioned performance baselines and regression gating
+"""
+import json
+
+import pytest
+
+from tests.bench.baseline import (METRICS, baseline_key, best_of, check_regressions,
+                                  collect_metrics, comparison_table, find_baseline, gate,
+                                  machine_fingerprint, parse_tolerances, record_baseline)
+
+FINGERPRINT = {"id": "abc123", "cpu": "test", "cpus": 1}
+METRIC_VALUES = {"p50_ms": 10.0, "p99_ms": 40.0, "throughput_qps": 200.0, "load_ms": 100.0,
+                 "error_rate": 0.0}
+
+
+def _measurement(version="1.0", **metrics):
+    return {"version": version, "rows": 9, "metrics": {**METRIC_VALUES, **metrics}}
+
+
+def test_fingerprint_is_stable():
+    """Test the machine fingerprint repeats and its id hashes the properties"""
+    first, second = machine_fingerprint(), machine_fingerprint()
+    assert first == second
+    assert len(first["id"]) == 12 and first["cpus"] >= 1
+    assert baseline_key("0.0.1", first) == f"0.0.1@{first['id']}"
+
+
+def test_regressions_respect_direction_tolerance_and_slack():
+    """Test lower/higher-is-better metrics, relative tolerance and absolute slack"""
+    baseline = METRIC_VALUES
+    assert check_regressions(baseline, baseline) == []
+    # Within 20%, or faster/higher-throughput: no regression
+    assert check_regressions({**baseline, "p50_ms": 11.9, "throughput_qps": 400}, baseline) == []
+
+    slower = check_regressions({**baseline, "p50_ms": 13.0, "throughput_qps": 150}, baseline)
+    assert [r["metric"] for r in slower] == ["p50_ms", "throughput_qps"]
+    assert slower[0]["change"] == pytest.approx(0.3)
+    assert slower[1]["change"] == pytest.approx(0.25)
+
+    # 50% worse but under the 0.5 ms slack
+    assert check_regressions({"p50_ms": 0.3}, {"p50_ms": 0.2}) == []
+    # Any new errors fail, and missing metrics are skipped
+    assert [r["metric"] for r in check_regressions({"error_rate": 0.1}, baseline)] == ["error_rate"]
+    assert check_regressions({"p50_ms": 10.0}, {"import_ms": 5.0}) == []
+
+
+def test_tolerance_options():
+    """Test a global tolerance and per-metric overrides"""
+    tolerance, overrides = parse_tolerances(["0.1", "p99_ms=1.0"])
+    assert tolerance == 0.1 and overrides == {"p99_ms": 1.0}
+    current = {**METRIC_VALUES, "p50_ms": 11.5, "p99_ms": 70.0}
+    assert [r["metric"] for r in check_regressions(current, METRIC_VALUES, tolerance,
+                                                   overrides)] == ["p50_ms"]
+    with pytest.raises(ValueError):
+        parse_tolerances(["p42_ms=0.1"])
+
+
+def test_best_of_runs():
+    """Test each metric keeps its best value across runs"""
+    runs = [{"p50_ms": 5.0, "throughput_qps": 100.0}, {"p50_ms": 4.0, "throughput_qps": 90.0}]
+    assert best_of(runs) == {"p50_ms": 4.0, "throughput_qps": 100.0}
+
+
+def test_baselines_keyed_by_version_and_machine(tmp_path):
+    """Test entries for other versions and machines are kept side by side"""
+    path = tmp_path / "baselines.json"
+    other_machine = {**FINGERPRINT, "id": "def456"}
+    record_baseline(path, _measurement("1.0"), FINGERPRINT)
+    record_baseline(path, _measurement("1.1", p50_ms=8.0), FINGERPRINT)
+    record_baseline(path, _measurement("1.0", p50_ms=30.0), other_machine)
+
+    assert len(json.loads(path.read_text())["baselines"]) == 3
+    assert find_baseline(path, "1.0", FINGERPRINT)["metrics"]["p50_ms"] == 10.0
+    assert find_baseline(path, "1.1", FINGERPRINT)["metrics"]["p50_ms"] == 8.0
+    assert find_baseline(path, "1.0", other_machine)["metrics"]["p50_ms"] == 30.0
+    assert find_baseline(path, "2.0", FINGERPRINT) is None
+
+
+def test_gate_records_then_fails_on_regression(tmp_path):
+    """Test the first run records, a same-speed run passes and a slow run fails"""
+    path = tmp_path / "baselines.json"
+    assert gate(path, _measurement(), fingerprint=FINGERPRINT)[0] == "recorded"
+    assert gate(path, _measurement(p50_ms=10.5), fingerprint=FINGERPRINT)[0] == "passed"
+
+    status, regressions, stored = gate(path, _measurement(p50_ms=20.0), fingerprint=FINGERPRINT)
+    assert status == "regressed" and regressions[0]["metric"] == "p50_ms"
+    assert stored["metrics"]["p50_ms"] == 10.0
+    # A looser tolerance accepts it; --update-baseline stores it
+    assert gate(path, _measurement(p50_ms=20.0), tolerance=1.5,
+                fingerprint=FINGERPRINT)[0] == "passed"
+    gate(path, _measurement(p50_ms=20.0), update=True, fingerprint=FINGERPRINT)
+    assert find_baseline(path, "1.0", FINGERPRINT)["metrics"]["p50_ms"] == 20.0
+
+
+def test_gate_refuses_measurements_with_errors(tmp_path):
+    """Test a run whose probed calls raised is neither recorded nor passed"""
+    path = tmp_path / "baselines.json"
+    failing = _measurement(error_rate=1.0)
+    assert gate(path, failing, fingerprint=FINGERPRINT) == ("errors", [], None)
+    assert gate(path, failing, update=True, fingerprint=FINGERPRINT)[0] == "errors"
+    assert not path.exists()
+
+    gate(path, _measurement(), fingerprint=FINGERPRINT)
+    status, _, stored = gate(path, failing, fingerprint=FINGERPRINT)
+    assert status == "errors" and stored["metrics"]["error_rate"] == 0.0
+
+
+def test_comparison_table():
+    """Test the markdown table marks changes better or worse by direction"""
+    table = comparison_table(_measurement("1.0"),
+                             _measurement("1.1", p50_ms=5.0, throughput_qps=100.0))
+    lines = table.splitlines()
+    assert lines[0] == "| Metric | entityidentity 1.0 | entityidentity 1.1 | Change |"
+    rows = {line.split("|")[1].strip(): line for line in lines[2:]}
+    assert len(rows) == len(METRICS)
+    assert "-50.0% (better)" in rows["p50_ms"]
+    assert "-50.0% (worse)" in rows["throughput_qps"]
+    assert rows["load_ms"].endswith("| = |")
+    assert rows["import_ms"].endswith("| - |")
+
+
+def test_compare_versions_warns_on_probe_errors(monkeypatch, tmp_path, capsys):
+    """Test a comparison where one side's probed calls raised is flagged and fails"""
+    from tests import run
+    from tests.bench import baseline
+
+    measurements = {None: _measurement("1.0"),
+                    "venv/bin/python": dict(_measurement("1.1", error_rate=1.0),
+                                            first_error="UnboundLocalError: alias_score")}
+    monkeypatch.setattr(baseline, "collect_metrics", lambda target=None: measurements[target])
+    output = tmp_path / "compare.md"
+    args = ["--compare-versions", "current", "venv/bin/python", "--compare-output", str(output)]
+    assert run.compare_versions(args) == 1
+    first = output.read_text().splitlines()[0]
+    assert "1.1" in first and "100%" in first and "UnboundLocalError" in first
+    assert capsys.readouterr().out.startswith(first)
+
+    measurements["venv/bin/python"] = _measurement("1.1")
+    assert run.compare_versions(args) == 0
+    assert output.read_text().startswith("| Metric |")
+
+
+def test_runner_options_need_their_values():
+    """Test a flag given last, without its value, is a usage error"""
+    from tests import run
+
+    assert run.pop_option(["-q", "--tolerance", "0.3"], "--tolerance") == (["-q"], [["0.3"]])
+    for args in (["--tolerance"], ["--baseline-file"], ["--tolerance", "--update-baseline"]):
+        with pytest.raises(run.UsageError):
+            run.baseline_options(["--perf-baseline"] + args)
+
+
+def test_collect_metrics_from_installed_package(tmp_path):
+    """Test the subprocess probe measures every metric of the installed version"""
+    from importlib.metadata import version
+
+    measurement = collect_metrics(runs=1, repeats=2)
+    assert measurement["version"] == version("entityidentity")
+    assert set(measurement["metrics"]) == set(METRICS)
+    if measurement["metrics"]["error_rate"]:
+        assert measurement["first_error"]
+    metrics = measurement["metrics"]
+    assert 0 < metrics["p50_ms"] <= metrics["p95_ms"] <= metrics["p99_ms"]
+    assert metrics["throughput_qps"] > 0 and metrics["peak_rss_mb"] > 0
+
+    # A directory target is put first on the child's path, shadowing the install;
+    # its version comes from the distribution metadata pip --target writes
+    shadow = tmp_path / "entityidentity"
+    shadow.mkdir()
+    (tmp_path / "entityidentity-9.9.dist-info").mkdir()
+    (tmp_path / "entityidentity-9.9.dist-info" / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: entityidentity\nVersion: 9.9\n")
+    (shadow / "__init__.py").write_text(
+        "import pandas as pd\n__version__ = 'shadow'\n"
+        "def list_companies():\n    return pd.DataFrame({'name': ['A']})\n"
+        "def resolve_company(name, country=None):\n    return {}\n")
+    shadowed = collect_metrics(tmp_path, runs=1, repeats=1)
+    assert shadowed["version"] == "9.9" and shadowed["rows"] == 1
+    assert shadowed["metrics"]["error_rate"] == 0 and shadowed["first_error"] is None
@@ -0,0 +1,133 @@
+"""
+LRU/TTL result cache in front of resolve_company
+"""
+import threading
+
+import pytest
+
+from tests.bench.cache import CachedResolver, ResultCache, cache_benchmark, zipf_stream
+from tests.bench.index import default_index
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    """Test the oldest untouched entry is evicted first and counted"""
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_ttl_expires_entries():
+    """Test entries older than the TTL are treated as misses"""
+    clock = FakeClock()
+    cache = ResultCache(maxsize=10, ttl=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cached_results_match_uncached_under_eviction():
+    """Test every cached answer equals a fresh resolve even while evicting"""
+    index = default_index()
+    resolver = CachedResolver(index.resolve, maxsize=3, data_source=lambda: index)
+    names = ["BHP Group", "bhp group ltd", "Glencore", "Rio Tinto", "Barrick Gold",
+             "BHP Group", "Glencore plc", "Antofagasta", "XYZABC123NOTREAL9999"] * 3
+
+    for name in names:
+        cached = resolver.resolve_company(name, country="AU")
+        assert cached == index.resolve(name, "AU")
+
+    stats = resolver.stats()
+    assert stats["evictions"] > 0
+    assert stats["hits"] > 0
+    assert stats["size"] <= 3
+
+
+def test_cache_keyed_on_normalized_name_and_country():
+    """Test name variants share an entry but countries do not"""
+    index = default_index()
+    resolver = CachedResolver(index.resolve, data_source=lambda: index)
+    resolver.match_company("BHP Group Ltd", country="au")
+    resolver.match_company("BHP GROUP LIMITED", country="AU")
+    resolver.match_company("BHP Group Ltd")
+
+    assert resolver.stats()["hits"] == 1
+    assert resolver.stats()["misses"] == 2
+
+
+def test_cache_invalidated_when_data_reloaded():
+    """Test a reload of the company data clears the cache"""
+    data = {"version": object()}
+    calls = []
+
+    def resolve(name, country=None):
+        calls.append(name)
+        return {"query": {"name": name, "country": country}, "final": None}
+
+    resolver = CachedResolver(resolve, data_source=lambda: data["version"])
+    resolver.match_company("Apple")
+    resolver.match_company("Apple")
+    data["version"] = object()  # simulate list_companies() data being reloaded
+    resolver.match_company("Apple")
+
+    assert calls == ["Apple", "Apple"]
+    assert resolver.stats()["invalidations"] == 1
+
+
+def test_cache_is_thread_safe():
+    """Test concurrent lookups keep counters and size consistent"""
+    cache = ResultCache(maxsize=50)
+
+    def worker(seed):
+        for i in range(2000):
+            key = (seed * 7 + i) % 100
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 2000
+    assert stats["size"] <= 50
+
+
+def test_zipf_stream_is_skewed():
+    """Test the most popular item dominates a Zipf stream"""
+    stream = zipf_stream(list(range(1000)), 10_000, exponent=1.2)
+    assert stream.count(0) > stream.count(999) * 20
+
+
+@pytest.mark.slow
+def test_cache_speedup_on_zipf_stream():
+    """Test a small cache absorbs most of a Zipf-distributed stream"""
+    result = cache_benchmark(n=5_000, vocabulary_size=2_000, maxsize=500)
+    print(f"\nhit rate={result['stats']['hit_rate']:.2%} "
+          f"uncached={result['uncached_qps']:.0f} qps cached={result['cached_qps']:.0f} qps "
+          f"speedup={result['speedup']:.1f}x")
+    assert result["stats"]["hit_rate"] > 0.5
+    assert result["speedup"] > 1
@@ -0,0 +1,68 @@
+"""
+Memory-mapped columnar company storage versus the pandas loader
+"""
+import pandas as pd
+import pytest
+
+from tests.bench.columnar import ColumnarCompanies, measure_loader, write_columnar
+from tests.bench.corpus import synthetic_companies
+
+FILTERS = [
+    {},
+    {"country": "au"},
+    {"search": "mining"},
+    {"country": "GB", "search": "an", "limit": 2},
+    {"limit": 3},
+    {"search": "o", "limit": 4},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_columnar_matches_list_companies(tmp_path, filters):
+    """Test filtered columnar reads return exactly what list_companies returns"""
+    from entityidentity import list_companies
+
+    path = write_columnar(list_companies(), tmp_path / "companies.arrow")
+    table = ColumnarCompanies(path)
+    pd.testing.assert_frame_equal(table.list_companies(**filters), list_companies(**filters))
+
+
+@pytest.fixture(scope="module")
+def large_tables(tmp_path_factory):
+    """A 200k-row synthetic database written as Parquet and as Arrow IPC"""
+    directory = tmp_path_factory.mktemp("columnar")
+    companies = synthetic_companies(200_000)
+    companies.to_parquet(directory / "companies.parquet")
+    write_columnar(companies, directory / "companies.arrow")
+    return directory / "companies.parquet", directory / "companies.arrow"
+
+
+@pytest.mark.slow
+def test_columnar_open_time_and_rss_beat_pandas_loader(large_tables):
+    """Test opening and a filtered call use less time and memory than a full load"""
+    parquet_path, arrow_path = large_tables
+    pandas_load = measure_loader("pandas", parquet_path, country="US", limit=10)
+    columnar = measure_loader("columnar", arrow_path, country="US", limit=10)
+
+    print(f"\npandas:   open={pandas_load['open_seconds'] * 1000:.1f}ms "
+          f"peak +{pandas_load['peak_rss_delta'] / 2**20:.1f}MB")
+    print(f"columnar: open={columnar['open_seconds'] * 1000:.1f}ms "
+          f"peak +{columnar['peak_rss_delta'] / 2**20:.1f}MB")
+
+    assert columnar["rows"] == pandas_load["rows"] == 10
+    assert columnar["open_seconds"] < pandas_load["open_seconds"]
+    assert columnar["peak_rss_delta"] < pandas_load["peak_rss_delta"]
+
+
+@pytest.mark.slow
+def test_columnar_filters_match_on_large_table(large_tables):
+    """Test country/search/limit results agree with the pandas path at scale"""
+    from entityidentity.companies.companyidentity import list_companies
+
+    parquet_path, arrow_path = large_tables
+    table = ColumnarCompanies(arrow_path)
+    for filters in [{"country": "US", "limit": 10}, {"search": "gold", "limit": 5},
+                    {"country": "de", "search": "bank"}]:
+        expected = list_companies(data_path=str(parquet_path), **filters)
+        pd.testing.assert_frame_equal(table.list_companies(**filters), expected,
+                                      check_dtype=False)
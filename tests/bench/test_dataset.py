@@ -0,0 +1,126 @@
+"""
+Scaled synthetic company databases
+"""
+import pandas as pd
+import pytest
+
+from tests.bench.dataset import (BLOCK_ROWS, NOISE_KINDS, UNKNOWN_SYLLABLES, dataset_benchmark,
+                                 generate_companies, generate_queries, is_valid_lei,
+                                 lei_check_digits, use_database, write_database)
+from tests.bench.index import CompanyIndex
+
+
+@pytest.fixture(scope="module")
+def companies():
+    return generate_companies(20_000, seed=7)
+
+
+def test_generated_schema_matches_list_companies(companies):
+    """Test the generated table has list_companies()'s columns"""
+    from entityidentity import list_companies
+
+    assert list(companies.columns) == list(list_companies().columns)
+    assert len(companies) == 20_000
+
+
+def test_generated_keys_unique_and_leis_valid(companies):
+    """Test (name_norm, country) is unique and every LEI has valid check digits"""
+    named = companies[companies["name_norm"] != ""]
+    assert not named.duplicated(["name_norm", "country"]).any()
+    assert not companies.duplicated(["name", "country"]).any()
+    leis = companies["lei"].dropna()
+    assert 0.25 < len(leis) / len(companies) < 0.35
+    assert leis.is_unique and all(is_valid_lei(lei) for lei in leis)
+
+
+def test_lei_check_digits():
+    """Test ISO 7064 MOD 97-10 check digits on a published LEI"""
+    assert lei_check_digits("HWUPKR0MPOU8FGXBT3") == "94"
+    assert is_valid_lei("HWUPKR0MPOU8FGXBT394")
+    assert not is_valid_lei("HWUPKR0MPOU8FGXBT395")
+    assert not is_valid_lei("SHORT")
+
+
+def test_generated_mix_is_skewed_and_unicode(companies):
+    """Test the country mix is skewed and names include unicode and native scripts"""
+    shares = companies["country"].value_counts(normalize=True)
+    assert shares.index[0] == "US" and 0.25 < shares.iloc[0] < 0.35
+    assert shares.iloc[-1] < 0.01 and len(shares) == 30
+    assert companies["name"].str.contains("[À-ɏ]").any()
+    assert companies["name"].str.contains("株式会社|有限公司|주식회사").any()
+    assert companies["alias1"].notna().mean() > 0.1
+
+
+def test_generation_is_deterministic_and_prefix_stable():
+    """Test the same seed repeats, and a smaller table is a prefix of a larger one"""
+    large = generate_companies(BLOCK_ROWS + 2_000, seed=1)
+    small = generate_companies(5_000, seed=1)
+    pd.testing.assert_frame_equal(small, large.iloc[:5_000])
+    pd.testing.assert_frame_equal(large.iloc[BLOCK_ROWS:], generate_companies(
+        BLOCK_ROWS + 2_000, seed=1).iloc[BLOCK_ROWS:])
+    assert not generate_companies(5_000, seed=2)["name"].equals(small["name"])
+
+
+def test_queries_have_ground_truth(companies):
+    """Test known queries resolve to their expected rows and unknown ones are invented"""
+    queries = generate_queries(companies, 300, seed=3)
+    assert set(queries["noise"]) <= set(NOISE_KINDS) | {"unknown"}
+    unknown = queries[queries["expected_row"] < 0]
+    assert len(unknown) and all(any(s in name.lower() for s in UNKNOWN_SYLLABLES)
+                                for name in unknown["name"])
+
+    index = CompanyIndex(companies)
+    known = queries[queries["expected_row"] >= 0]
+    hits = 0
+    for name, country, row in zip(known["name"], known["country"], known["expected_row"]):
+        result = index.resolve(name, None if pd.isna(country) else country)
+        hits += bool(result["matches"]) and result["matches"][0]["name"] == \
+            companies["name"].iat[row]
+    assert hits / len(known) > 0.85
+    exact = known[known["noise"] == "exact"]
+    assert (companies["lei"].iloc[exact["expected_row"]].fillna("").to_numpy()
+            == exact["expected_lei"].fillna("").to_numpy()).all()
+
+    minimal = generate_queries(companies[["name", "country"]], 50, seed=4)
+    assert len(minimal) == 50 and minimal["expected_lei"].isna().all()
+
+
+def test_streamed_parquet_equals_generated(tmp_path):
+    """Test the block-by-block parquet writer stores the generated table"""
+    path = write_database(tmp_path / "companies.parquet", 3_000, seed=5)
+    written = pd.read_parquet(path)
+    expected = generate_companies(3_000, seed=5)
+    for col in ["name", "name_norm", "country", "lei", "alias1", "alias2"]:
+        assert written[col].fillna("").tolist() == expected[col].fillna("").tolist(), col
+
+
+def test_use_database_replaces_bundled_data(tmp_path):
+    """Test entityidentity and the bench indexes load the synthetic table inside the block"""
+    from entityidentity import list_companies
+    from tests.bench.index import default_index
+
+    before = len(list_companies())
+    path = write_database(tmp_path / "companies.parquet", 2_000, seed=6, include_bundled=True)
+    other = write_database(tmp_path / "other.parquet", 500, seed=7)
+    with use_database(path):
+        companies = list_companies()
+        assert (companies["source"] == "synthetic").sum() == 2_000
+        assert "BHP Group Limited" in set(companies["name"])
+        assert len(default_index()) == len(companies)
+        name = companies["name"].iat[-10]
+        assert default_index().match(name)["name"] == name
+        # An explicit data_path still wins
+        explicit = list_companies.__globals__["_load_companies"](str(other))
+        assert len(explicit) == 500 and explicit["name"].iat[0] != companies["name"].iat[0]
+    assert len(list_companies()) == before
+    assert len(default_index()) == before
+
+
+@pytest.mark.slow
+def test_million_row_database():
+    """Test a 1M-row database writes, loads and resolves with known accuracy"""
+    r = dataset_benchmark([1_000_000], n_queries=100)[0]
+    print(f"\n1M rows: write={r['write_seconds']:.1f}s ({r['rows_per_second']:,.0f} rows/s) "
+          f"file={r['file_mb']:.0f}MB load={r['load_seconds']:.2f}s "
+          f"accuracy={r['match_accuracy']:.2f}")
+    assert r["match_accuracy"] > 0.7
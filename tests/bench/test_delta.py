@@ -0,0 +1,113 @@
+"""
+Incremental add/modify/delete deltas with versioned snapshots
+"""
+import threading
+
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import synthetic_companies, synthetic_queries
+from tests.bench.delta import DEFAULT_KEY, LiveIndex, delta_benchmark, synthetic_delta
+from tests.bench.index import CompanyIndex
+
+DELTA = pd.DataFrame([
+    {"op": "add", "name": "Acme Lithium Limited", "country": "AU", "lei": "5493001KJTIIGC8Y1R12"},
+    {"op": "modify", "name": "Glencore plc", "country": "GB", "alias1": "Glencore International"},
+    {"op": "delete", "name": "Rio Tinto Limited", "country": "AU"},
+])
+
+
+def test_delta_applies_add_modify_delete():
+    """Test adds resolve, deletes disappear and modifies take effect"""
+    live = LiveIndex()
+    before = live.snapshot()
+    assert live.apply(DELTA) == 1 == live.version
+
+    assert live.match_company("Acme Lithium", "AU")["lei"] == "5493001KJTIIGC8Y1R12"
+    assert live.match_company("Rio Tinto", "AU") is None
+    glencore = live.resolve_company("Glencore International", "GB")["matches"][0]
+    assert glencore["aliases"] == ["Glencore International"]
+    assert len(live.snapshot()) == len(before)
+
+    # A snapshot taken before the swap still answers from version 0
+    assert before.match_company("Rio Tinto", "AU")["name"] == "Rio Tinto Limited"
+    assert live.snapshot(0) is before
+    assert "Rio Tinto Limited" not in live.snapshot().list_companies(country="AU")["name"].tolist()
+
+
+def test_delta_file_and_matching_rebuild(tmp_path):
+    """Test a CSV delta gives the same answers as an index rebuilt from the new table"""
+    path = tmp_path / "delta.csv"
+    DELTA.to_csv(path, index=False)
+    live = LiveIndex()
+    live.apply(path)
+
+    rebuilt = CompanyIndex(live.snapshot().companies())
+    for name, country in [("Acme Lithium", None), ("Glencore", "GB"), ("Rio Tinto", "AU"),
+                          ("BHP", None), ("Anglo American", "GB")]:
+        assert live.resolve_company(name, country) == rebuilt.resolve(name, country)
+
+
+@pytest.mark.parametrize("row", [
+    {"op": "add", "name": "BHP Group Limited", "country": "AU"},
+    {"op": "modify", "name": "No Such Company", "country": "AU"},
+    {"op": "delete", "name": "No Such Company", "country": "AU"},
+    {"op": "upsert", "name": "BHP Group Limited", "country": "AU"},
+])
+def test_invalid_delta_leaves_version_unchanged(row):
+    """Test a rejected delta raises and publishes nothing"""
+    live = LiveIndex()
+    with pytest.raises(ValueError):
+        live.apply(pd.DataFrame([DELTA.iloc[0].to_dict(), row]))
+    assert live.version == 0
+    assert live.match_company("Acme Lithium", "AU") is None
+
+
+def test_readers_keep_consistent_snapshots():
+    """Test concurrent readers see whole versions while deltas are applied"""
+    live = LiveIndex()
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            snapshot = live.snapshot()
+            present = snapshot.match_company("Acme Lithium", "AU") is not None
+            try:
+                assert present == (snapshot.version % 2 == 1)
+            except AssertionError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(6):
+        op = "add" if i % 2 == 0 else "delete"
+        live.apply(pd.DataFrame([{"op": op, "name": "Acme Lithium Limited", "country": "AU"}]))
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert live.version == 6
+
+
+@pytest.mark.slow
+def test_delta_on_large_base():
+    """Test a 2.5k-row delta on 200k companies matches a rebuild and is faster"""
+    base = synthetic_companies(200_000, seed=9).drop_duplicates(list(DEFAULT_KEY))
+    live = LiveIndex(base)
+    delta = synthetic_delta(base, n_add=1_000, n_modify=1_000, n_delete=500, seed=9)
+    live.apply(delta)
+
+    rebuilt = CompanyIndex(live.snapshot().companies())
+    changed = delta[["name", "country"]].sample(150, random_state=0)
+    queries = pd.concat([changed, synthetic_queries(150, base, seed=10)], ignore_index=True)
+    for name, country in queries.itertuples(index=False):
+        country = None if pd.isna(country) else country
+        assert live.resolve_company(name, country) == rebuilt.resolve(name, country), name
+
+    result = delta_benchmark(200_000)
+    print(f"\n  apply={result['apply_seconds']:.2f}s rebuild={result['rebuild_seconds']:.2f}s "
+          f"speedup={result['speedup']:.1f}x")
+    assert result["speedup"] > 1.5
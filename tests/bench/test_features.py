@@ -0,0 +1,115 @@
+"""
+Precomputed matching-feature sidecar
+"""
+import numpy as np
+import pytest
+
+from tests.bench.corpus import corpus_queries
+from tests.bench.dataset import generate_queries, write_database
+from tests.bench.features import (FeatureIndex, build_sidecar, bundled_data_file,
+                                  features_benchmark, open_index, read_sidecar, sidecar_path)
+from tests.bench.index import BLOCKING_MODES, CompanyIndex
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    from entityidentity.companies.companyidentity import load_companies
+
+    path = write_database(tmp_path_factory.mktemp("features") / "companies.parquet", 5_000,
+                          seed=11)
+    return path, load_companies.__wrapped__(str(path))
+
+
+@pytest.mark.parametrize("blocking", BLOCKING_MODES)
+def test_sidecar_equals_fresh_computation(database, tmp_path, blocking):
+    """Test every feature array and resolve result loaded from the sidecar matches a rebuild"""
+    path, companies = database
+    sidecar = build_sidecar(path, tmp_path / "companies.features", blocking=blocking)
+    loaded = FeatureIndex.load(sidecar, companies, data_path=path)
+    fresh = CompanyIndex(companies, blocking=blocking)
+
+    queries = generate_queries(companies, 100, seed=2)
+    for name, country in zip(queries["name"], queries["country"]):
+        country = None if country != country else country
+        assert loaded.resolve(name, country) == fresh.resolve(name, country), name
+
+    loaded_arrays, fresh_arrays = loaded.to_arrays(), fresh.to_arrays()
+    assert set(loaded_arrays) == set(fresh_arrays)
+    for name, array in fresh_arrays.items():
+        assert np.array_equal(loaded_arrays[name], array), name
+
+
+def test_bundled_sidecar_resolves_corpus(tmp_path):
+    """Test the packaging step on the bundled data file and the corpus through open_index"""
+    data_path = bundled_data_file()
+    sidecar = build_sidecar(output=tmp_path / "companies.features")
+    assert sidecar_path(data_path).name == "companies.features"
+
+    index = open_index(sidecar=sidecar)
+    assert isinstance(index, FeatureIndex)
+    fresh = CompanyIndex(index.companies)
+    for name, country in corpus_queries():
+        assert index.resolve(name, country) == fresh.resolve(name, country), name
+
+
+def test_blocking_keys_decode_per_scope(database, tmp_path):
+    """Test loading decodes no blocking keys and a query decodes only its scope"""
+    path, companies = database
+    index = FeatureIndex.load(build_sidecar(path, tmp_path / "c.features"), companies)
+    assert index._block_keys == {}
+    index.resolve("Anything Holdings", "GB")
+    assert list(index._block_keys) == ["GB"]
+
+
+def test_sidecar_is_compact(database, tmp_path):
+    """Test countries are interned, row ids narrowed and the file beats .npy arrays"""
+    path, companies = database
+    sidecar = build_sidecar(path, tmp_path / "c.features")
+    header, _ = read_sidecar(sidecar)
+    assert header["arrays"]["country"]["kind"] == "interned"
+    assert header["arrays"]["name_norm"]["kind"] == "text"
+    assert header["arrays"]["scope_rows"]["dtype"] == "<i4"
+
+    saved = CompanyIndex(companies).save(tmp_path / "npy")
+    npy_bytes = sum(p.stat().st_size for p in saved.glob("*.npy"))
+    assert sidecar.stat().st_size < npy_bytes / 2
+
+
+def test_stale_or_foreign_sidecar_refused(database, tmp_path):
+    """Test a sidecar from other data is refused and open_index rebuilds instead"""
+    path, companies = database
+    sidecar = build_sidecar(path, tmp_path / "c.features")
+    other = write_database(tmp_path / "other.parquet", 1_000, seed=12)
+
+    with pytest.raises(ValueError):
+        FeatureIndex.load(sidecar, data_path=other)
+    index = open_index(other, sidecar=sidecar)
+    assert type(index) is CompanyIndex and len(index) == 1_000
+
+    with pytest.raises(ValueError):
+        FeatureIndex.load(path)
+
+
+@pytest.mark.slow
+def test_time_to_first_query(tmp_path):
+    """Test a fresh process resolves sooner from the sidecar, with the same answer"""
+    r = features_benchmark([20_000], tmp_path, runs=1)[0]
+    fresh, sidecar = r["fresh"], r["sidecar"]
+    assert r["same_match"]
+    assert sidecar["index_seconds"] * 5 < fresh["index_seconds"]
+    # Interpreter start-up and imports are the same either way; compare the rest
+    assert (sidecar["index_seconds"] + sidecar["query_seconds"]
+            < fresh["index_seconds"] + fresh["query_seconds"])
+
+
+@pytest.mark.slow
+def test_time_to_first_query_at_scale(tmp_path):
+    """Test the sidecar saving at 500k companies"""
+    r = features_benchmark([500_000], tmp_path, runs=1)[0]
+    fresh, sidecar = r["fresh"], r["sidecar"]
+    print(f"\n500k: build={r['build_seconds']:.1f}s sidecar={r['sidecar_bytes'] / 2**20:.0f}MB "
+          f"index fresh={fresh['index_seconds']:.2f}s sidecar={sidecar['index_seconds']:.2f}s "
+          f"first query fresh={fresh['first_query_seconds']:.2f}s "
+          f"sidecar={sidecar['first_query_seconds']:.2f}s")
+    assert r["same_match"]
+    assert sidecar["first_query_seconds"] * 1.5 < fresh["first_query_seconds"]
@@ -0,0 +1,125 @@
+"""
+Seeded fuzz harness for pathological-latency inputs
+"""
+import pytest
+
+from tests.bench.corpus import synthetic_companies
+from tests.bench.fuzz import (CATEGORIES, SUPERLINEAR, fuzz_report, generate_inputs,
+                              growth_curves, growth_exponent, hot_prefixes, run_fuzz, run_inputs)
+
+
+def test_inputs_are_seeded_and_adversarial():
+    """Test a seed reproduces its inputs and every category is generated"""
+    companies = synthetic_companies(2_000, seed=51)
+    inputs = generate_inputs(100, companies, seed=5, max_length=2048)
+    assert inputs == generate_inputs(100, companies, seed=5, max_length=2048)
+    assert inputs != generate_inputs(100, companies, seed=6, max_length=2048)
+
+    assert {category for category, _, _ in inputs} == set(CATEGORIES)
+    assert max(len(name) for _, name, _ in inputs) == 2048
+    text = "".join(name for _, name, _ in inputs)
+    assert any(ord(ch) > 0xFFFF for ch in text) and any(0xD800 <= ord(ch) <= 0xDFFF for ch in text)
+    hot = [name for category, name, _ in inputs if category == "hot_tokens"]
+    assert any(name.split()[0] in hot_prefixes(companies) for name in hot)
+
+
+def test_exceptions_are_recorded_not_raised():
+    """Test failing calls become records and are grouped in the report"""
+    def fails(name, country):
+        raise KeyError(name)
+
+    inputs = [("garbage", "", None), ("garbage", "x", "ZZ")]
+    records = run_inputs(inputs, {"fails": fails, "upper": lambda name, country: name.upper()})
+    assert len(records) == 4
+    report = fuzz_report(records)
+    assert report["exceptions"] == [{"target": "fails", "error": "KeyError", "count": 2,
+                                     "message": "''", "example": "''"}]
+    assert [r["ms"] for r in report["slowest"]] == sorted((r["ms"] for r in report["slowest"]),
+                                                          reverse=True)
+
+
+def test_growth_exponent_flags_quadratic_work():
+    """Test the log-log fit separates linear from quadratic latency"""
+    lengths = [100, 1_000, 10_000]
+    assert growth_exponent(lengths, [1e-3, 1e-2, 1e-1]) == pytest.approx(1.0)
+    assert growth_exponent(lengths, [1e-4, 1e-2, 1.0]) == pytest.approx(2.0)
+    assert growth_exponent(lengths, [1e-6, 2e-6, 1e-3]) is None
+
+
+def test_failing_calls_are_not_timed():
+    """Test calls that raise stay out of the slowest list, latency and growth fits"""
+    def fails(name, country):
+        raise KeyError(name)
+
+    targets = {"fails": fails, "upper": lambda name, country: name.upper()}
+    report = fuzz_report(run_inputs([("garbage", "x", None), ("long", "y" * 50, None)], targets),
+                         growth_curves(targets, families=["words"], lengths=(64, 256), repeats=1))
+    assert report["failing_targets"] == ["fails"]
+    assert {s["target"] for s in report["slowest"]} == {"upper"}
+    assert set(report["latency"]) == {"upper"}
+    failed, upper = report["growth"]
+    assert failed["error"] == "KeyError" and failed["seconds"] == [] and failed["exponent"] is None
+    assert upper["error"] is None and len(upper["seconds"]) == 2
+
+
+@pytest.mark.slow
+def test_growth_curves_flag_quadratic_work():
+    """Test timed growth curves separate a linear from a quadratic function"""
+    curves = growth_curves({
+        "linear": lambda name, country: sorted(name),
+        "quadratic": lambda name, country: [name.count(ch) for ch in name],
+    }, families=["words"], lengths=(2_048, 8_192, 32_768), repeats=2)
+    linear, quadratic = curves
+    assert not linear["superlinear"]
+    assert quadratic["superlinear"] and quadratic["exponent"] > SUPERLINEAR
+
+
+def _check_upstream_failures(r, n_inputs):
+    """Upstream match/resolve either return or raise the known alias_score error
+
+    The installed match_company and resolve_company raise UnboundLocalError
+    when a top candidate has no aliases (see BUGS_FOUND.md). A target that
+    raised on every input must be reported as failing, and not timed.
+    """
+    for e in r["exceptions"]:
+        assert e["target"] in ("match_company", "resolve_company"), e
+        assert e["error"] == "UnboundLocalError" and "alias_score" in e["message"], e
+        assert e["count"] <= n_inputs
+    assert set(r["failing_targets"]) == {e["target"] for e in r["exceptions"]
+                                         if e["count"] == n_inputs}
+    assert not any(s["target"] in r["failing_targets"] for s in r["slowest"])
+    assert not set(r["failing_targets"]) & set(r["latency"])
+    assert all(c["error"] in (None, "UnboundLocalError") for c in r["growth"])
+    assert all(c["error"] is None for c in r["growth"]
+               if c["target"] in ("normalize_name", "index_resolve"))
+
+
+def test_fuzz_run_reports_slowest_inputs_and_exceptions():
+    """Test a small seeded run covers every target and category and times only returning calls"""
+    r = run_fuzz(n_inputs=25, seed=3, rows=2_000, max_length=1_024, lengths=(64,),
+                 repeats=1, top=5)
+    targets = {"normalize_name", "match_company", "resolve_company", "index_resolve"}
+    assert r["calls"] == 25 * len(targets)
+    timed = targets - set(r["failing_targets"])
+    assert {"normalize_name", "index_resolve"} <= timed == set(r["latency"])
+    assert all(set(r["latency"][target]) == set(CATEGORIES)
+               for target in ("normalize_name", "index_resolve"))
+    assert len(r["slowest"]) == 5 and r["slowest"][0]["ms"] >= r["slowest"][-1]["ms"]
+    _check_upstream_failures(r, 25)
+    assert not r["violations"]
+    assert len(r["growth"]) == len(targets) * 5
+
+
+@pytest.mark.slow
+def test_fuzz_at_scale():
+    """Test 200 adversarial inputs against 20k companies for crashes and super-linear growth"""
+    r = run_fuzz(n_inputs=200, rows=20_000, max_length=2_048, lengths=(64, 256, 1_024, 2_048),
+                 repeats=2)
+    print()
+    for s in r["slowest"]:
+        print(f"  {s['ms']:8.1f}ms {s['target']:<15} {s['category']:<10} {s['input']}")
+    for e in r["exceptions"]:
+        print(f"  {e['count']:>4}x {e['target']}: {e['error']} ({e['message'][:60]})")
+    assert not r["violations"]
+    _check_upstream_failures(r, 200)
+    assert not r["superlinear"], r["superlinear"]
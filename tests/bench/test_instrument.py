@@ -0,0 +1,103 @@
+"""
+Per-stage instrumentation of resolve and its Prometheus export
+"""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import QUERY_CORPUS, synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex, default_index
+from tests.bench.instrument import STAGES, StageRecorder, instrument, instrumentation_overhead
+
+
+@pytest.fixture(scope="module")
+def index():
+    """20k synthetic companies, so each call takes long enough to time"""
+    return CompanyIndex(synthetic_companies(20_000, seed=5))
+
+
+def _timed_events(index, n=50):
+    """Instrumented resolve of n queries, with each call's outside wall time"""
+    queries = synthetic_queries(n, index.companies, seed=6)
+    outside = []
+    with instrument(StageRecorder(keep_events=True)) as recorder:
+        for name, country in queries.itertuples(index=False):
+            start = time.perf_counter()
+            index.resolve(name, None if pd.isna(country) else country)
+            outside.append(time.perf_counter() - start)
+    return recorder, outside
+
+
+def test_stages_account_for_the_outside_time(index):
+    """Test the stages fit inside an outside timer and cover most of what it sees"""
+    recorder, outside = _timed_events(index)
+    stage_totals = [sum(event["stages"].values()) for event in recorder.events]
+    for event, stage_total, seconds in zip(recorder.events, stage_totals, outside):
+        assert set(event["stages"]) == set(STAGES)
+        assert stage_total <= seconds
+    # Loose, over all calls together, so one preempted call cannot fail it
+    assert sum(stage_totals) >= 0.5 * sum(outside)
+
+    assert recorder.summary()["calls"] == 50
+
+
+@pytest.mark.slow
+def test_stages_cover_the_outside_time(index):
+    """Test the stages account for nearly all of the time an outside timer sees"""
+    recorder, outside = _timed_events(index)
+    for event, seconds in zip(recorder.events, outside):
+        assert sum(event["stages"].values()) >= 0.9 * seconds - 50e-6
+
+
+def test_results_unchanged_and_candidates_counted(index):
+    """Test instrumented calls return the same result and report candidate counts"""
+    with instrument(StageRecorder(keep_events=True)) as recorder:
+        observed = index.resolve("Tracor Mining", "US")
+    assert observed == index.resolve("Tracor Mining", "US")
+    assert recorder.events[0]["candidates"] == len(index.block("tracor mining", "US"))
+    assert recorder.events[0]["decision"] == observed["decision"]
+
+
+def test_off_outside_block_and_in_other_threads():
+    """Test only calls inside instrument(), in the same thread, are recorded"""
+    index = default_index()
+    index.resolve("BHP Group", "AU")
+    with instrument(StageRecorder(keep_events=True)) as recorder:
+        thread = threading.Thread(target=index.resolve, args=("Rio Tinto", "AU"))
+        thread.start()
+        thread.join()
+        index.resolve("Glencore", "GB")
+    index.resolve("Anglo American", "GB")
+
+    assert [e["decision"] for e in recorder.events] == ["auto_high_conf"]
+
+
+def test_prometheus_export():
+    """Test counters and histograms render in Prometheus text format"""
+    index = default_index()
+    with instrument() as recorder:
+        for name, country in QUERY_CORPUS:
+            index.resolve(name, country)
+    text = recorder.to_prometheus()
+    samples = dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+    calls = str(len(QUERY_CORPUS))
+
+    assert "# TYPE entityidentity_resolve_stage_seconds histogram" in text
+    by_decision = [v for k, v in samples.items() if k.startswith("entityidentity_resolve_calls")]
+    assert sum(int(v) for v in by_decision) == len(QUERY_CORPUS)
+    for stage in STAGES:
+        metric = "entityidentity_resolve_stage_seconds"
+        assert samples[f'{metric}_count{{stage="{stage}"}}'] == calls
+        assert samples[f'{metric}_bucket{{stage="{stage}",le="+Inf"}}'] == calls
+    assert samples["entityidentity_resolve_seconds_count"] == calls
+
+
+@pytest.mark.slow
+def test_disabled_cost_is_negligible():
+    """Test resolve with no observer costs about the same as the uninstrumented path"""
+    result = instrumentation_overhead(default_index(), QUERY_CORPUS, repeats=7)
+    print(f"\n  baseline={result['baseline_us']:.1f}us off={result['off_us']:.1f}us "
+          f"on={result['on_us']:.1f}us per call")
+    assert result["off_us"] <= result["baseline_us"] * 1.10 + 2
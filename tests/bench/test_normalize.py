@@ -0,0 +1,91 @@
+"""
+normalize_names: bulk normalization identical to normalize_name
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from entityidentity import normalize_name
+from tests.bench.corpus import LEGAL_SUFFIXES, QUERY_CORPUS, synthetic_queries
+from tests.bench.normalize import normalize_names, normalize_throughput
+
+# Characters that exercise every normalize_name step: accents and ligatures
+# (NFKD), non-Latin scripts (dropped by the ASCII round-trip), legal-suffix
+# punctuation, kept symbols (& -), whitespace variants and the NUL separator
+ALPHABET = (
+    list("abcxyzABCXYZ0189") + list(" .,&-'/()") + list("\t\n\r\x0b\x0c\x1c\x00")
+    + list("éÉüßøÅçñ") + ["ﬁ", "Ⅳ", "½", "́", "　", " "]
+    + list("日本語ΑΩЖ") + ["\U0001f600"]
+)
+SUFFIXES = [s.strip() for s in LEGAL_SUFFIXES] + ["S.A.", "s.p.a.", "L.L.C.", "p.l.c.", "Inc."]
+
+
+def random_name(rng):
+    """Random mix of words, legal suffixes and awkward characters"""
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        if rng.random() < 0.3:
+            parts.append(rng.choice(SUFFIXES))
+        else:
+            parts.append("".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8))))
+    return rng.choice(["", " ", "  ", ".", ","]).join(parts)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_normalize_name_on_random_names(seed):
+    """Test every random name normalizes exactly as normalize_name does"""
+    rng = random.Random(seed)
+    names = [random_name(rng) for _ in range(500)]
+    got = normalize_names(names)
+    mismatches = [(n, g, normalize_name(n)) for n, g in zip(names, got) if g != normalize_name(n)]
+    assert not mismatches, mismatches[:5]
+
+
+def test_matches_normalize_name_on_corpus():
+    """Test the query corpus and noisy synthetic names normalize identically"""
+    names = [name for name, _ in QUERY_CORPUS]
+    names += synthetic_queries(2_000, seed=5)["name"].tolist()
+    assert list(normalize_names(names)) == [normalize_name(name) for name in names]
+
+
+def test_lone_surrogates_normalize_like_normalize_name():
+    """Test names with lone surrogates, which pandas string dtypes reject, are normalized"""
+    rng = random.Random(9)
+    names = ["ab\ud800c Inc", "\udfff\u00e9 Ltd", "\ud83d", "x\x00\udc00y", "Plain Co"]
+    names += [random_name(rng) + rng.choice(["\ud800", "\udbff", "\udc00", "\udfff"])
+              + random_name(rng) for _ in range(50)]
+    expected = [normalize_name(name) for name in names]
+    assert list(normalize_names(names)) == expected
+    assert list(normalize_names(pd.Series(names * 2, dtype=object))) == expected * 2
+
+
+def test_series_index_and_missing_values():
+    """Test a Series keeps its index and missing values normalize to ''"""
+    names = pd.Series(["Apple Inc.", None, np.nan, "", "Apple Inc."], index=list("abcde"),
+                      name="company")
+    result = normalize_names(names)
+
+    assert isinstance(result, pd.Series)
+    assert list(result.index) == list("abcde")
+    assert result.name == "company"
+    assert list(result) == ["apple", "", "", "", "apple"]
+
+
+def test_array_input_returns_array():
+    """Test a NumPy array input gives an aligned object array"""
+    result = normalize_names(np.array(["BHP Group Ltd", "Rio Tinto plc"], dtype=object))
+
+    assert isinstance(result, np.ndarray)
+    assert list(result) == ["bhp group", "rio tinto"]
+
+
+@pytest.mark.slow
+def test_normalize_names_faster_than_loop():
+    """Test bulk normalization beats a normalize_name loop on 200k rows"""
+    (result,) = normalize_throughput([200_000])
+    print(f"\n  bulk={result['bulk_rows_per_sec']:,.0f} rows/s "
+          f"loop={result['loop_rows_per_sec']:,.0f} rows/s speedup={result['speedup']:.1f}x")
+
+    assert result["speedup"] > 1.5
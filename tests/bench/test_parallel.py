@@ -0,0 +1,68 @@
+"""
+Parallel resolution over a shared, memory-mapped company index
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.bench.batch import match_companies
+from tests.bench.corpus import synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex
+from tests.bench.parallel import ParallelResolver, parallel_scaling
+
+
+def test_saved_index_is_memory_mapped_and_equivalent(tmp_path, company_database):
+    """Test a saved index reloads as read-only mmaps and ranks identically"""
+    index = CompanyIndex(company_database)
+    index.save(tmp_path)
+    loaded = CompanyIndex.load(tmp_path)
+
+    assert isinstance(loaded.name_norm, np.memmap)
+    assert not loaded.name_norm.flags.writeable
+
+    norms = [index.name_norm[0], "glencore", "rio", "xyzabc123notreal"]
+    for country in [None, "AU", "ZZ"]:
+        expected = index.rank(norms, country)
+        got = loaded.rank(norms, country)
+        np.testing.assert_array_equal(got["rows"], expected["rows"])
+        np.testing.assert_array_equal(got["score"], expected["score"])
+
+
+def test_parallel_matches_serial_batch():
+    """Test parallel output is identical to the single-process batch path"""
+    queries = synthetic_queries(2000, seed=2)
+    with ParallelResolver(workers=2) as resolver:
+        parallel = resolver.match_companies(queries["name"], queries["country"])
+        assert resolver.worker_memory, "Workers should report their memory"
+
+    serial = match_companies(queries["name"], queries["country"])
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_reload_workers_use_the_given_index():
+    """Test workers that reload the data rebuild the index passed in, not the bundled one"""
+    index = CompanyIndex(synthetic_companies(2_000, seed=4))
+    queries = synthetic_queries(300, index.companies, seed=5)
+    with ParallelResolver(index, workers=1, shared=False) as resolver:
+        parallel = resolver.match_companies(queries["name"], queries["country"])
+
+    serial = match_companies(queries["name"], queries["country"], index=index)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert (parallel["decision"] == "auto_high_conf").any()
+
+
+@pytest.mark.slow
+def test_parallel_scaling_records_throughput_and_memory():
+    """Test scaling at 1, 2, 4 and 8 workers on a synthetic workload"""
+    results = parallel_scaling(workers=(1, 2, 4, 8), n=4000)
+
+    print()
+    for r in results:
+        print(f"workers={r['workers']} rows/s={r['rows_per_sec']:.0f} "
+              f"rss/worker={r['rss_per_worker_mb']:.0f}MB pss total={r['pss_total_mb']}")
+
+    assert [r["workers"] for r in results] == [1, 2, 4, 8]
+    for r in results:
+        assert r["rows_per_sec"] > 0
+        assert 1 <= r["worker_processes"] <= r["workers"]
+        assert r["rss_total_mb"] > 0
@@ -0,0 +1,123 @@
+"""
+Country-partitioned lazy loading of the company database
+"""
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex
+from tests.bench.partitions import (COUNTRIES_ENV, NO_COUNTRY, PartitionedCompanies,
+                                    partition_benchmark, partition_database, write_partitions)
+
+FILTERS = [
+    {},
+    {"country": "au"},
+    {"country": "ZZ"},
+    {"search": "mining"},
+    {"country": "GB", "search": "an", "limit": 2},
+    {"limit": 3},
+]
+
+
+@pytest.fixture(scope="module")
+def installed(tmp_path_factory):
+    """The table list_companies() returns (bundled, or with synthetic rows), partitioned"""
+    from entityidentity import list_companies
+
+    return write_partitions(list_companies(), tmp_path_factory.mktemp("partitions") / "companies")
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    companies = synthetic_companies(20_000, seed=31)
+    companies.loc[::500, "country"] = None
+    directory = write_partitions(companies, tmp_path_factory.mktemp("partitions") / "synthetic")
+    return directory, companies
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_partitions_match_list_companies(installed, filters):
+    """Test filtered reads return exactly what list_companies returns"""
+    from entityidentity import list_companies
+
+    table = PartitionedCompanies(installed)
+    pd.testing.assert_frame_equal(table.list_companies(**filters), list_companies(**filters))
+
+
+@pytest.mark.bundled_data
+def test_partition_database_defaults_to_the_bundled_file(tmp_path):
+    """Test partitioning the bundled data file gives the bundled companies"""
+    from entityidentity import list_companies
+
+    table = PartitionedCompanies(partition_database(tmp_path / "companies"))
+    pd.testing.assert_frame_equal(table.list_companies(), list_companies())
+
+
+def test_country_calls_read_only_their_partition(synthetic):
+    """Test opening reads nothing, and a country-scoped call reads one partition"""
+    directory, companies = synthetic
+    table = PartitionedCompanies(directory)
+    assert table.loaded == [] and len(table) == len(companies)
+    assert NO_COUNTRY in table.partitions and NO_COUNTRY not in table.countries
+
+    assert len(table.list_companies(country="nl", limit=5)) == 5
+    table.resolve("Borvel Mining Holdings", "CH")
+    assert table.loaded == ["CH", "NL"]
+    table.resolve("Borvel Mining Holdings", "ZZ")
+    assert table.loaded == sorted(table.partitions)
+
+
+def test_resolve_matches_full_load(synthetic):
+    """Test resolve results equal the full index, with and without countries"""
+    directory, companies = synthetic
+    full = CompanyIndex(companies)
+    table = PartitionedCompanies(directory)
+    queries = synthetic_queries(150, companies.dropna(subset=["country"]), seed=32,
+                                known_fraction=0.8)
+    queries = [(name, None if pd.isna(country) else country)
+               for name, country in queries.itertuples(index=False)]
+    queries += [(name, "zz") for name, _ in queries[:10]] + \
+        [(name, country.lower()) for name, country in queries[:20] if country]
+
+    for name, country in queries:
+        assert table.resolve(name, country) == full.resolve(name, country), (name, country)
+        assert table.match(name, country) == full.match(name, country)
+
+
+def test_countries_chosen_by_argument_or_environment(synthetic, monkeypatch):
+    """Test countries are read up front from the argument or ENTITYIDENTITY_COUNTRIES"""
+    directory, _ = synthetic
+    assert PartitionedCompanies(directory, countries=["gb", "AU"]).loaded == ["AU", "GB"]
+    every = PartitionedCompanies(directory, countries="all")
+    assert every.loaded == sorted(every.partitions) and NO_COUNTRY in every.loaded
+
+    monkeypatch.setenv(COUNTRIES_ENV, "jp, de")
+    assert PartitionedCompanies(directory).loaded == ["DE", "JP"]
+    assert PartitionedCompanies(directory, countries=[]).loaded == []
+
+
+@pytest.mark.slow
+def test_memory_and_load_time_scale_with_countries():
+    """Test load time, first query and RSS grow with the partitions chosen"""
+    one, few, every = partition_benchmark(100_000)
+    for r in (one, few, every):
+        print(f"\n{str(r['countries']):<20} rows={r['rows_loaded']:>7} "
+              f"load={r['load_seconds'] * 1000:6.1f}ms "
+              f"first query={r['first_query_seconds'] * 1000:6.1f}ms "
+              f"rss +{r['rss_delta'] / 2**20:.1f}MB", end="")
+    assert one["partitions"] == ["NL"] and len(few["partitions"]) == 3
+    assert one["rows_loaded"] < few["rows_loaded"] < every["rows_loaded"] == 100_000
+    assert one["load_seconds"] < every["load_seconds"]
+    assert one["first_query_seconds"] * 3 < every["first_query_seconds"]
+    assert one["rss_delta"] < few["rss_delta"] < every["rss_delta"]
+    assert one["rss_delta"] * 2 < every["rss_delta"]
+
+
+@pytest.mark.slow
+def test_partition_scaling_at_scale():
+    """Test the saving from loading one country of 1M companies"""
+    one, _, every = partition_benchmark(1_000_000)
+    print(f"\n1M: NL load={one['load_seconds']:.2f}s rss +{one['rss_delta'] / 2**20:.0f}MB; "
+          f"all load={every['load_seconds']:.2f}s rss +{every['rss_delta'] / 2**20:.0f}MB")
+    assert one["load_seconds"] * 5 < every["load_seconds"]
+    assert one["peak_rss_delta"] * 5 < every["peak_rss_delta"]
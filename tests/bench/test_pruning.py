@@ -0,0 +1,118 @@
+"""
+Early termination and score-cutoff pruning in candidate scoring
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import corpus_queries, synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex
+from tests.bench.pruning import (MATCH_MIN_SCORE, PrunedIndex, pruning_benchmark,
+                                 score_candidates)
+
+
+@pytest.fixture(scope="module")
+def companies():
+    companies = synthetic_companies(20_000, seed=41)
+    # Exact duplicates, so that several candidates tie at 100
+    companies.loc[15_000:15_009, ["name", "name_norm"]] = companies.loc[
+        :9, ["name", "name_norm"]].to_numpy()
+    companies.loc[18_000, ["name", "name_norm"]] = companies.loc[9, ["name", "name_norm"]]
+    companies.loc[[3, 900, 12_000], "alias1"] = companies.loc[5, "name"]
+    return companies
+
+
+@pytest.fixture(scope="module")
+def queries(companies):
+    frame = synthetic_queries(150, companies, seed=42, known_fraction=0.7)
+    queries = [(name, None if pd.isna(country) else country)
+               for name, country in frame.itertuples(index=False)]
+    return queries + [(name, None) for name in companies["name"].head(10)] + \
+        [("", None), ("Zyx", "GB")]
+
+
+def _exhaustive(index, query_norm, rows, country, k):
+    """Top k rows and scores by scoring every candidate"""
+    score = index.score([query_norm], rows, country)[0][0]
+    order = np.argsort(-score, kind="stable")[:k]
+    return rows[order], score[order]
+
+
+def test_top_k_equals_exhaustive_resolve(companies, queries):
+    """Test pruned resolve returns the exhaustive result for every k"""
+    full, pruned = CompanyIndex(companies), PrunedIndex(companies)
+    for name, country in queries + list(corpus_queries()):
+        for k in (1, 2, 3, 5, 10):
+            assert pruned.resolve(name, country, k) == full.resolve(name, country, k), \
+                (name, country, k)
+        assert pruned.match(name, country) == full.match(name, country), name
+
+
+def test_min_score_keeps_exhaustive_prefix(companies, queries):
+    """Test min_score drops exactly the exhaustive matches scoring below it"""
+    full, pruned = CompanyIndex(companies), PrunedIndex(companies)
+    for name, country in queries:
+        expected = full.resolve(name, country, 5)["matches"]
+        for min_score in (50.0, MATCH_MIN_SCORE, 99.5):
+            got = pruned.resolve(name, country, 5, min_score=min_score)["matches"]
+            assert got == [m for m in expected if m["score"] >= min_score], (name, min_score)
+
+
+def test_score_candidates_over_all_rows(companies):
+    """Test heap and cutoffs across many chunks against a full argsort"""
+    index = CompanyIndex(companies)
+    rows = np.arange(len(companies))
+    for query_norm, country in [("borvel mining", None), ("zan energy holdings", "US"),
+                                (companies["name_norm"][7], "GB")]:
+        for k in (1, 3, 8):
+            top = score_candidates(index, query_norm, rows, country, top_k=k)
+            expected_rows, expected_score = _exhaustive(index, query_norm, rows, country, k)
+            assert list(top["rows"]) == list(expected_rows)
+            assert np.array_equal(top["score"], expected_score)
+
+
+def test_exact_hit_stops_scoring(companies):
+    """Test rows after the k-th exact name or alias hit are never scored"""
+    index = CompanyIndex(companies)
+    rows = np.arange(len(companies))
+
+    query_norm = companies["name_norm"][9]
+    hits = np.flatnonzero(index.name_norm == query_norm)
+    assert hits[0] == 9 and 15_009 in hits
+    for k in (1, 2, 3):
+        top = score_candidates(index, query_norm, rows, top_k=k)
+        assert top["scored"] == hits[k - 1] + 1
+        assert list(top["rows"]) == list(_exhaustive(index, query_norm, rows, None, k)[0])
+
+    alias_query = companies["name_norm"][5]
+    top = score_candidates(index, alias_query, rows, top_k=2)
+    assert top["scored"] == 6 and list(top["rows"]) == [3, 5]
+    assert top["score_alias"][0] == 100.0 and top["score_primary"][0] < 100.0
+
+
+@pytest.mark.slow
+def test_pruned_latency_on_many_candidates():
+    """Test pruned scoring is exact and faster per query when candidates are many"""
+    r = pruning_benchmark(size=50_000, n_queries=20, min_candidates=1_000)
+    print(f"\n{r['queries']} queries, {r['mean_candidates']:.0f} candidates on average")
+    for label, modes in r["latency"].items():
+        print(f"  {label:<11} exhaustive p50={modes['exhaustive']['p50_ms']:6.1f}ms "
+              f"pruned p50={modes['pruned']['p50_ms']:6.1f}ms")
+    assert r["queries"] == 20 and r["mismatches"] == 0
+    for label in ("resolve_k3", "match"):
+        assert r["latency"][label]["pruned"]["p50_ms"] < \
+            r["latency"][label]["exhaustive"]["p50_ms"], label
+
+
+@pytest.mark.slow
+def test_pruned_latency_at_scale():
+    """Test the per-query saving on 200k companies"""
+    r = pruning_benchmark(size=200_000, n_queries=50)
+    for label, modes in r["latency"].items():
+        print(f"\n{label:<11} exhaustive p50={modes['exhaustive']['p50_ms']:6.1f}ms "
+              f"p95={modes['exhaustive']['p95_ms']:6.1f}ms  "
+              f"pruned p50={modes['pruned']['p50_ms']:6.1f}ms "
+              f"p95={modes['pruned']['p95_ms']:6.1f}ms", end="")
+    assert r["mismatches"] == 0
+    assert r["latency"]["resolve_k3"]["pruned"]["p50_ms"] * 1.1 < \
+        r["latency"]["resolve_k3"]["exhaustive"]["p50_ms"]
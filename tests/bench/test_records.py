@@ -0,0 +1,101 @@
+"""
+Compact record store and result views
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import corpus_queries, synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex
+from tests.bench.records import CompactIndex, Match, RecordStore, Resolution, record_memory
+
+
+def _none_for_nan(value):
+    """Replace float NaN (how DataFrame rows report missing values) with None"""
+    if isinstance(value, dict):
+        return {k: _none_for_nan(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_none_for_nan(v) for v in value]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def test_views_match_resolve_dicts_on_corpus():
+    """Test CompactIndex results convert to exactly CompanyIndex's dicts"""
+    plain, compact = CompanyIndex(), CompactIndex()
+    assert compact.companies is None
+    for name, country in corpus_queries():
+        view = compact.resolve(name, country)
+        assert isinstance(view, Resolution)
+        assert view.to_dict() == _none_for_nan(plain.resolve(name, country)), name
+
+
+def test_views_match_resolve_dicts_on_synthetic():
+    """Test equality on a synthetic table with LEIs and noisy queries"""
+    companies = synthetic_companies(5_000, seed=4)
+    plain, compact = CompanyIndex(companies), CompactIndex(companies)
+    queries = synthetic_queries(200, companies, seed=4, known_fraction=0.8)
+    for name, country in queries.itertuples(index=False):
+        country = None if pd.isna(country) else country
+        assert compact.resolve(name, country).to_dict() == \
+            _none_for_nan(plain.resolve(name, country)), name
+
+
+def test_views_behave_like_dicts():
+    """Test key access on Resolution and Match without converting"""
+    result = CompactIndex().resolve("BHP Group", "AU")
+    assert result["decision"] == "auto_high_conf"
+    assert result["query"]["name_norm"] == "bhp group"
+    final = result["final"]
+    assert isinstance(final, Match) and final is result["matches"][0]
+    assert final["name"] == "BHP Group Limited"
+    assert final["country"] == "AU" and final["explain"]["country_match"]
+    assert final.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        final["missing"]
+
+
+def test_store_round_trips_values():
+    """Test unicode text, missing values, interned countries and LEI encodings"""
+    companies = pd.DataFrame({
+        "name": ["Société Générale SA", "三菱商事株式会社", "Nestlé S.A."],
+        "name_norm": ["societe generale", "", "nestle"],
+        "country": ["FR", "JP", None],
+        "lei": ["O2RNE8IBXP4R0TD8PU41", None, "KY37LUS27QQX7BB93L28"],
+        "alias1": [None, "Mitsubishi Corporation", "Nestle"],
+    })
+    store = RecordStore(companies)
+    assert len(store) == 3
+    assert store[1].name == "三菱商事株式会社" and store[1].name_norm == ""
+    assert store[1].aliases == ["Mitsubishi Corporation"]
+    assert store[2].country is None and store[0].country == "FR"
+    assert store[0].country is RecordStore(companies)[0].country  # interned
+    assert store[1].lei is None and store[2].lei == "KY37LUS27QQX7BB93L28"
+    assert store._lei.codes.dtype == np.dtype("S20")
+    assert store[-1] == store[2]
+    with pytest.raises(IndexError):
+        store[3]
+
+    # Anything other than 20-character LEIs falls back to text storage
+    odd = RecordStore(companies.assign(lei=["SHORT", None, "ÀÉÎ"]))
+    assert [odd[i].lei for i in range(3)] == ["SHORT", None, "ÀÉÎ"]
+
+
+def test_store_is_smaller_than_dataframe():
+    """Test bytes per company of the store vs the list_companies() DataFrame"""
+    r = record_memory([20_000], n_queries=100)[0]
+    assert r["store_bytes_per_company"] < r["frame_bytes_per_company"] / 1.5
+    assert r["store_bytes_per_company"] < r["dict_bytes_per_company"] / 3
+    assert r["view_bytes_per_result"] < r["dict_bytes_per_result"] / 2
+
+
+@pytest.mark.slow
+def test_store_memory_at_scale():
+    """Test the savings hold at 500k companies"""
+    r = record_memory([500_000], n_queries=200)[0]
+    print(f"\nframe={r['frame_bytes_per_company']:.0f}B dict={r['dict_bytes_per_company']:.0f}B "
+          f"store={r['store_bytes_per_company']:.0f}B per company; "
+          f"results dict={r['dict_bytes_per_result']:.0f}B view={r['view_bytes_per_result']:.0f}B")
+    assert r["store_bytes_per_company"] < r["frame_bytes_per_company"] / 1.5
+    assert r["view_bytes_per_result"] < r["dict_bytes_per_result"] / 2
@@ -0,0 +1,90 @@
+"""
+Trigram-indexed list_companies(search=...) versus the full scan
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import synthetic_companies
+from tests.bench.search import SubstringIndex, search_benchmark
+
+FILTERS = [
+    {"search": "mining"},
+    {"search": "Mining"},
+    {"search": "an"},
+    {"search": "plc", "limit": 2},
+    {"country": "au", "search": "gro"},
+    {"country": "GB", "search": "o", "limit": 1},
+    {"search": "r.o"},
+    {"search": "^rio|gold$"},
+    {"search": "nothing like this"},
+    {"country": "ZZ", "search": "bhp"},
+    {"country": "CA"},
+    {"limit": 4},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_matches_list_companies(filters):
+    """Test indexed search returns exactly the rows list_companies returns"""
+    from entityidentity import list_companies
+
+    index = SubstringIndex(list_companies())
+    pd.testing.assert_frame_equal(index.list_companies(**filters), list_companies(**filters))
+
+
+@pytest.fixture(scope="module")
+def synthetic_table(tmp_path_factory):
+    """A 20k-row synthetic database loaded the way list_companies loads it"""
+    from entityidentity.companies.companyidentity import load_companies
+
+    path = str(tmp_path_factory.mktemp("search") / "companies.parquet")
+    synthetic_companies(20_000, seed=11).to_parquet(path)
+    yield path, load_companies(path)
+    load_companies.cache_clear()
+
+
+def test_random_substrings_match_scan(synthetic_table):
+    """Test random substrings of names, with and without country/limit, match the scan"""
+    from entityidentity.companies.companyidentity import list_companies
+
+    path, companies = synthetic_table
+    index = SubstringIndex(companies)
+    rng = random.Random(0)
+    names = companies["name"].tolist()
+    countries = [None, "US", "GB", "DE", "JP"]
+    for _ in range(150):
+        name = rng.choice(names)
+        start = rng.randrange(len(name))
+        term = name[start:start + rng.randint(1, 9)]
+        filters = {"search": term, "country": rng.choice(countries),
+                   "limit": rng.choice([None, 1, 10, 100])}
+        expected = list_companies(data_path=path, **filters)
+        got = index.list_companies(**filters)
+        assert got.index.equals(expected.index), filters
+
+
+def test_trigrams_narrow_candidates(synthetic_table):
+    """Test a selective term is confirmed against only a small candidate set"""
+    _, companies = synthetic_table
+    index = SubstringIndex(companies)
+    term = companies["name_norm"].iloc[123].split()[0]
+
+    candidates = index.candidates(term)
+    assert 123 in candidates
+    assert len(candidates) < len(index) / 50
+
+
+@pytest.mark.slow
+def test_indexed_search_faster_at_scale():
+    """Test selective and limited searches beat the scan on 200k companies"""
+    (result,) = search_benchmark([200_000], repeats=3)
+    for s in result["searches"]:
+        print(f"\n  {str(s['filters']):<50} rows={s['rows']:6d} scan={s['scan_ms']:8.2f}ms "
+              f"index={s['index_ms']:8.2f}ms speedup={s['speedup']:7.1f}x")
+
+    assert all(s["identical"] for s in result["searches"])
+    by_filters = {str(s["filters"]): s for s in result["searches"]}
+    assert by_filters[str({"search": "tracor"})]["speedup"] > 2
+    assert by_filters[str({"search": "mining", "limit": 10})]["speedup"] > 2
@@ -0,0 +1,175 @@
+"""
+Local HTTP resolution server with request micro-batching
+"""
+import json
+import socket
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from entityidentity import normalize_name
+from tests.bench.corpus import corpus_queries, synthetic_companies, synthetic_queries
+from tests.bench.index import CompanyIndex
+from tests.bench.server import (LIST_LIMIT, MicroBatcher, jsonable, load_test, serve_in_thread,
+                                start_server_process)
+
+
+def _call(port, path, body=None):
+    """GET (or POST a JSON body) and return (status, decoded JSON)"""
+    data = None if body is None else (body if isinstance(body, bytes) else
+                                      json.dumps(body).encode())
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CompanyIndex()
+
+
+def test_endpoints_match_library_calls(index):
+    """Test match, resolve, normalize and list answer as the library functions do"""
+    from entityidentity import list_companies
+
+    with serve_in_thread(index) as server:
+        for name, country in corpus_queries():
+            query = urllib.parse.urlencode({"name": name, "country": country or ""})
+            expected = jsonable(index.resolve(name, country))
+            assert _call(server.port, f"/resolve?{query}") == (200, expected)
+            assert _call(server.port, f"/match?{query}") == (200, {"match": expected["final"]})
+
+        name = "Société Générale SA"
+        status, body = _call(server.port, "/normalize?" + urllib.parse.urlencode({"name": name}))
+        assert status == 200 and body["name_norm"] == normalize_name(name)
+
+        status, body = _call(server.port, "/list?country=au&limit=2")
+        assert body["count"] == 2
+        expected = list_companies(country="AU", limit=2)
+        assert body["companies"] == json.loads(expected.to_json(orient="records"))
+        assert all(isinstance(c["aliases"], list) for c in body["companies"])
+        status, body = _call(server.port, "/list", {"search": "mining"})
+        expected = list_companies(search="mining", limit=LIST_LIMIT)
+        assert body["companies"] == json.loads(expected.to_json(orient="records"))
+
+
+def test_post_bodies_and_errors(index):
+    """Test JSON POST parameters and 400/404/405 responses"""
+    with serve_in_thread(index) as server:
+        status, body = _call(server.port, "/resolve", {"name": "Rio Tinto", "k": 2})
+        assert status == 200 and len(body["matches"]) <= 2
+        assert body["matches"][0]["name"] == index.resolve("Rio Tinto")["matches"][0]["name"]
+
+        assert _call(server.port, "/resolve")[0] == 400
+        assert _call(server.port, "/resolve", b"{not json")[0] == 400
+        assert _call(server.port, "/resolve", [1, 2])[0] == 400
+        assert _call(server.port, "/resolve?name=x&k=0")[0] == 400
+        assert _call(server.port, "/list?limit=lots")[0] == 400
+        assert _call(server.port, "/unknown")[0] == 404
+        request = urllib.request.Request(f"http://127.0.0.1:{server.port}/match?name=x",
+                                         method="DELETE")
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(request)
+        assert e.value.code == 405
+
+        for length in (b"abc", b"-1"):
+            with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+                sock.sendall(b"POST /resolve HTTP/1.1\r\nContent-Length: " + length +
+                             b"\r\n\r\n")
+                assert sock.recv(4096).startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_array_cells_and_encoding_errors():
+    """Test array cells become lists and a value JSON cannot encode answers 500"""
+    assert jsonable({"empty": np.array([]), "two": np.array(["A", "B"]), "nan": np.nan}) == \
+        {"empty": [], "two": ["A", "B"], "nan": None}
+
+    companies = synthetic_companies(200, seed=2)
+    companies["opaque"] = [object()] * len(companies)
+    with serve_in_thread(CompanyIndex(companies)) as server:
+        status, body = _call(server.port, "/list?limit=1")
+        assert status == 500 and body["error"].startswith("TypeError")
+        assert _call(server.port, "/stats")[0] == 200
+
+
+def test_batch_equals_per_call_resolution():
+    """Test resolve_batch gives per-call results with duplicates, mixed case and k"""
+    companies = synthetic_companies(5_000, seed=21)
+    index = CompanyIndex(companies)
+    frame = synthetic_queries(150, companies, seed=22, known_fraction=0.8)
+    requests = [(name, None if pd.isna(country) else country, 5)
+                for name, country in frame.itertuples(index=False)]
+    requests += [(name, country.lower() if country else "zz", 3) for name, country, _ in
+                 requests[:30]]
+    requests += requests[:20]
+
+    results = MicroBatcher(index).resolve_batch(requests)
+    for (name, country, k), result in zip(requests, results):
+        assert result == index.resolve(name, country, k), name
+
+
+def test_concurrent_requests_are_batched():
+    """Test concurrent clients are answered correctly from fewer, larger batches"""
+    companies = synthetic_companies(5_000, seed=23)
+    index = CompanyIndex(companies)
+    frame = synthetic_queries(64, companies, seed=24)
+    queries = [(name, None if pd.isna(country) else country)
+               for name, country in frame.itertuples(index=False)]
+
+    with serve_in_thread(index, window_ms=50) as server:
+        def resolve(query):
+            name, country = query
+            params = urllib.parse.urlencode({"name": name, "country": country or ""})
+            return _call(server.port, f"/resolve?{params}")[1]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(resolve, queries))
+        stats = _call(server.port, "/stats")[1]
+
+    for (name, country), result in zip(queries, results):
+        assert result == jsonable(index.resolve(name, country)), name
+    assert stats["requests"] == 64
+    assert stats["batches"] < 32 and stats["largest_batch"] > 2
+
+
+def test_console_script_serves_bundled_data():
+    """Test entityidentity-serve starts on a free port and answers"""
+    proc, port = start_server_process()
+    try:
+        assert _call(port, "/match?name=BHP+Group&country=AU")[1]["match"]["name"] == \
+            "BHP Group Limited"
+        assert _call(port, "/stats")[1]["requests"] == 1
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+@pytest.mark.slow
+def test_load_test_reports_throughput_and_p99():
+    """Test the local load test at rising concurrency, with batching absorbing the load"""
+    results = load_test(concurrency=(1, 16), requests=150, synthetic_rows=5_000)
+    assert [r["concurrency"] for r in results] == [1, 16]
+    assert all(r["errors"] == 0 and r["p99_ms"] >= r["p50_ms"] > 0 for r in results)
+    assert results[0]["mean_batch"] == 1.0
+    assert results[1]["mean_batch"] > 4
+    assert results[1]["qps"] > 0.8 * results[0]["qps"]
+
+
+@pytest.mark.slow
+def test_load_test_batching_on_and_off():
+    """Test batching keeps throughput and p99 at least level with unbatched serving"""
+    batched = load_test(concurrency=(1, 8, 32), requests=400, synthetic_rows=20_000)
+    single = load_test(concurrency=(1, 8, 32), requests=400, synthetic_rows=20_000, max_batch=1)
+    for b, s in zip(batched, single):
+        print(f"\nconcurrency={b['concurrency']:>2} batched qps={b['qps']:6.1f} "
+              f"p99={b['p99_ms']:6.1f}ms (batch {b['mean_batch']:.1f})  "
+              f"unbatched qps={s['qps']:6.1f} p99={s['p99_ms']:6.1f}ms", end="")
+    assert batched[-1]["qps"] > 0.9 * single[-1]["qps"]
@@ -0,0 +1,32 @@
+"""
+Cold-start profile of import entityidentity and the first company load
+"""
+from tests.bench.startup import parse_importtime, profile_startup
+
+
+def test_parse_importtime():
+    """Test -X importtime lines are parsed with nesting depth"""
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:       300 |        420 | entityidentity\n"
+    )
+    modules = parse_importtime(stderr)
+    assert [m["module"] for m in modules] == ["_io", "entityidentity"]
+    assert modules[0]["depth"] == 1
+    assert modules[1]["cumulative_us"] == 420
+
+
+def test_profile_startup_breakdown():
+    """Test the subprocess profile splits the cold start into disjoint phases"""
+    profile = profile_startup()
+
+    assert list(profile["phases_ms"]) == ["import_pandas", "import_entityidentity",
+                                          "read_data_file", "prepare_companies", "first_query"]
+    assert all(ms >= 0 for ms in profile["phases_ms"].values())
+    # Disjoint phases cover the cold start; re-measured steps are kept apart
+    assert 0.9 * profile["wall_ms"] <= sum(profile["phases_ms"].values()) <= profile["wall_ms"]
+    assert set(profile["remeasured_ms"]) == {"block_candidates"}
+    assert profile["data_file"] in ("companies.parquet", "companies.csv")
+    assert profile["rows"] > 0
+    assert profile["importtime"]["slowest"], "importtime output should be captured"
@@ -0,0 +1,81 @@
+"""
+Streaming resolution of large CSV/Parquet files in bounded memory
+"""
+import pandas as pd
+import pytest
+
+from tests.bench.batch import RESULT_COLUMNS, match_companies
+from tests.bench.corpus import QUERY_CORPUS
+from tests.bench.stream import main, measure_stream, resolve_file, resolve_stream, \
+    write_synthetic_input
+
+
+@pytest.fixture
+def corpus_csv(tmp_path):
+    """Query corpus written as a CSV with non-default column names"""
+    path = tmp_path / "input.csv"
+    pd.DataFrame(QUERY_CORPUS, columns=["company", "cc"]).to_csv(path, index=False)
+    return path
+
+
+def test_stream_chunks_match_batch_result(corpus_csv):
+    """Test chunked results concatenate to the one-shot match_companies result"""
+    chunks = list(resolve_stream(corpus_csv, "company", "cc", chunksize=5))
+    source = pd.read_csv(corpus_csv, dtype=str, keep_default_na=False, na_values=[""])
+    expected = match_companies(source["company"], source["cc"])
+
+    assert len(chunks) == -(-len(QUERY_CORPUS) // 5)
+    assert all(len(chunk) <= 5 for chunk in chunks)
+    got = pd.concat(chunks).astype(object)
+    expected = expected.astype(object)
+    pd.testing.assert_frame_equal(got.where(got.notna(), None),
+                                  expected.where(expected.notna(), None))
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_resolve_file_round_trip(tmp_path, corpus_csv, suffix):
+    """Test CSV and Parquet outputs hold one result row per input row"""
+    pytest.importorskip("pyarrow")
+    source = corpus_csv
+    if suffix == "parquet":
+        source = tmp_path / "input.parquet"
+        pd.read_csv(corpus_csv).to_parquet(source)
+    target = tmp_path / f"output.{suffix}"
+
+    stats = resolve_file(source, target, name_col="company", country_col="cc", chunksize=7)
+    out = pd.read_parquet(target) if suffix == "parquet" else pd.read_csv(target)
+
+    assert stats["rows"] == len(out) == len(QUERY_CORPUS)
+    assert stats["chunks"] == 4
+    assert list(out.columns) == RESULT_COLUMNS
+    # The corpus' empty name reads back from CSV as missing
+    assert out["query"].fillna("").tolist() == [name for name, _ in QUERY_CORPUS]
+    assert stats["matched"] == (out["decision"] == "auto_high_conf").sum()
+
+
+def test_console_script(tmp_path, corpus_csv, capsys):
+    """Test the entityidentity-resolve entry point with a fixed country"""
+    target = tmp_path / "output.csv"
+    assert main([str(corpus_csv), str(target), "--name-col", "company", "--country", "AU"]) == 0
+
+    out = pd.read_csv(target, keep_default_na=False)
+    assert set(out["query_country"]) == {"AU"}
+    assert "Resolved 22 rows" in capsys.readouterr().out
+
+
+@pytest.mark.slow
+def test_peak_memory_flat_as_input_grows(tmp_path):
+    """Test peak RSS stays flat while the input grows 10x"""
+    results = {}
+    for rows in (50_000, 500_000):
+        source = tmp_path / f"input_{rows}.csv"
+        size = write_synthetic_input(source, rows)
+        stats = measure_stream(source, tmp_path / f"output_{rows}.csv", chunksize=10_000)
+        results[rows] = stats
+        print(f"\n  {rows:>9,} rows ({size / 2**20:.0f}MB): {stats['seconds']:.1f}s "
+              f"peak +{stats['peak_rss_delta'] / 2**20:.1f}MB")
+
+    small, large = results[50_000], results[500_000]
+    assert large["rows"] == 500_000
+    # Growth is set by the chunk size, not the input: allow noise, not 10x
+    assert large["peak_rss_delta"] < small["peak_rss_delta"] * 1.5 + 16 * 2**20
@@ -0,0 +1,107 @@
+"""
+Prefix autocomplete: ranked top-k suggestions per keystroke
+"""
+import random
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from tests.bench.corpus import synthetic_companies
+from tests.bench.suggest import PrefixIndex, keystroke_latency, prefix_key, suggest_companies
+
+
+def brute_force(companies, prefix, country=None, k=10, popularity=None):
+    """Reference: filter by startswith, sort by popularity, length, name"""
+    df = companies.assign(_norm=companies["name_norm"].fillna(""),
+                          _pop=popularity if popularity is not None else 0.0)
+    df = df[df["_norm"].str.startswith(prefix_key(prefix))]
+    if country:
+        df = df[df["country"] == country.upper()]
+    df = df.assign(_len=df["_norm"].str.len())
+    df = df.sort_values(["_pop", "_len", "_norm"], ascending=[False, True, True], kind="stable")
+    return df["_norm"].head(k).tolist()
+
+
+@pytest.mark.bundled_data
+def test_suggests_bundled_companies():
+    """Test suggestions come from the list_companies() data"""
+    assert [s.name for s in suggest_companies("Rio")] == ["Rio Tinto Limited"]
+    assert [s.name for s in suggest_companies("b", country="au")] == ["BHP Group Limited"]
+    assert suggest_companies("rio", country="GB") == ()
+    assert suggest_companies("zzz") == ()
+
+
+def test_prefix_normalization():
+    """Test typed text is normalized like name_norm but keeps a trailing space"""
+    assert prefix_key("  Rio   T") == "rio t"
+    assert prefix_key("Rio ") == "rio "
+    assert prefix_key("Société Gén") == "societe gen"
+    assert prefix_key("AT&T Co") == "at&t co"
+
+
+def test_ranked_by_popularity_column():
+    """Test a stored popularity column orders the suggestions"""
+    companies = pd.DataFrame({
+        "name": ["Acme Mining", "Acme Metals", "Acme", "Acorn"],
+        "name_norm": ["acme mining", "acme metals", "acme", "acorn"],
+        "country": ["US", "US", "GB", "US"],
+        "lei": [None, None, None, None],
+        "popularity": [5.0, 9.0, 1.0, 7.0],
+    })
+    index = PrefixIndex(companies)
+
+    assert [s.name_norm for s in index.suggest("ac")] == ["acme metals", "acorn", "acme mining",
+                                                          "acme"]
+    assert [s.name_norm for s in index.suggest("acme ", k=1)] == ["acme metals"]
+    assert [s.name_norm for s in index.suggest("acme", country="gb")] == ["acme"]
+
+
+@pytest.fixture(scope="module")
+def large():
+    companies = synthetic_companies(100_000, seed=21)
+    return companies, PrefixIndex(companies)
+
+
+def test_matches_brute_force(large):
+    """Test top-k equals a full sort for random prefixes, with and without country"""
+    companies, index = large
+    aliases = companies[[f"alias{i}" for i in range(1, 6)]].notna().sum(axis=1)
+    popularity = companies["lei"].notna().astype(float) + 0.1 * aliases
+    rng = random.Random(0)
+    names = companies["name"].tolist()
+    for _ in range(200):
+        name = rng.choice(names)
+        prefix = name[:rng.randint(0, min(len(name), 8))]
+        country = rng.choice([None, "US", "DE"])
+        k = rng.choice([1, 5, 10, 25])
+        got = [s.name_norm for s in index.suggest(prefix, country, k)]
+        assert got == brute_force(companies, prefix, country, k, popularity), (prefix, country, k)
+
+
+def test_keystroke_calls_allocate_little(large):
+    """Test a warm suggest call allocates only a few small objects"""
+    _, index = large
+    prefixes = ["m", "ma", "mar", "marc", "marco", "marcor", "marcor "]
+    for prefix in prefixes:
+        index.suggest(prefix)
+
+    tracemalloc.start()
+    for prefix in prefixes * 100:
+        index.suggest(prefix)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 64 * 1024
+
+
+@pytest.mark.slow
+def test_keystroke_latency(large):
+    """Test typing 500 names keystroke by keystroke stays in microseconds"""
+    companies, index = large
+    names = companies["name"].sample(500, random_state=1)
+    for country in (None, "US"):
+        result = keystroke_latency(index, names, country)
+        print(f"\n  country={country}: {result['calls']} calls p50={result['p50_us']:.1f}us "
+              f"p99={result['p99_us']:.1f}us max={result['max_us']:.1f}us")
+        assert result["p50_us"] < 100
+        assert result["p99_us"] < 1000
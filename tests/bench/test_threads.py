@@ -0,0 +1,136 @@
+"""
+Concurrent reads from threads sharing one company index
+"""
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz, process
+
+from entityidentity import normalize_name
+from tests.bench.corpus import synthetic_companies, synthetic_queries
+from tests.bench.dataset import write_database
+from tests.bench.features import FeatureIndex, build_sidecar
+from tests.bench.index import CompanyIndex, default_index
+from tests.bench.threads import (concurrency_benchmark, gil_free_fraction, once,
+                                 resolve_threaded, thread_scaling)
+
+
+@pytest.fixture(scope="module")
+def companies():
+    return synthetic_companies(20_000, seed=8)
+
+
+@pytest.fixture(scope="module")
+def queries(companies):
+    frame = synthetic_queries(120, companies, seed=9, known_fraction=0.8)
+    return [(name, None if pd.isna(country) else country)
+            for name, country in frame.itertuples(index=False)]
+
+
+def _start_together(fn, threads):
+    """Call fn from several threads released at the same moment; return their results"""
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def run(i):
+        barrier.wait()
+        results[i] = fn()
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def test_once_initializes_once_under_contention():
+    """Test concurrent first callers share one computation and cache_clear resets it"""
+    calls = []
+
+    @once
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = _start_together(build, 8)
+    assert len(calls) == 1 and all(r is results[0] for r in results)
+    build.cache_clear()
+    assert build() is not results[0] and len(calls) == 2
+
+
+def test_default_index_built_once_across_threads():
+    """Test threads racing on the first default_index() call get the same index"""
+    default_index.cache_clear()
+    results = _start_together(default_index, 8)
+    assert all(r is results[0] for r in results)
+    assert default_index() is results[0]
+
+
+def test_lazy_blocking_keys_race(companies, queries, tmp_path):
+    """Test first queries racing on every scope's lazy keys, with and without a sidecar"""
+    path = write_database(tmp_path / "companies.parquet", 5_000, seed=8)
+    loaded = FeatureIndex.load(build_sidecar(path, tmp_path / "c.features"))
+    for index in (CompanyIndex(companies), loaded):
+        scopes = list(index.scope_rows)
+        blocks = _start_together(lambda: [index.block_keys(s) for s in scopes], 16)
+        for got in blocks:
+            assert all(a is b for a, b in zip(got, blocks[0]))
+
+    index = CompanyIndex(companies)
+    expected = [index.resolve(name, country) for name, country in queries]
+    index._block_keys.clear()
+    assert resolve_threaded(index, queries, 16) == expected
+
+
+@pytest.mark.slow
+def test_scoring_releases_the_gil(companies):
+    """Test another thread keeps running while a batch is scored, unlike process.extract"""
+    index = CompanyIndex(companies)
+    rows = index.scope_rows[None]
+    norms = [normalize_name(n) for n in ["Acme Mining Holdings", "Borvel Bank", "Zan Energy"]]
+    choices = index.name_norm[rows].tolist()
+
+    cdist_free, _ = gil_free_fraction(index.score, norms * 4, rows)
+    extract_free, _ = gil_free_fraction(
+        lambda: [process.extract(q, choices, scorer=fuzz.WRatio, limit=5) for q in norms * 4])
+    assert cdist_free > 0.2
+    assert extract_free < cdist_free / 2
+
+
+def test_threaded_results_equal_sequential(companies, queries):
+    """Test resolve on one shared index gives the sequential results at 1 to 16 threads"""
+    index = CompanyIndex(companies)
+    expected = [index.resolve(name, country) for name, country in queries]
+    for threads in (1, 4, 16):
+        assert resolve_threaded(index, queries, threads) == expected, threads
+
+
+@pytest.mark.slow
+def test_thread_scaling_1_to_16(companies, queries):
+    """Test results are correct at 1 to 16 threads and throughput does not collapse"""
+    results = thread_scaling(CompanyIndex(companies), queries)
+    assert [r["threads"] for r in results] == [1, 2, 4, 8, 16]
+    assert all(r["mismatches"] == 0 for r in results)
+    # Contention must not cost throughput, whatever the core count
+    assert min(r["speedup"] for r in results) > 0.5
+    cpus = os.cpu_count() or 1
+    if cpus >= 2:
+        best = max(r["speedup"] for r in results if r["threads"] <= cpus)
+        assert best > 1.3, f"no speedup on {cpus} cores: {results}"
+
+
+@pytest.mark.slow
+def test_thread_scaling_at_scale():
+    """Test scaling and GIL release on 200k companies"""
+    r = concurrency_benchmark(size=200_000, n_queries=200)
+    print(f"\n{r['cpus']} cpus; cdist GIL-free {r['cdist_gil_free']:.2f}, "
+          f"extract {r['extract_gil_free']:.2f}")
+    for s in r["scaling"]:
+        print(f"  threads={s['threads']:>2} qps={s['qps']:7.1f} speedup={s['speedup']:.2f}")
+    assert all(s["mismatches"] == 0 for s in r["scaling"])
+    assert r["cdist_gil_free"] > 2 * r["extract_gil_free"]
@@ -0,0 +1,168 @@
+"""
+Concurrent reads from threads sharing one company index
+
+A threaded server (e.g. a WSGI app) can share one CompanyIndex between all
+request threads:
+
+- Shared state is built once: default_index() and default_prefix_index()
+  initialize under a lock (functools.lru_cache would let concurrent first
+  callers each build their own), and CompanyIndex builds each country's
+  blocking keys under the index's lock the first time a query needs them.
+- Nothing else is written after construction; every resolve() keeps its
+  intermediate arrays local, and instrumentation uses a context variable.
+- Scoring goes through RapidFuzz's process.cdist, which releases the GIL
+  while it scores, so threads overlap the dominant cost of a query.
+  process.extract and per-candidate fuzz calls hold the GIL throughout, so
+  they are not used on the read path.
+
+Normalization and result building remain Python and hold the GIL; they are
+a small share of a query once the candidate set is non-trivial.
+
+``entityidentity-bench threads`` reports throughput at 1 to 16 threads,
+checked against sequential results, and the share of time other threads
+keep running while a batch is scored.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+
+def once(fn):
+    """Decorator: compute fn() once, even when first called from many threads
+
+    Later calls return the stored value without locking. Like lru_cache, the
+    wrapper has cache_clear() and __wrapped__.
+    """
+    lock = threading.Lock()
+    state = {}
+
+    @wraps(fn)
+    def wrapper():
+        try:
+            return state["value"]
+        except KeyError:
+            pass
+        with lock:
+            if "value" not in state:
+                state["value"] = fn()
+            return state["value"]
+
+    def cache_clear():
+        with lock:
+            state.clear()
+
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+def resolve_threaded(index, queries, threads):
+    """Resolve (name, country) pairs on a thread pool sharing one index
+
+    Returns:
+        List of resolve() results in query order
+    """
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(lambda q: index.resolve(q[0], q[1]), queries))
+
+
+def gil_free_fraction(fn, *args):
+    """How much a spinning thread progresses while fn runs in another thread
+
+    The calling thread counts loop iterations while fn(*args) runs on a
+    worker thread, relative to its rate when running alone. If fn releases
+    the GIL the spinner keeps its share of the CPUs (about 1/2 on one core, 1
+    with a core to spare); if fn holds the GIL in a long C call, the spinner
+    is stopped until it returns.
+
+    Returns:
+        Tuple (fraction, seconds fn took)
+    """
+    def spin_rate(seconds):
+        count, start = 0, time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            count += 1
+        return count / (time.perf_counter() - start)
+
+    solo = spin_rate(0.2)
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: (fn(*args), done.set()))
+    count, start = 0, time.perf_counter()
+    worker.start()
+    while not done.is_set():
+        time.perf_counter()
+        count += 1
+    elapsed = time.perf_counter() - start
+    worker.join()
+    return count / elapsed / solo, elapsed
+
+
+def thread_scaling(index, queries, threads=THREAD_COUNTS, repeats=1):
+    """Throughput and correctness of threaded resolve at several thread counts
+
+    Each thread count starts from an index whose lazy blocking keys have been
+    dropped, so the first queries race to initialize them.
+
+    Args:
+        index: CompanyIndex shared by all threads
+        queries: List of (name, country) pairs
+        threads: Thread counts to run
+        repeats: Times the queries are replayed per thread count
+
+    Returns:
+        List of dicts with threads, qps, speedup over the first thread count
+        and mismatches against sequential results
+    """
+    expected = [index.resolve(name, country) for name, country in queries]
+    workload = list(queries) * repeats
+    results = []
+    for n in threads:
+        index._block_keys.clear()
+        start = time.perf_counter()
+        got = resolve_threaded(index, workload, n)
+        elapsed = time.perf_counter() - start
+        mismatches = sum(g != e for g, e in zip(got, expected * repeats))
+        results.append({"threads": n, "qps": len(workload) / elapsed, "mismatches": mismatches})
+    for r in results:
+        r["speedup"] = r["qps"] / results[0]["qps"]
+    return results
+
+
+def concurrency_benchmark(size=100_000, n_queries=200, threads=THREAD_COUNTS, seed=0):
+    """Thread scaling of resolve on a synthetic table, plus GIL release of scoring
+
+    Returns:
+        Dict with cpus, per-thread-count results, and the GIL-free fraction
+        of one batch scored through CompanyIndex.score (cdist) and through
+        process.extract for comparison
+    """
+    import pandas as pd
+    from rapidfuzz import fuzz, process
+
+    from entityidentity import normalize_name
+    from tests.bench.corpus import synthetic_companies, synthetic_queries
+    from tests.bench.index import CompanyIndex
+
+    companies = synthetic_companies(size, seed=seed)
+    index = CompanyIndex(companies)
+    queries = [(name, None if pd.isna(country) else country) for name, country in
+               synthetic_queries(n_queries, companies, seed=seed + 1).itertuples(index=False)]
+
+    rows = index.scope_rows[None]
+    norms = [normalize_name(name) for name, _ in queries[:4]]
+    choices = index.name_norm[rows].tolist()
+    cdist_free, cdist_seconds = gil_free_fraction(index.score, norms, rows)
+    extract_free, extract_seconds = gil_free_fraction(
+        lambda: [process.extract(q, choices, scorer=fuzz.WRatio, limit=5) for q in norms])
+    return {
+        "cpus": os.cpu_count(),
+        "size": size,
+        "scaling": thread_scaling(index, queries, threads),
+        "cdist_gil_free": cdist_free,
+        "cdist_seconds": cdist_seconds,
+        "extract_gil_free": extract_free,
+        "extract_seconds": extract_seconds,
+    }
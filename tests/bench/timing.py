@@ -0,0 +1,161 @@
+"""
+Timing helpers: latency percentiles, cold/warm phases and throughput
+"""
+import time
+
+
+def percentile(samples, q):
+    """Return the q-th percentile (0-100) of samples using linear interpolation"""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    frac = pos - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * frac
+
+
+def time_call(fn, *args, **kwargs):
+    """Call fn once and return (seconds, result, error)
+
+    Exceptions are captured rather than raised: the installed entityidentity
+    version may have bugs (see BUGS_FOUND.md) and a failing call still costs
+    time that callers pay in production.
+    """
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+        error = None
+    except Exception as e:
+        result = None
+        error = e
+    return time.perf_counter() - start, result, error
+
+
+def summarize(latencies, errors=None):
+    """Summarize a list of per-call latencies (seconds) into a report dict
+
+    Returns:
+        Dict with count, error counts, p50/p95/p99/mean/max in milliseconds and
+        queries per second over the summed call time
+    """
+    errors = errors or []
+    total = sum(latencies)
+    error_counts = {}
+    for error in errors:
+        key = type(error).__name__
+        error_counts[key] = error_counts.get(key, 0) + 1
+    return {
+        "count": len(latencies),
+        "errors": error_counts,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (total / len(latencies) * 1000) if latencies else float("nan"),
+        "max_ms": max(latencies) * 1000 if latencies else float("nan"),
+        "qps": len(latencies) / total if total > 0 else float("inf"),
+    }
+
+
+def replay(fn, queries, repeats=1):
+    """Replay (name, country) queries through fn
+
+    Returns:
+        Tuple of (latencies in seconds, list of raised exceptions)
+    """
+    latencies = []
+    errors = []
+    for _ in range(repeats):
+        for name, country in queries:
+            seconds, _, error = time_call(fn, name, country=country)
+            latencies.append(seconds)
+            if error is not None:
+                errors.append(error)
+    return latencies, errors
+
+
+def clear_caches():
+    """Drop entityidentity's in-process company cache so the next call is cold"""
+    from entityidentity.companies import companyidentity
+
+    companyidentity.load_companies.cache_clear()
+
+
+def measure_latency(fn, queries, repeats=3):
+    """Measure cold and warm latency of fn over a query corpus
+
+    The cold timing is the first call after the company cache is cleared, so it
+    includes loading the data file. Warm timings replay the corpus with and
+    without country hints once the data is resident.
+
+    Args:
+        fn: Callable with signature fn(name, country=None), e.g. match_company
+        queries: List of (name, country) pairs
+        repeats: Number of times to replay the corpus in the warm phase
+
+    Returns:
+        Dict with 'cold_ms', 'with_country', 'without_country' and 'warm' summaries
+    """
+    clear_caches()
+    name, country = queries[0]
+    cold_seconds, _, cold_error = time_call(fn, name, country=country)
+
+    with_lat, with_err = replay(fn, list(queries), repeats)
+    without_lat, without_err = replay(fn, [(n, None) for n, _ in queries], repeats)
+
+    return {
+        "cold_ms": cold_seconds * 1000,
+        "cold_error": type(cold_error).__name__ if cold_error else None,
+        "with_country": summarize(with_lat, with_err),
+        "without_country": summarize(without_lat, without_err),
+        "warm": summarize(with_lat + without_lat, with_err + without_err),
+    }
+
+
+def process_memory(pid="self"):
+    """Return resident memory of a process in bytes
+
+    Reads /proc/<pid>/smaps_rollup on Linux, which also gives the proportional
+    set size (PSS): pages shared between processes, such as a memory-mapped
+    index, are split between the processes mapping them. Elsewhere only the
+    peak RSS of the current process is available.
+
+    Returns:
+        Dict with 'rss' and 'pss' (None if unavailable) in bytes
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        kb = {key: int(fields[key].split()[0]) * 1024 for key in ("Rss", "Pss") if key in fields}
+        return {"rss": kb.get("Rss"), "pss": kb.get("Pss")}
+    except (OSError, ValueError):
+        return {"rss": peak_rss(), "pss": None}
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS (VmHWM) for this process; False if unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """Return this process's peak RSS in bytes (since the last reset_peak_rss)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
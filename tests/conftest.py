@@ -1,8 +1,29 @@
 """
 Pytest configuration and fixtures for entityidentity tests
 """
+import os
+
 import pytest
 
+# Set to a row count to run the whole suite against a synthetic database of that
+# size (the bundled companies first, then generated rows); see tests.bench.dataset
+SYNTHETIC_ROWS_ENV = "ENTITYIDENTITY_SYNTHETIC_ROWS"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def synthetic_database(tmp_path_factory):
+    """Install a scaled synthetic database when ENTITYIDENTITY_SYNTHETIC_ROWS is set"""
+    rows = os.environ.get(SYNTHETIC_ROWS_ENV)
+    if not rows:
+        yield None
+        return
+    from tests.bench.dataset import use_database, write_database
+
+    path = tmp_path_factory.mktemp("synthetic") / "companies.parquet"
+    write_database(path, int(rows), include_bundled=True)
+    with use_database(path):
+        yield path
+
 
 @pytest.fixture(scope="session")
 def entityidentity_module():
@@ -26,20 +47,49 @@ def available_countries(company_database):
     return []
 
 
+def pytest_addoption(parser):
+    """Add --run-slow for the benchmarks at scale"""
+    parser.addoption("--run-slow", action="store_true", default=False,
+                     help="also run tests marked slow (timing benchmarks at scale)")
+
+
 def pytest_configure(config):
     """Configure pytest with custom settings"""
     config.addinivalue_line(
-        "markers", "slow: marks tests as slow (deselect with '-m \"not slow\"')"
+        "markers", "slow: timing benchmarks at scale, skipped unless --run-slow or -m slow"
     )
     config.addinivalue_line(
         "markers", "requires_data: tests that require company data to be present"
     )
+    config.addinivalue_line(
+        "markers", "bundled_data: tests that assert exact answers on the bundled companies "
+        "(skipped when a synthetic database is installed)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless asked for, and bundled_data tests on a synthetic database"""
+    if not config.getoption("--run-slow") and "slow" not in config.getoption("-m"):
+        skip_slow = pytest.mark.skip(reason="timing benchmark; run with --run-slow")
+        for item in items:
+            if "slow" in item.keywords:
+                item.add_marker(skip_slow)
+
+    if not os.environ.get(SYNTHETIC_ROWS_ENV):
+        return
+    skip = pytest.mark.skip(reason=f"{SYNTHETIC_ROWS_ENV} replaces the bundled companies")
+    for item in items:
+        if "bundled_data" in item.keywords:
+            item.add_marker(skip)
 
 
 def pytest_report_header(config):
     """Add custom header to pytest output"""
-    return [
+    header = [
         "EntityIdentity Installation Test Suite",
         "Testing entity resolution and data availability"
     ]
+    if os.environ.get(SYNTHETIC_ROWS_ENV):
+        header.append(f"Synthetic database: {int(os.environ[SYNTHETIC_ROWS_ENV]):,} generated rows")
+    return header
 
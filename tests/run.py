@@ -6,10 +6,153 @@ import sys
 import pytest
 
 
+def profile_startup(args):
+    """Profile cold start in a subprocess and write a JSON breakdown"""
+    from tests.bench.startup import main as startup_main
+
+    args, outputs = pop_option(args, "--profile-output")
+    return startup_main(outputs[-1][0] if outputs else "startup_profile.json")
+
+
+def use_synthetic_rows(args):
+    """Turn --synthetic-rows N into ENTITYIDENTITY_SYNTHETIC_ROWS for the conftest fixture"""
+    import os
+
+    args, rows = pop_option(args, "--synthetic-rows")
+    if rows:
+        os.environ["ENTITYIDENTITY_SYNTHETIC_ROWS"] = rows[-1][0]
+    return args
+
+
+class UsageError(ValueError):
+    """A runner option is missing its value"""
+
+
+def pop_option(args, flag, nargs=1):
+    """Remove every occurrence of a flag and its values from args
+
+    Returns:
+        Tuple (remaining args, list of value lists, one per occurrence)
+
+    Raises:
+        UsageError: If a flag is not followed by nargs values
+    """
+    found = []
+    while flag in args:
+        i = args.index(flag)
+        values = args[i + 1:i + 1 + nargs]
+        if len(values) < nargs or any(v.startswith("--") for v in values):
+            raise UsageError(f"{flag} needs {nargs} value{'s' if nargs > 1 else ''}")
+        found.append(values)
+        args = args[:i] + args[i + 1 + nargs:]
+    return args, found
+
+
+def baseline_options(args):
+    """Strip the performance-baseline flags from args
+
+    Returns:
+        Tuple (remaining args, options dict or None if --perf-baseline is absent)
+    """
+    from tests.bench.baseline import BASELINE_FILE
+
+    enabled = "--perf-baseline" in args
+    args = [a for a in args if a != "--perf-baseline"]
+    update = "--update-baseline" in args
+    args = [a for a in args if a != "--update-baseline"]
+    args, files = pop_option(args, "--baseline-file")
+    args, tolerances = pop_option(args, "--tolerance")
+    if not enabled:
+        return args, None
+    return args, {
+        "path": files[-1][0] if files else BASELINE_FILE,
+        "tolerances": [t[0] for t in tolerances],
+        "update": update,
+    }
+
+
+def check_baseline(options):
+    """Measure performance and gate it against the stored baseline
+
+    The first run of a version on a machine records its baseline; later runs
+    fail if any metric regressed beyond its tolerance. A run whose probed
+    calls raise fails without recording anything.
+
+    Returns:
+        0 if recorded or within tolerance, 1 on regression or probe errors
+    """
+    from tests.bench.baseline import (collect_metrics, gate, machine_fingerprint,
+                                      parse_tolerances, print_regressions)
+
+    tolerance, overrides = parse_tolerances(options["tolerances"])
+    fingerprint = machine_fingerprint()
+    print()
+    print(f"Performance baseline: {options['path']} (machine {fingerprint['id']}, "
+          f"{fingerprint['cpus']} x {fingerprint['cpu']})")
+    measurement = collect_metrics()
+    status, regressions, stored = gate(options["path"], measurement, tolerance, overrides,
+                                       update=options["update"], fingerprint=fingerprint)
+    version = measurement["version"]
+    if status == "errors":
+        print(f"❌ {measurement['metrics']['error_rate']:.0%} of probed resolve_company calls "
+              f"raised ({measurement['first_error']}); timings would measure the exception "
+              f"path, so no baseline was recorded or checked")
+        return 1
+    if status == "recorded":
+        print(f"📝 Recorded baseline for entityidentity {version}")
+        return 0
+    if status == "passed":
+        print(f"✅ No regressions against the {stored['recorded']} baseline "
+              f"(tolerance {tolerance:.0%})")
+        return 0
+    print(f"❌ {len(regressions)} metric(s) regressed against the {stored['recorded']} baseline:")
+    print_regressions(regressions, tolerance, overrides)
+    if options["update"]:
+        print(f"📝 Baseline for entityidentity {version} updated")
+    return 1
+
+
+def compare_versions(args):
+    """Measure two installed entityidentity versions and print a comparison table
+
+    Each side is "current", a Python executable (e.g. a virtualenv's
+    bin/python) or a directory created with pip install --target.
+
+    Returns:
+        0, or 1 if either side's probed calls raised; the table is still
+        printed, headed by a warning naming the side and its error
+    """
+    from tests.bench.baseline import collect_metrics, comparison_table, probe_error_warning
+
+    args, pairs = pop_option(args, "--compare-versions", nargs=2)
+    args, outputs = pop_option(args, "--compare-output")
+    a, b = (collect_metrics(None if side == "current" else side) for side in pairs[-1])
+    warnings = [w for w in (probe_error_warning(a), probe_error_warning(b)) if w]
+    table = comparison_table(a, b)
+    if warnings:
+        table = "\n".join(f"> ⚠️ {w}" for w in warnings) + "\n\n" + table
+    print(table)
+    if outputs:
+        with open(outputs[-1][0], "w") as f:
+            f.write(table + "\n")
+    return 1 if warnings else 0
+
+
 def main():
     """Run the test suite via command line"""
     args = sys.argv[1:] if len(sys.argv) > 1 else ["-v"]
     
+    try:
+        if "--profile-startup" in args:
+            return profile_startup(args)
+        if "--compare-versions" in args:
+            return compare_versions(args)
+        args = use_synthetic_rows(args)
+        args, baseline = baseline_options(args)
+    except UsageError as e:
+        print(f"entityidentity-test: {e}", file=sys.stderr)
+        return 2
+    
     # Add the tests directory to pytest args
     test_args = ["tests"] + args
     
@@ -25,6 +168,9 @@ def main():
         print("✅ All tests passed!")
     else:
         print(f"❌ Tests failed with exit code: {exit_code}")
+
+    if baseline is not None and exit_code == 0:
+        exit_code = check_baseline(baseline)
     
     return exit_code
 